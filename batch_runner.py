@@ -0,0 +1,176 @@
+"""
+Batch Runner
+Headless analysis of many (start, end, indices) scenarios in one process.
+
+The price panel is loaded once; each scenario gets its slice and runs the
+summary statistics, holding-period returns and market timing cost of every
+selected index. Scenarios can run in a process pool. All results go into one
+combined table with one row per (scenario, index).
+
+Scenarios come from a file and/or the command line:
+  - CSV with columns name, start, end, indices (indices separated by ';',
+    empty for all), or a JSON list of objects with the same keys
+  - --scenario START,END[,INDEX;INDEX...] (START / END may be empty)
+
+Usage:
+    python batch_runner.py --scenarios scenarios.csv --jobs 4 --output batch_results.csv
+    python batch_runner.py --scenario 2000-01-01,2009-12-31 --scenario "2010-01-01,,S&P 500 (US);DAX (German)"
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from price_store import load_prices
+from market_analysis import MarketIndexAnalyzer
+from market_timing_cost import timing_cost_curves
+
+BEST_DAYS_TO_MISS = (5, 10, 20, 30, 40)
+
+
+def _date(value):
+    """A scenario bound as a string, or None when open-ended"""
+    if value is None or pd.isna(value) or not str(value).strip():
+        return None
+    return str(value).strip()
+
+
+def _scenario(name, start=None, end=None, indices=None):
+    """Normalize one scenario to a dict with name, start, end and indices (None = all)"""
+    if isinstance(indices, str):
+        indices = [idx.strip() for idx in indices.split(';') if idx.strip()]
+    start, end = _date(start), _date(end)
+    return {
+        'name': name or f"{start or 'start'} to {end or 'end'}",
+        'start': start,
+        'end': end,
+        'indices': list(indices) if indices else None,
+    }
+
+
+def load_scenarios(path):
+    """Read scenarios from a CSV or JSON file"""
+    if path.lower().endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            rows = json.load(f)
+    else:
+        rows = pd.read_csv(path, dtype=str, keep_default_na=False).to_dict('records')
+    return [_scenario(row.get('name'), row.get('start'), row.get('end'), row.get('indices')) for row in rows]
+
+
+def parse_scenario(text):
+    """Parse a CLI scenario 'START,END[,INDEX;INDEX...]'"""
+    parts = text.split(',', 2)
+    if len(parts) < 2:
+        raise ValueError(f"Scenario must look like START,END[,INDEX;INDEX...]: {text!r}")
+    return _scenario(None, parts[0], parts[1], parts[2] if len(parts) > 2 else None)
+
+
+def run_scenario(scenario, prices, initial_investment=10000):
+    """
+    Analyze one scenario's price slice
+
+    Returns a DataFrame with one row per index: summary statistics, holding
+    period positive-return probability and mean return, and the cost of
+    missing the best days.
+    """
+    prices = prices.dropna(axis=1, how='all')
+    if prices.empty:
+        print(f"✗ {scenario['name']}: no data in range")
+        return pd.DataFrame()
+
+    analyzer = MarketIndexAnalyzer()
+    analyzer.data = prices
+    if scenario['start']:
+        analyzer.start_date = scenario['start']
+    if scenario['end']:
+        analyzer.end_date = scenario['end']
+
+    table = analyzer.generate_summary_statistics()
+    for period, metrics in analyzer.calculate_holding_period_returns().items():
+        table[f'{period} Positive (%)'] = metrics['positive_pct'].round(2)
+        table[f'{period} Mean Return (%)'] = metrics['mean'].round(2)
+
+    curves = timing_cost_curves(prices, max_days=max(BEST_DAYS_TO_MISS), initial_investment=initial_investment)
+    best = curves[curves['scenario'] == 'Miss Best'].set_index(['days_missed', 'index'])
+    table['Fully Invested Value ($)'] = best.loc[0, 'final_value'].round(2)
+    for n_days in BEST_DAYS_TO_MISS:
+        table[f'Miss {n_days} Best Lost (%)'] = best.loc[n_days, 'lost_percentage'].round(2)
+
+    table.index.name = 'index'
+    table = table.reset_index()
+    table.insert(0, 'scenario', scenario['name'])
+    table.insert(1, 'start', scenario['start'] or '')
+    table.insert(2, 'end', scenario['end'] or '')
+    print(f"✓ {scenario['name']}: {len(table)} indices")
+    return table
+
+
+def _slice(panel, scenario):
+    """Rows and columns of the panel that belong to a scenario"""
+    data = panel.loc[scenario['start']:scenario['end']]
+    if scenario['indices'] is not None:
+        missing = [idx for idx in scenario['indices'] if idx not in panel.columns]
+        if missing:
+            print(f"Note: {scenario['name']}: unknown indices {missing}")
+        data = data[[idx for idx in scenario['indices'] if idx in panel.columns]]
+    return data
+
+
+def run_batch(scenarios, csv_file='market_indices_data.csv', initial_investment=10000, n_jobs=1,
+              output_file=None, panel=None):
+    """
+    Run every scenario against one loaded panel
+
+    Parameters:
+    - scenarios: list of scenario dicts (see load_scenarios / parse_scenario)
+    - csv_file: price data; loaded once (from its columnar store when current)
+    - initial_investment: Starting investment amount for the timing costs
+    - n_jobs: scenarios run in this many processes (1 runs in-process)
+    - output_file: if set, the combined table is written there as CSV
+    - panel: an already loaded price DataFrame to use instead of csv_file
+
+    Returns the combined DataFrame (one row per scenario and index).
+    """
+    if panel is None:
+        print(f"Loading data from {csv_file}...")
+        panel = load_prices(csv_file)
+    slices = [_slice(panel, scenario) for scenario in scenarios]
+
+    if n_jobs > 1 and len(scenarios) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            tables = list(pool.map(run_scenario, scenarios, slices, [initial_investment] * len(scenarios)))
+    else:
+        tables = [run_scenario(scenario, data, initial_investment) for scenario, data in zip(scenarios, slices)]
+
+    tables = [table for table in tables if not table.empty]
+    combined = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+    if output_file:
+        combined.to_csv(output_file, index=False)
+        print(f"Saved {len(combined)} rows for {len(scenarios)} scenarios to '{output_file}'")
+    return combined
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run market index analysis for many date-range scenarios')
+    parser.add_argument('--scenarios', help='CSV or JSON file of scenarios (name, start, end, indices)')
+    parser.add_argument('--scenario', action='append', default=[],
+                        help='START,END[,INDEX;INDEX...]; may be repeated')
+    parser.add_argument('--csv', default='market_indices_data.csv', help='price data file')
+    parser.add_argument('--investment', type=float, default=10000, help='initial investment for timing costs')
+    parser.add_argument('--jobs', type=int, default=1, help='scenarios to run in parallel')
+    parser.add_argument('--output', default='batch_results.csv', help='combined results file')
+    args = parser.parse_args()
+
+    scenarios = load_scenarios(args.scenarios) if args.scenarios else []
+    scenarios += [parse_scenario(text) for text in args.scenario]
+    if not scenarios:
+        parser.error('no scenarios given (use --scenarios FILE and/or --scenario START,END)')
+    if not os.path.exists(args.csv):
+        parser.error(f"price data not found: {args.csv}")
+
+    run_batch(scenarios, csv_file=args.csv, initial_investment=args.investment, n_jobs=args.jobs,
+              output_file=args.output)
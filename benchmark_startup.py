@@ -0,0 +1,88 @@
+"""
+Startup Benchmark
+Times the stats-only path (import, analyzer, load, summary statistics) in
+fresh interpreters, next to the same path with the plotting stack imported
+and styled up front, as every run did before plotting imports became lazy.
+
+Usage:
+    python benchmark_startup.py [--runs 5] [--csv market_indices_data.csv]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PLOTTING_MODULES = ('matplotlib', 'seaborn', 'plotly')
+
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+{eager}
+import market_analysis
+imported = time.perf_counter()
+analyzer = market_analysis.MarketIndexAnalyzer()
+analyzer.fetch_data(csv_file={csv!r})
+loaded = time.perf_counter()
+analyzer.generate_summary_statistics()
+done = time.perf_counter()
+print(json.dumps({{
+    'import': imported - start,
+    'load': loaded - imported,
+    'stats': done - loaded,
+    'plotting_modules': sorted(m for m in {modules!r} if m in sys.modules),
+}}))
+"""
+
+_EAGER = """
+import matplotlib.pyplot, seaborn, plotly.graph_objects
+import charts
+charts.apply_style()
+"""
+
+SCENARIOS = {
+    'stats-only (lazy plotting)': '',
+    'plotting stack loaded at startup': _EAGER,
+}
+
+
+def run_once(eager, csv_file):
+    """Run one scenario in a fresh interpreter; returns wall seconds and the child's timings"""
+    code = _CHILD.format(eager=eager, csv=csv_file, modules=PLOTTING_MODULES)
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+    wall = time.perf_counter() - start
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['wall'] = wall
+    return timings
+
+
+def benchmark(runs=5, csv_file='market_indices_data.csv'):
+    """Median timings per scenario over several fresh-interpreter runs"""
+    rows = {}
+    for name, eager in SCENARIOS.items():
+        samples = [run_once(eager, csv_file) for _ in range(runs)]
+        rows[name] = {key: statistics.median(s[key] for s in samples)
+                      for key in ('wall', 'import', 'load', 'stats')}
+        rows[name]['plotting_modules'] = samples[-1]['plotting_modules']
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--csv', default='market_indices_data.csv')
+    args = parser.parse_args()
+
+    print(f"Median of {args.runs} fresh-interpreter runs (seconds):")
+    results = benchmark(args.runs, args.csv)
+    for name, row in results.items():
+        loaded = ', '.join(row['plotting_modules']) or 'none'
+        print(f"  {name:34s} wall {row['wall']:.2f}  import {row['import']:.2f}  "
+              f"load {row['load']:.3f}  stats {row['stats']:.3f}  plotting modules: {loaded}")
+    lazy, eager = results.values()
+    print(f"Stats-only startup is {eager['wall'] / lazy['wall']:.1f}x faster than with the plotting stack")
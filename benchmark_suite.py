@@ -0,0 +1,188 @@
+"""
+Benchmark Suite
+Times the main analysis paths on synthetic panels of increasing size and
+saves the results as JSON, so runs on different commits can be compared.
+
+Benchmarks (best of --repeats, derived-series cache cleared before each run):
+  fetch_data (csv)                  CSV parse + migration + store write
+  fetch_data (store)                columnar store load
+  calculate_returns
+  calculate_holding_period_returns
+  _calculate_max_drawdown
+  generate_summary_statistics
+  calculate_correlation_matrix      float64 and float32 products
+  plot_correlation_heatmap          skipped above --max-plot-series
+  analyze_market_timing_cost        one index, including its chart
+
+Usage:
+    python benchmark_suite.py --series 14,1000 --years 10,35 --repeats 3
+    python benchmark_suite.py --series 10000 --years 100 --repeats 1 --output big.json
+    python benchmark_suite.py --compare benchmark_results/<old>.json benchmark_results/<new>.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from synthetic_data import generate_panel
+from price_store import store_path_for
+from market_analysis import MarketIndexAnalyzer
+from market_timing_cost import analyze_market_timing_cost
+
+RESULTS_DIR = 'benchmark_results'
+
+
+def _quiet(call):
+    """Run call() with its progress output suppressed"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return call()
+
+
+def _time(setup, call, repeats):
+    """Best and all wall times of call() over repeats, running setup() untimed before each"""
+    times = []
+    for _ in range(repeats):
+        setup()
+        start = time.perf_counter()
+        _quiet(call)
+        times.append(time.perf_counter() - start)
+    return min(times), times
+
+
+def benchmark_panel(data, repeats=3, max_plot_series=5000, workdir='.'):
+    """Run every benchmark on one panel; returns a list of result dicts"""
+    csv_file = os.path.join(workdir, 'benchmark_data.csv')
+    store_dir = store_path_for(csv_file)
+    analyzer = MarketIndexAnalyzer()
+    analyzer.data = data
+    _quiet(lambda: analyzer.save_data_to_csv(csv_file))
+
+    def drop_store():
+        shutil.rmtree(store_dir, ignore_errors=True)
+
+    loader = MarketIndexAnalyzer()
+    loader.start_date = str(data.index[0].date())
+    loader.end_date = str(data.index[-1].date())
+    cases = [
+        ('fetch_data (csv)', drop_store, lambda: loader.fetch_data(csv_file=csv_file)),
+        ('fetch_data (store)', loader.invalidate_cache, lambda: loader.fetch_data(csv_file=csv_file)),
+        ('calculate_returns', analyzer.invalidate_cache, analyzer.calculate_returns),
+        ('calculate_holding_period_returns', analyzer.invalidate_cache, analyzer.calculate_holding_period_returns),
+        ('_calculate_max_drawdown', analyzer.invalidate_cache, analyzer._calculate_max_drawdown),
+        ('generate_summary_statistics', analyzer.invalidate_cache, analyzer.generate_summary_statistics),
+        ('calculate_correlation_matrix', analyzer.invalidate_cache, analyzer.calculate_correlation_matrix),
+        ('calculate_correlation_matrix (float32)', analyzer.invalidate_cache,
+         lambda: analyzer.calculate_correlation_matrix(dtype=np.float32)),
+        ('plot_correlation_heatmap', analyzer.invalidate_cache, analyzer.plot_correlation_heatmap),
+        ('analyze_market_timing_cost', lambda: None,
+         lambda: analyze_market_timing_cost(csv_file=csv_file, index_name=data.columns[0])),
+    ]
+
+    results = []
+    for name, setup, call in cases:
+        if name == 'plot_correlation_heatmap' and data.shape[1] > max_plot_series:
+            results.append({'benchmark': name, 'skipped': f'more than {max_plot_series} series'})
+            continue
+        best, times = _time(setup, call, repeats)
+        results.append({'benchmark': name, 'seconds': best, 'times': times})
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_suite(series=(14, 1000), years=(10, 35), repeats=3, seed=0, max_plot_series=5000):
+    """Run the benchmarks for every (series, years) size; returns the JSON-ready report"""
+    report = {
+        'commit': _git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': seed,
+        'repeats': repeats,
+        'results': [],
+    }
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # Charts and stores are written into the scratch directory
+        os.chdir(workdir)
+        try:
+            for n_series in series:
+                for n_years in years:
+                    start = time.perf_counter()
+                    data = generate_panel(n_series=n_series, years=n_years, seed=seed)
+                    generated = time.perf_counter() - start
+                    print(f"{n_series} series x {n_years} years ({len(data):,} rows, "
+                          f"generated in {generated:.2f}s)")
+                    for result in benchmark_panel(data, repeats, max_plot_series, workdir):
+                        result.update(n_series=n_series, years=n_years, rows=len(data))
+                        report['results'].append(result)
+                        if 'skipped' in result:
+                            print(f"  - {result['benchmark']:40s} skipped ({result['skipped']})")
+                        else:
+                            print(f"  ✓ {result['benchmark']:40s} {result['seconds']:.4f}s")
+        finally:
+            os.chdir(cwd)
+    return report
+
+
+def compare_reports(old, new):
+    """Table of new / old best times for benchmarks present in both reports"""
+    def index(report):
+        return {(r['benchmark'], r['n_series'], r['years']): r['seconds']
+                for r in report['results'] if 'seconds' in r}
+    before, after = index(old), index(new)
+    rows = [(name, n_series, n_years, before[key], after[key], after[key] / before[key])
+            for key in before if key in after for name, n_series, n_years in [key]]
+    return pd.DataFrame(rows, columns=['benchmark', 'n_series', 'years', 'old_seconds', 'new_seconds', 'ratio'])
+
+
+def _ints(text):
+    return [int(value) for value in text.split(',') if value.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the analysis on synthetic market panels')
+    parser.add_argument('--series', type=_ints, default=[14, 1000], help='comma-separated series counts')
+    parser.add_argument('--years', type=_ints, default=[10, 35], help='comma-separated history lengths')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-plot-series', type=int, default=5000,
+                        help='skip the correlation heatmap above this many series')
+    parser.add_argument('--output', help=f'JSON file (default {RESULTS_DIR}/<commit>-<time>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two saved reports')
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f_old, open(args.compare[1]) as f_new:
+            comparison = compare_reports(json.load(f_old), json.load(f_new))
+        print(comparison.to_string(index=False, float_format=lambda v: f'{v:.4f}'))
+        sys.exit(0)
+
+    report = run_suite(args.series, args.years, args.repeats, args.seed, args.max_plot_series)
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{report['commit'] or 'local'}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=1)
+    print(f"Saved benchmark results to '{output}'")
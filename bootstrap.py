@@ -0,0 +1,163 @@
+"""
+Block Bootstrap
+Confidence intervals for holding-period statistics.
+
+Long holding periods (10-20 years on ~35 years of data) have very few
+independent windows, so the point estimates from calculate_holding_period_returns
+are noisy. Here each index's daily log returns are resampled in blocks
+(stationary bootstrap with geometric block lengths, or circular moving blocks
+of fixed length), which keeps short-range dependence, and the rolling
+holding-period statistics are recomputed on every replicate.
+
+Horizons are the calendar horizons of calculate_holding_period_returns
+('5 years' is measured on each index's own dates). A resampled series has no
+dates, so its windows span the index's mean number of trading days per
+horizon, and the point estimates are the calendar-horizon statistics.
+
+Replicates are built as (replicates x days) NumPy arrays, one chunk at a time.
+A prefix sum along each row turns every holding-period window into a single
+subtraction. Chunks are spread over a process pool.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from horizons import HorizonIndex
+from summary_kernel import consecutive_returns
+
+# Same horizons as calculate_holding_period_returns
+DEFAULT_HORIZONS = {
+    '1 Year': '1 year',
+    '3 Years': '3 years',
+    '5 Years': '5 years',
+    '10 Years': '10 years',
+    '15 Years': '15 years',
+    '20 Years': '20 years',
+}
+
+
+def _resample_positions(rng, n_days, n_replicates, block_length, method):
+    """(replicates x n_days) positions into the original series for one chunk"""
+    if method == 'stationary':
+        # A new block starts with probability 1/block_length; otherwise continue the current one
+        starts = rng.integers(0, n_days, size=(n_replicates, n_days))
+        new_block = rng.random((n_replicates, n_days)) < 1.0 / block_length
+        new_block[:, 0] = True
+        t = np.arange(n_days)
+        block_begin = np.maximum.accumulate(np.where(new_block, t, 0), axis=1)
+        block_start = np.take_along_axis(starts, block_begin, axis=1)
+        return (block_start + (t - block_begin)) % n_days
+    if method == 'moving':
+        n_blocks = -(-n_days // block_length)
+        starts = rng.integers(0, n_days, size=(n_replicates, n_blocks))
+        positions = starts[:, :, None] + np.arange(block_length)
+        return positions.reshape(n_replicates, -1)[:, :n_days] % n_days
+    raise ValueError(f"Unknown bootstrap method: {method}")
+
+
+def _holding_period_stats(log_returns, horizons):
+    """Positive share (%) and mean simple return (%) per horizon for each row of log returns"""
+    n_rows, n_days = log_returns.shape
+    prefix = np.zeros((n_rows, n_days + 1))
+    np.cumsum(log_returns, axis=1, out=prefix[:, 1:])
+    positive = np.full((n_rows, len(horizons)), np.nan)
+    mean = np.full((n_rows, len(horizons)), np.nan)
+    for k, days in enumerate(horizons):
+        if days < 1 or days > n_days:
+            continue
+        window = prefix[:, days:] - prefix[:, :-days]
+        positive[:, k] = (window > 0).mean(axis=1) * 100
+        mean[:, k] = np.expm1(window).mean(axis=1) * 100
+    return positive, mean
+
+
+def _replicate_chunk(log_returns, horizons, n_replicates, block_length, method, seed):
+    """Worker: bootstrap statistics for one chunk of replicates of one index"""
+    rng = np.random.default_rng(seed)
+    positions = _resample_positions(rng, len(log_returns), n_replicates, block_length, method)
+    return _holding_period_stats(log_returns[positions], horizons)
+
+
+def bootstrap_holding_periods(prices, horizons=None, n_replicates=1000, block_length=252, method='stationary',
+                              confidence=0.95, seed=None, n_jobs=None, chunk_size=100):
+    """
+    Bootstrap confidence intervals for holding-period statistics
+
+    Parameters:
+    - prices: DataFrame of prices (dates x indices)
+    - horizons: dict of label -> calendar horizon ('5 years', ...) or a number of trading days (default 1-20 years)
+    - n_replicates: bootstrap replicates per index
+    - block_length: (mean) block length in trading days
+    - method: 'stationary' (geometric block lengths) or 'moving' (circular fixed blocks)
+    - confidence: two-sided confidence level of the percentile intervals
+    - seed: seed for reproducible replicates (independent of n_jobs / chunk_size)
+    - n_jobs: worker processes (default: CPU count; 1 runs in-process)
+    - chunk_size: replicates per task; memory per task is O(chunk_size * days)
+
+    Windows are counted in each index's own trading days: a calendar horizon
+    becomes the mean number of the index's trading days it spans. Returns a
+    tidy DataFrame with index, horizon, days (window length of the
+    replicates), statistic ('positive_pct' or 'mean_return', both in %),
+    estimate (from the original series, as calculate_holding_period_returns
+    for calendar horizons), std_error, ci_low, ci_high.
+    """
+    horizons = dict(DEFAULT_HORIZONS if horizons is None else horizons)
+    n_jobs = n_jobs or os.cpu_count() or 1
+
+    values = prices.to_numpy(dtype=np.float64)
+    returns, has_prev = consecutive_returns(values)
+    series = {col: np.log1p(returns[has_prev[:, i], i]) for i, col in enumerate(prices.columns)}
+
+    calendar = {label: horizon for label, horizon in horizons.items() if isinstance(horizon, (str, tuple))}
+    index = HorizonIndex.from_frame(prices) if calendar else None
+    calendar_days = {label: index.window_days(horizon).fillna(0).round().astype(int)
+                     for label, horizon in calendar.items()}
+    calendar_stats = {label: index.summary(horizon) for label, horizon in calendar.items()}
+    days = {col: [int(calendar_days[label][col]) if label in calendar else int(horizon)
+                  for label, horizon in horizons.items()]
+            for col in prices.columns}
+
+    # Indices with fewer than two prices have no returns to resample
+    columns = [col for col in prices.columns if len(series[col])]
+
+    # One seed per (index, chunk), so results do not depend on scheduling
+    chunks = [(col, start, min(chunk_size, n_replicates - start))
+              for col in columns for start in range(0, n_replicates, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    tasks = [(series[col], days[col], n, block_length, method, s) for (col, _, n), s in zip(chunks, seeds)]
+
+    if n_jobs == 1:
+        outputs = [_replicate_chunk(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            outputs = list(pool.map(_replicate_chunk, *zip(*tasks)))
+
+    collected = {col: ([], []) for col in columns}
+    for (col, _, _), (positive, mean) in zip(chunks, outputs):
+        collected[col][0].append(positive)
+        collected[col][1].append(mean)
+
+    alpha = (1 - confidence) / 2 * 100
+    rows = []
+    for col in columns:
+        estimate_positive, estimate_mean = _holding_period_stats(series[col][None, :], days[col])
+        for k, label in enumerate(horizons):
+            if label in calendar:
+                estimate_positive[0, k] = calendar_stats[label]['positive_pct'][col]
+                estimate_mean[0, k] = calendar_stats[label]['mean'][col] * 100
+        for stat, replicates, estimate in (('positive_pct', collected[col][0], estimate_positive),
+                                           ('mean_return', collected[col][1], estimate_mean)):
+            replicates = np.concatenate(replicates)
+            for k, label in enumerate(horizons):
+                sample = replicates[:, k]
+                if np.isnan(sample).all():
+                    continue
+                low, high = np.percentile(sample, [alpha, 100 - alpha])
+                rows.append({'index': col, 'horizon': label, 'days': days[col][k], 'statistic': stat,
+                             'estimate': estimate[0, k], 'std_error': sample.std(ddof=1),
+                             'ci_low': low, 'ci_high': high})
+    return pd.DataFrame(rows, columns=['index', 'horizon', 'days', 'statistic', 'estimate', 'std_error',
+                                       'ci_low', 'ci_high'])
@@ -0,0 +1,214 @@
+"""
+Build Cache
+Make-style skipping of output stages whose inputs have not changed.
+
+Each stage (a chart, a CSV export) is identified by name and a key: a
+content hash of everything it is built from - input files, in-memory data
+(DataFrames, arrays), parameters such as index name and initial investment,
+and the source of the code that builds it together with every project module
+that code imports (directly or through other modules), so an edit to a
+kernel it calls also rebuilds the stage. The manifest records the key and
+the outputs' size / mtime after a build. A stage is up to date when its key
+matches and every recorded output is still on disk unchanged; otherwise it is
+rebuilt. File contents are rehashed only when their size or mtime changes.
+
+Configuration from the environment (see BuildCache.from_env):
+  MARKET_BUILD_CACHE     manifest file (default .build_cache.json; 'off' disables)
+  MARKET_FORCE_REBUILD   comma-separated stage names to rebuild anyway, or 'all'
+"""
+
+import ast
+import datetime
+import hashlib
+import inspect
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_MANIFEST = '.build_cache.json'
+
+
+class BuildCache:
+    """Stage manifest; manifest_file=None builds every stage and records nothing"""
+
+    def __init__(self, manifest_file=DEFAULT_MANIFEST, force=()):
+        self.manifest_file = manifest_file
+        self.force = set(force)
+        self.built = []
+        self.skipped = []
+        self._manifest = None
+        self._imports = {}
+
+    @classmethod
+    def from_env(cls):
+        """Build a cache from MARKET_BUILD_CACHE / MARKET_FORCE_REBUILD, or return None if disabled"""
+        manifest_file = os.environ.get('MARKET_BUILD_CACHE', DEFAULT_MANIFEST)
+        if manifest_file.lower() in ('', '0', 'off', 'false', 'no'):
+            return None
+        force = [name.strip() for name in os.environ.get('MARKET_FORCE_REBUILD', '').split(',') if name.strip()]
+        return cls(manifest_file=manifest_file, force=force)
+
+    @property
+    def manifest(self):
+        if self._manifest is None:
+            self._manifest = {}
+            try:
+                with open(self.manifest_file, encoding='utf-8') as f:
+                    self._manifest = json.load(f)
+            except (FileNotFoundError, TypeError, ValueError):
+                pass
+            self._manifest.setdefault('files', {})
+            self._manifest.setdefault('stages', {})
+        return self._manifest
+
+    def _save(self):
+        if self.manifest_file is None:
+            return
+        tmp = self.manifest_file + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.manifest_file)
+
+    def file_digest(self, path):
+        """Content hash of a file, reusing the recorded hash while size and mtime are unchanged"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        recorded = self.manifest['files'].get(path)
+        if recorded and recorded[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return recorded[2]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        self.manifest['files'][path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def source_files(self, path):
+        """path and the project modules (.py files in its directory) it imports, transitively, in sorted order"""
+        path = os.path.abspath(path)
+        root = os.path.dirname(path)
+        files, pending = set(), [path]
+        while pending:
+            current = pending.pop()
+            if current in files:
+                continue
+            files.add(current)
+            pending.extend(os.path.join(root, name + '.py') for name in self._local_imports(current, root))
+        return sorted(files)
+
+    def _local_imports(self, path, root):
+        """Names of the modules next to path that it imports anywhere (lazy imports in functions included)"""
+        if path not in self._imports:
+            with open(path, encoding='utf-8') as f:
+                tree = ast.parse(f.read(), filename=path)
+            names = set()
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Import):
+                    names.update(alias.name.split('.')[0] for alias in node.names)
+                elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                    names.add(node.module.split('.')[0])
+            self._imports[path] = sorted(name for name in names if os.path.isfile(os.path.join(root, name + '.py')))
+        return self._imports[path]
+
+    def key(self, *parts):
+        """Stage key: a hash of data, parameters and code (functions hash their module and its project imports)"""
+        digest = hashlib.sha256()
+        for part in parts:
+            self._update(digest, part)
+        return digest.hexdigest()
+
+    def _update(self, digest, value):
+        if isinstance(value, pd.DataFrame):
+            digest.update(b'frame')
+            self._update(digest, list(value.columns))
+            self._update(digest, value.index)
+            for col in value.columns:
+                self._update(digest, value[col].to_numpy())
+        elif isinstance(value, (pd.Series, pd.Index)):
+            digest.update(b'series')
+            if isinstance(value, pd.Series):
+                self._update(digest, value.index)
+            self._update(digest, value.to_numpy())
+        elif isinstance(value, np.ndarray):
+            if value.dtype == object:
+                digest.update(b'objects')
+                self._update(digest, value.tolist())
+            else:
+                digest.update(f'array{value.dtype.str}{value.shape}'.encode())
+                digest.update(np.ascontiguousarray(value).tobytes())
+        elif isinstance(value, dict):
+            digest.update(b'dict')
+            for k, v in value.items():
+                self._update(digest, k)
+                self._update(digest, v)
+        elif isinstance(value, (list, tuple)):
+            digest.update(f'seq{len(value)}'.encode())
+            for item in value:
+                self._update(digest, item)
+        elif inspect.isfunction(value) or inspect.ismethod(value):
+            # Decorated functions (e.g. @instrumented) hash the source of the function they wrap
+            value = inspect.unwrap(value)
+            digest.update(f'code{value.__module__}.{value.__qualname__}'.encode())
+            source = inspect.getsourcefile(value)
+            if source:
+                for path in self.source_files(source):
+                    digest.update(self.file_digest(path).encode())
+        elif isinstance(value, (pd.Timestamp, datetime.date, np.datetime64)):
+            digest.update(f'time{pd.Timestamp(value).isoformat()}'.encode())
+        else:
+            digest.update(f'{type(value).__name__}:{value!r}'.encode())
+
+    def forced(self, stage):
+        return 'all' in self.force or stage in self.force
+
+    def is_current(self, stage, key):
+        """True if the stage was built with this key and its outputs are untouched"""
+        entry = self.manifest['stages'].get(stage)
+        if self.manifest_file is None or entry is None or entry['key'] != key or self.forced(stage):
+            return False
+        for path, (size, mtime_ns) in entry['outputs'].items():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                return False
+            if [stat.st_size, stat.st_mtime_ns] != [size, mtime_ns]:
+                return False
+        return True
+
+    def record(self, stage, key, outputs):
+        """Record a finished build of stage with its output file(s)"""
+        if isinstance(outputs, str):
+            outputs = [outputs]
+        recorded = {}
+        for path in outputs or []:
+            stat = os.stat(path)
+            recorded[os.path.abspath(path)] = [stat.st_size, stat.st_mtime_ns]
+        self.manifest['stages'][stage] = {
+            'key': key,
+            'outputs': recorded,
+            'built': datetime.datetime.now().isoformat(timespec='seconds'),
+        }
+        self.built.append(stage)
+        self._save()
+
+    def skip(self, stage):
+        """Note a stage that was up to date"""
+        self.skipped.append(stage)
+        print(f"✓ {stage} is up to date (skipped)")
+
+    def run(self, stage, key, build):
+        """
+        Run build() unless the stage is up to date
+
+        build returns the output path(s) to record (or None). Returns
+        (ran, result), where result is build()'s return value or None.
+        """
+        if self.is_current(stage, key):
+            self.skip(stage)
+            return False, None
+        outputs = build()
+        if outputs:
+            self.record(stage, key, outputs)
+        return True, outputs
@@ -0,0 +1,344 @@
+"""
+Chart Rendering
+Renderers that draw the report charts from precomputed arrays, and a stage
+that runs them in parallel.
+
+Each render_* function takes plain arrays / small tables (no analyzer, no
+price panel) and writes one output file, so a chart can be rendered in a
+worker process without re-deriving anything. render_charts runs a list of
+jobs in a process pool with the headless Agg backend and reports how long
+each chart took.
+
+matplotlib, seaborn and plotly are imported, and the chart style applied,
+only when the first chart is drawn, so stats-only runs never load them.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Static charts are saved at this resolution; figure width x DPI is the pixel budget for downsampling
+FIGURE_DPI = 150
+CUMULATIVE_RETURNS_FIGSIZE = (16, 8)
+# Correlation heatmaps larger than this are drawn as one image without cell annotations
+HEATMAP_ANNOTATE_MAX = 30
+HEATMAP_LABEL_MAX = 120
+
+FINANCIAL_COLORS = [
+    '#003366',  # Deep Navy (Primary)
+    '#C0B283',  # Muted Gold (Secondary)
+    '#2E8B57',  # Sea Green (Success/Growth)
+    '#D32F2F',  # Crimson (Risk/Loss)
+    '#5D4037',  # Brown (Earth tones)
+    '#757575',  # Grey (Neutral)
+    '#0288D1',  # Light Blue
+    '#7B1FA2',  # Purple
+    '#388E3C',  # Dark Green
+    '#FBC02D',  # Bright Gold
+    '#E64A19',  # Deep Orange
+    '#455A64',  # Blue Grey
+    '#1976D2',  # Blue
+    '#C2185B'   # Pink
+]
+
+
+_styled = False
+
+
+def pyplot():
+    """matplotlib.pyplot, imported and styled on first use in this process"""
+    import matplotlib.pyplot as plt
+    if not _styled:
+        apply_style()
+    return plt
+
+
+def apply_style(colors=FINANCIAL_COLORS):
+    """Set the professional financial look (Navy/Gold/White theme) for matplotlib"""
+    global _styled
+    import matplotlib.pyplot as plt
+    _styled = True
+    plt.style.use('seaborn-v0_8-whitegrid')
+    plt.rcParams.update({
+        'font.family': 'sans-serif',
+        'font.sans-serif': ['Arial', 'Helvetica', 'DejaVu Sans'],
+        'font.size': 12,
+        'axes.titlesize': 16,
+        'axes.labelsize': 14,
+        'axes.prop_cycle': plt.cycler(color=colors),
+        'figure.facecolor': 'white',
+        'axes.facecolor': 'white',
+        'axes.grid': True,
+        'grid.alpha': 0.3,
+        'grid.color': '#cccccc',
+        'text.color': '#333333',
+        'axes.labelcolor': '#333333',
+        'xtick.color': '#333333',
+        'ytick.color': '#333333',
+        'legend.frameon': True,
+        'legend.facecolor': 'white',
+        'legend.edgecolor': '#cccccc',
+        'figure.autolayout': True
+    })
+
+
+def render_normalized_performance(series, colors=FINANCIAL_COLORS, output_file='normalized_performance.html',
+                                  mode='standard', plotlyjs=True):
+    """
+    Interactive normalized performance chart
+
+    Parameters:
+    - series: list of (name, dates, values)
+    - colors: trace color cycle
+    - output_file: HTML file to write
+    - mode: 'standard' (go.Scatter with every point as JSON) or 'webgl'
+      (Scattergl, typed arrays, coarse first view with finer levels on zoom)
+    - plotlyjs: True to inline plotly.js, 'directory' for a shared
+      plotly.min.js next to the HTML, 'cdn', or a path/URL to plotly.js
+    """
+    try:
+        import plotly.graph_objects as go
+        from compact_chart import write_compact_chart
+    except ImportError:
+        print("Skipping normalized performance plot (Plotly not installed)")
+        return None
+
+    fig = go.Figure()
+    if mode == 'standard':
+        for name, dates, values in series:
+            fig.add_trace(go.Scatter(x=dates, y=values, mode='lines', name=name))
+    elif mode != 'webgl':
+        raise ValueError(f"Unknown chart mode: {mode} (expected 'standard' or 'webgl')")
+
+    fig.update_layout(
+        title='Normalized Performance of Major Market Indices (Base = 100)',
+        xaxis_title='Date',
+        yaxis_title='Index Value (Normalized)',
+        hovermode='x unified',
+        template='plotly_white',
+        height=600,
+        paper_bgcolor='white',
+        plot_bgcolor='white',
+        font=dict(
+            family="Arial, sans-serif",
+            size=12,
+            color="#333333"
+        ),
+        title_font_color="#003366",
+        colorway=colors
+    )
+    if mode == 'webgl':
+        layout = json.loads(fig.to_json())['layout']
+        layout['xaxis']['type'] = 'date'
+        return write_compact_chart(series, layout, output_file,
+                                   plotlyjs='inline' if plotlyjs is True else plotlyjs)
+    fig.write_html(output_file, include_plotlyjs=plotlyjs)
+    return output_file
+
+
+def render_cumulative_returns(series, output_file='cumulative_returns.png'):
+    """Cumulative returns on a log scale; series is a list of (name, dates, values)"""
+    plt = pyplot()
+    plt.figure(figsize=CUMULATIVE_RETURNS_FIGSIZE)
+    for name, dates, values in series:
+        plt.plot(dates, values, label=name, linewidth=1.5)
+
+    plt.title('Cumulative Returns of Major Market Indices', fontsize=16)
+    plt.xlabel('Date', fontsize=12)
+    plt.ylabel('Cumulative Returns', fontsize=12)
+    plt.legend(loc='upper left')
+    plt.grid(True, alpha=0.3)
+    plt.yscale('log')  # Log scale to better visualize long-term growth
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=FIGURE_DPI)
+    plt.close()
+    return output_file
+
+
+def render_correlation_heatmap(labels, matrix, output_file='correlation_heatmap.png', ordered=False):
+    """
+    Heatmap of a correlation matrix (2-D array) with row/column labels
+
+    Up to HEATMAP_ANNOTATE_MAX series every cell is annotated; larger
+    matrices are drawn as one image without cell text (and without tick
+    labels above HEATMAP_LABEL_MAX). ordered marks a clustered row order in
+    the title.
+    """
+    plt = pyplot()
+    n = len(labels)
+    if n > HEATMAP_ANNOTATE_MAX:
+        fig, ax = plt.subplots(figsize=(10, 8))
+        cmap = plt.get_cmap('RdYlGn').copy()
+        cmap.set_bad('lightgrey')
+        image = ax.imshow(np.asarray(matrix, dtype=float), cmap=cmap, vmin=-1, vmax=1, interpolation='nearest')
+        fig.colorbar(image, ax=ax)
+        ax.grid(False)
+        if n <= HEATMAP_LABEL_MAX:
+            ax.set_xticks(range(n), labels, rotation=90, fontsize=6)
+            ax.set_yticks(range(n), labels, fontsize=6)
+        else:
+            ax.set_xticks([])
+            ax.set_yticks([])
+        order = ', clustered order' if ordered else ''
+        ax.set_title(f'Correlation Matrix of Daily Returns ({n:,} series{order})', fontsize=14)
+        fig.tight_layout()
+        fig.savefig(output_file, dpi=FIGURE_DPI)
+        plt.close(fig)
+        return output_file
+
+    try:
+        import seaborn as sns
+    except ImportError:
+        sns = None
+        print("Warning: Seaborn not found. Heatmaps will be skipped or degraded.")
+    plt.figure(figsize=(10, 8))
+    corr_matrix = pd.DataFrame(matrix, index=labels, columns=labels)
+
+    if sns:
+        sns.heatmap(corr_matrix, annot=True, cmap='RdYlGn', vmin=-1, vmax=1,
+                    fmt='.2f', square=True, linewidths=0.5)
+    else:
+        plt.imshow(corr_matrix, cmap='RdYlGn', vmin=-1, vmax=1)
+        plt.colorbar()
+        plt.xticks(range(len(labels)), labels, rotation=90)
+        plt.yticks(range(len(labels)), labels)
+        for i in range(len(labels)):
+            for j in range(len(labels)):
+                plt.text(j, i, f"{matrix[i, j]:.2f}", ha="center", va="center", color="black")
+
+    plt.title('Correlation Matrix of Market Index Daily Returns', fontsize=14)
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=150)
+    plt.close()
+    return output_file
+
+
+def render_rolling_returns_distribution(panels, output_file='rolling_returns_distribution.png'):
+    """
+    Grid of rolling-return histograms
+
+    Parameters:
+    - panels: list of (years, [(name, edges, counts)]) with edges in % and
+      pre-binned counts, one panel per holding period
+    """
+    plt = pyplot()
+    fig, axes = plt.subplots(2, 3, figsize=(18, 12))
+    for ax, (years, histograms) in zip(axes.flatten(), panels):
+        for name, edges, counts in histograms:
+            # Pre-binned counts: one weighted sample per bin reproduces the histogram
+            ax.hist(edges[:-1], bins=edges, weights=counts, alpha=0.5, label=name)
+        ax.axvline(x=0, color='black', linestyle='--', linewidth=1)
+        ax.set_title(f'{years}-Year Rolling Returns Distribution', fontsize=12)
+        ax.set_xlabel('Return (%)')
+        ax.set_ylabel('Frequency')
+        ax.legend(fontsize=8)
+
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=150)
+    plt.close()
+    return output_file
+
+
+def render_positive_return_probability(periods, prob_data, output_file='positive_return_probability.png'):
+    """Probability of positive returns vs holding period; prob_data maps name -> list of %"""
+    plt = pyplot()
+    plt.figure(figsize=(14, 8))
+    for name, probs in prob_data.items():
+        plt.plot(periods, probs, marker='o', label=name, linewidth=2, markersize=6)
+
+    plt.axhline(y=50, color='gray', linestyle='--', alpha=0.7)
+    plt.xlabel('Holding Period (Years)', fontsize=12)
+    plt.ylabel('Probability of Positive Return (%)', fontsize=12)
+    plt.title('Probability of Positive Returns vs Holding Period', fontsize=16)
+    plt.legend(loc='lower right')
+    plt.grid(True, alpha=0.3)
+    plt.ylim(0, 105)
+    plt.xticks(periods)
+    plt.tight_layout()
+    plt.savefig(output_file, dpi=150)
+    plt.close()
+    return output_file
+
+
+def _init_worker(colors):
+    """Worker setup: headless backend and the shared chart style"""
+    import matplotlib
+    matplotlib.use('Agg')
+    apply_style(colors)
+
+
+def _timed_render(render, kwargs):
+    """Run one render job and return (output_file, wall seconds)"""
+    start = time.perf_counter()
+    output = render(**kwargs)
+    return output, time.perf_counter() - start
+
+
+def render_charts(jobs, max_workers=None, parallel=True, colors=FINANCIAL_COLORS, cache=None):
+    """
+    Render independent charts, in a process pool by default
+
+    Parameters:
+    - jobs: list of (chart name, render function, kwargs); the function must be
+      a module-level renderer and kwargs must hold precomputed data only
+    - max_workers: worker processes (default: one per job, capped at CPU count)
+    - parallel: False renders in this process, one chart after another
+    - colors: color cycle applied in every worker
+    - cache: optional BuildCache; charts whose data, parameters and renderer
+      are unchanged since their last build are skipped
+
+    Returns a DataFrame with chart, output, seconds and status ('built',
+    'skipped' or 'failed') for each job.
+    """
+    start = time.perf_counter()
+    rows = {}
+    pending = []
+    for name, render, kwargs in jobs:
+        key = cache.key(render, kwargs, list(colors)) if cache is not None else None
+        if cache is not None and cache.is_current(name, key):
+            cache.skip(name)
+            recorded = list(cache.manifest['stages'][name]['outputs'])
+            rows[name] = (os.path.relpath(recorded[0]) if recorded else None, 0.0, 'skipped')
+        else:
+            pending.append((name, render, kwargs, key))
+
+    if parallel and len(pending) > 1:
+        max_workers = max_workers or min(len(pending), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(colors,)) as pool:
+            futures = [pool.submit(_timed_render, render, kwargs) for _, render, kwargs, _ in pending]
+            outcomes = []
+            for (name, _, _, _), future in zip(pending, futures):
+                try:
+                    outcomes.append(future.result())
+                except Exception as e:
+                    print(f"✗ {name} failed: {str(e)}")
+                    outcomes.append((None, float('nan')))
+    else:
+        if pending:
+            apply_style(colors)
+        outcomes = []
+        for name, render, kwargs, _ in pending:
+            try:
+                outcomes.append(_timed_render(render, kwargs))
+            except Exception as e:
+                print(f"✗ {name} failed: {str(e)}")
+                outcomes.append((None, float('nan')))
+
+    for (name, _, _, key), (output, seconds) in zip(pending, outcomes):
+        rows[name] = (output, seconds, 'built' if output else 'failed')
+        if output:
+            print(f"✓ {name}: {seconds:.2f}s -> '{output}'")
+            if cache is not None:
+                cache.record(name, key, output)
+
+    timings = pd.DataFrame([(name,) + rows[name] for name, _, _ in jobs],
+                           columns=['chart', 'output', 'seconds', 'status'])
+    built = (timings['status'] == 'built').sum()
+    print(f"Rendered {built}/{len(jobs)} charts ({(timings['status'] == 'skipped').sum()} up to date) "
+          f"in {time.perf_counter() - start:.2f}s")
+    return timings
@@ -0,0 +1,183 @@
+"""
+Compact Interactive Chart
+Writes a WebGL (Scattergl) line chart whose data is stored as base64 typed
+arrays at several resolutions.
+
+The page loads a coarse level per series (min/max per bucket, see
+downsample.py) and, when the user zooms, swaps each trace for the finest
+level whose points in the visible range fit the point budget. Dates are
+stored as int32 offsets from the first date (days for daily data, seconds
+otherwise; float64 when a span of seconds does not fit in int32) and
+values as float32, which is several times smaller than Plotly's default
+JSON lists of ISO date strings. plotly.js can be a single shared local file
+next to the HTML instead of being inlined in every chart.
+"""
+
+import base64
+import json
+import os
+
+import numpy as np
+from plotly.offline import get_plotlyjs, get_plotlyjs_version
+
+from downsample import minmax_indices
+
+PLOTLYJS_FILE = 'plotly.min.js'
+
+# Reports time from navigation start to the first rendered chart (browser console and page footer)
+LOAD_TIMER_JS = """
+var readyMs = performance.now();
+console.log('Chart ready in ' + readyMs.toFixed(0) + ' ms');
+var timer = document.getElementById('load-time');
+if (timer) { timer.textContent = 'Chart ready in ' + readyMs.toFixed(0) + ' ms'; }
+"""
+
+_PAGE = """<html>
+<head><meta charset="utf-8" />{plotlyjs}</head>
+<body>
+<div id="chart" style="height:{height}px; width:100%;"></div>
+<div id="load-time" style="font:11px sans-serif; color:#999999;"></div>
+<script type="application/json" id="chart-data">{payload}</script>
+<script type="text/javascript">
+(function () {{
+  var spec = JSON.parse(document.getElementById('chart-data').textContent);
+  function decode(b64, Type) {{
+    var bin = atob(b64), bytes = new Uint8Array(bin.length);
+    for (var i = 0; i < bin.length; i++) {{ bytes[i] = bin.charCodeAt(i); }}
+    return new Type(bytes.buffer);
+  }}
+  var traces = spec.traces.map(function (t) {{
+    return t.levels.map(function (level) {{
+      var offsets = decode(level.x, spec.x_dtype === 'f8' ? Float64Array : Int32Array), x = new Float64Array(offsets.length);
+      for (var i = 0; i < offsets.length; i++) {{ x[i] = spec.x0 + offsets[i] * spec.unit; }}
+      return {{x: x, y: decode(level.y, Float32Array)}};
+    }});
+  }});
+  var div = document.getElementById('chart');
+  var data = spec.traces.map(function (t, i) {{
+    return {{type: 'scattergl', mode: 'lines', name: t.name, x: traces[i][0].x, y: traces[i][0].y}};
+  }});
+  function toMs(value) {{
+    return typeof value === 'number' ? value : new Date(String(value).replace(' ', 'T') + 'Z').getTime();
+  }}
+  function lowerBound(a, v) {{
+    var lo = 0, hi = a.length;
+    while (lo < hi) {{ var mid = (lo + hi) >> 1; if (a[mid] < v) {{ lo = mid + 1; }} else {{ hi = mid; }} }}
+    return lo;
+  }}
+  function showRange(lo, hi) {{
+    var xs = [], ys = [];
+    traces.forEach(function (levels) {{
+      // Finest level whose visible slice fits the budget; the coarse level is always shown whole
+      for (var k = levels.length - 1; k > 0; k--) {{
+        var level = levels[k];
+        var start = Math.max(lowerBound(level.x, lo) - 1, 0);
+        var end = Math.min(lowerBound(level.x, hi) + 1, level.x.length);
+        if (end - start <= spec.max_points) {{
+          xs.push(level.x.subarray(start, end));
+          ys.push(level.y.subarray(start, end));
+          return;
+        }}
+      }}
+      xs.push(levels[0].x);
+      ys.push(levels[0].y);
+    }});
+    Plotly.restyle(div, {{x: xs, y: ys}});
+  }}
+  Plotly.newPlot(div, data, spec.layout, {{responsive: true}}).then(function () {{
+    {load_timer}
+    div.on('plotly_relayout', function (event) {{
+      if (event['xaxis.autorange']) {{ showRange(-Infinity, Infinity); return; }}
+      var range = event['xaxis.range'] || (('xaxis.range[0]' in event) ?
+        [event['xaxis.range[0]'], event['xaxis.range[1]']] : null);
+      if (range) {{ showRange(toMs(range[0]), toMs(range[1])); }}
+    }});
+  }});
+}})();
+</script>
+</body>
+</html>
+"""
+
+
+def _b64(array):
+    """Base64 of an array's raw little-endian bytes"""
+    little_endian = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<'))
+    return base64.b64encode(little_endian.tobytes()).decode('ascii')
+
+
+def resolution_levels(x, y, coarse_points=1000, level_factor=4, x_range=None):
+    """
+    Positions for each resolution level of one series, coarsest first
+
+    Levels keep the min/max of coarse_points buckets, then coarse_points *
+    level_factor buckets, ... while a level keeps at most half of the points;
+    the last level is the full series.
+    """
+    levels = []
+    buckets = coarse_points
+    while 4 * buckets + 2 <= len(y):
+        levels.append(minmax_indices(x, y, buckets, x_range))
+        buckets *= level_factor
+    levels.append(np.arange(len(y)))
+    return levels
+
+
+def write_compact_chart(series, layout, output_file, plotlyjs='directory', coarse_points=1000,
+                        level_factor=4, max_points=4000):
+    """
+    Write a multi-resolution WebGL line chart
+
+    Parameters:
+    - series: list of (name, dates, values) with dates sorted ascending
+    - layout: Plotly layout dict (e.g. from go.Figure(...).to_plotly_json())
+    - output_file: HTML file to write
+    - plotlyjs: 'directory' (shared plotly.min.js next to the HTML, written
+      if missing), 'inline', 'cdn', or a path/URL to an existing plotly.js
+    - coarse_points: min/max buckets per series in the initial view
+    - level_factor: bucket multiplier between resolution levels
+    - max_points: per-trace point budget when choosing a level for a zoomed range
+
+    Returns output_file.
+    """
+    dates = [np.asarray(d).astype('datetime64[ms]').astype(np.int64) for _, d, _ in series]
+    x0 = min((int(d[0]) for d in dates if len(d)), default=0)
+    x_end = max((int(d[-1]) for d in dates if len(d)), default=0)
+    day = 86400000
+    daily = all(((d - x0) % day == 0).all() for d in dates)
+    unit = day if daily else 1000
+    # int32 offsets hold about 68 years of seconds; longer non-daily spans fall back to float64
+    x_dtype = 'i4' if (x_end - x0) // unit <= np.iinfo(np.int32).max else 'f8'
+
+    traces = []
+    for (name, _, values), ms in zip(series, dates):
+        values = np.asarray(values, dtype=np.float64)
+        offsets = ((ms - x0) // unit).astype(np.int32 if x_dtype == 'i4' else np.float64)
+        positions = resolution_levels(ms, values, coarse_points, level_factor, x_range=(x0, x_end))
+        traces.append({
+            'name': str(name),
+            'levels': [{'x': _b64(offsets[p]), 'y': _b64(values[p].astype(np.float32))} for p in positions],
+        })
+
+    payload = json.dumps({'x0': x0, 'unit': unit, 'x_dtype': x_dtype, 'max_points': max_points, 'traces': traces, 'layout': layout},
+                         separators=(',', ':'))
+    # Keep the JSON from closing its <script> element early
+    payload = payload.replace('</', '<\\/')
+
+    if plotlyjs == 'directory':
+        shared = os.path.join(os.path.dirname(os.path.abspath(output_file)), PLOTLYJS_FILE)
+        if not os.path.exists(shared):
+            with open(shared, 'w', encoding='utf-8') as f:
+                f.write(get_plotlyjs())
+        script = f'<script src="{PLOTLYJS_FILE}"></script>'
+    elif plotlyjs == 'inline':
+        script = f'<script type="text/javascript">{get_plotlyjs()}</script>'
+    elif plotlyjs == 'cdn':
+        script = f'<script src="https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"></script>'
+    else:
+        script = f'<script src="{plotlyjs}"></script>'
+
+    height = layout.get('height') or 600
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(_PAGE.format(plotlyjs=script, height=height, payload=payload, load_timer=LOAD_TIMER_JS))
+    return output_file
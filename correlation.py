@@ -0,0 +1,145 @@
+"""
+Correlation Engine
+Pairwise-complete correlations of thousands of return series in bounded memory.
+
+Each pair of columns is correlated over the rows where both have a value, as
+DataFrame.corr() does, so a late listing only shortens its own pairs instead
+of truncating every series to the youngest one. Instead of a Python loop per
+pair, the sums needed for every pair (common count, sums, sums of squares and
+cross products) come from matrix products of the zero-filled returns and
+their validity masks. The columns are processed in blocks and the rows in
+chunks, so beyond the N x N result only a few block-sized arrays are held;
+float32 products halve the memory and roughly double the speed, with results
+accurate to about 1e-5 (columns are centered before the products).
+
+cluster_order() reorders a correlation matrix so that correlated series sit
+next to each other (average-linkage hierarchical clustering on 1 - corr).
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _column_shift(values, row_chunk):
+    """Mean of each column over its valid rows (0 for empty columns)"""
+    total = np.zeros(values.shape[1])
+    count = np.zeros(values.shape[1])
+    for start in range(0, values.shape[0], row_chunk):
+        chunk = values[start:start + row_chunk]
+        valid = ~np.isnan(chunk)
+        total += np.where(valid, chunk, 0.0).sum(axis=0)
+        count += valid.sum(axis=0)
+    return total / np.maximum(count, 1)
+
+
+def _prepare(chunk, shift, dtype):
+    """Validity mask, centered zero-filled values and their squares of a chunk"""
+    valid = ~np.isnan(chunk)
+    x = np.where(valid, chunk - shift, 0.0).astype(dtype, copy=False)
+    return valid.astype(dtype), x, x * x
+
+
+def pairwise_correlation(returns, min_periods=2, block_size=512, row_chunk=4096, dtype=np.float64):
+    """
+    Pearson correlation of every pair of columns over their common valid rows
+
+    Parameters:
+    - returns: DataFrame or 2-D array (rows x series) with NaN for missing values
+    - min_periods: pairs with fewer common rows are NaN
+    - block_size: columns per block; memory beyond the result is about
+      row_chunk x block_size x 6 values plus 6 block_size^2 accumulators
+    - row_chunk: rows per product
+    - dtype: np.float64, or np.float32 for faster, smaller products
+
+    Returns an N x N matrix (a DataFrame labelled like the columns when
+    returns is a DataFrame). Like DataFrame.corr(min_periods=...), a pair is
+    NaN when it has too few common rows or one series is constant on them.
+    """
+    frame = returns if isinstance(returns, pd.DataFrame) else None
+    values = frame.to_numpy(dtype=float) if frame is not None else np.asarray(returns, dtype=float)
+    n_rows, n = values.shape
+    shift = _column_shift(values, row_chunk)
+    blocks = [(i, min(i + block_size, n)) for i in range(0, n, block_size)]
+    corr = np.full((n, n), np.nan)
+
+    for bi, (i0, i1) in enumerate(blocks):
+        for j0, j1 in blocks[bi:]:
+            count = np.zeros((i1 - i0, j1 - j0))
+            sum_i, sum_j = np.zeros_like(count), np.zeros_like(count)
+            sq_i, sq_j, cross = np.zeros_like(count), np.zeros_like(count), np.zeros_like(count)
+            for start in range(0, n_rows, row_chunk):
+                chunk = values[start:start + row_chunk]
+                m_i, x_i, q_i = _prepare(chunk[:, i0:i1], shift[i0:i1], dtype)
+                m_j, x_j, q_j = _prepare(chunk[:, j0:j1], shift[j0:j1], dtype)
+                # Sums of column i over the rows where column j is valid, and vice versa
+                left = np.hstack([m_i, x_i, q_i]).T @ m_j
+                right = m_i.T @ np.hstack([x_j, q_j])
+                k_i, k_j = i1 - i0, j1 - j0
+                count += left[:k_i]
+                sum_i += left[k_i:2 * k_i]
+                sq_i += left[2 * k_i:]
+                sum_j += right[:, :k_j]
+                sq_j += right[:, k_j:]
+                cross += x_i.T @ x_j
+
+            with np.errstate(invalid='ignore', divide='ignore'):
+                cov = cross - sum_i * sum_j / count
+                var_i = sq_i - sum_i ** 2 / count
+                var_j = sq_j - sum_j ** 2 / count
+                block = cov / np.sqrt(var_i * var_j)
+            block[(count < max(min_periods, 2)) | ~(var_i > 0) | ~(var_j > 0)] = np.nan
+            block = np.clip(block, -1.0, 1.0)
+            corr[i0:i1, j0:j1] = block
+            corr[j0:j1, i0:i1] = block.T
+
+    # Exact ones on the diagonal where a series' self-correlation is defined
+    diagonal = np.diag(corr).copy()
+    np.fill_diagonal(corr, np.where(np.isnan(diagonal), np.nan, 1.0))
+    if frame is not None:
+        return pd.DataFrame(corr, index=frame.columns, columns=frame.columns)
+    return corr
+
+
+def cluster_order(corr):
+    """
+    Leaf order of average-linkage clustering on the distance 1 - corr
+
+    Uses the nearest-neighbour chain algorithm, O(N^2) time with one N x N
+    distance matrix. NaN correlations count as uncorrelated. Returns an
+    integer array; corr[order][:, order] is the reordered matrix.
+    """
+    corr = corr.to_numpy() if isinstance(corr, pd.DataFrame) else np.asarray(corr)
+    n = corr.shape[0]
+    if n <= 2:
+        return np.arange(n)
+    distance = 1.0 - np.nan_to_num(corr, nan=0.0)
+    np.fill_diagonal(distance, np.inf)
+    size = np.ones(n)
+    leaves = [[i] for i in range(n)]
+    active = np.ones(n, dtype=bool)
+    chain = []
+    merges = 0
+    while merges < n - 1:
+        if not chain:
+            chain.append(int(np.argmax(active)))
+        a = chain[-1]
+        b = int(np.argmin(distance[a]))
+        # Prefer the previous chain element on ties so reciprocal neighbours are found
+        if len(chain) > 1 and distance[a, chain[-2]] <= distance[a, b]:
+            b = chain[-2]
+        if len(chain) < 2 or b != chain[-2]:
+            chain.append(b)
+            continue
+        chain.pop()
+        chain.pop()
+        # Merge b into a; average linkage is the size-weighted mean of the distances
+        merged = (size[a] * distance[a] + size[b] * distance[b]) / (size[a] + size[b])
+        merged[a] = merged[b] = np.inf
+        distance[a] = distance[:, a] = merged
+        distance[b] = distance[:, b] = np.inf
+        size[a] += size[b]
+        leaves[a] = leaves[a] + leaves[b]
+        leaves[b] = None
+        active[b] = False
+        merges += 1
+    return np.array(leaves[int(np.argmax(active))])
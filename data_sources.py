@@ -0,0 +1,286 @@
+"""
+Data Sources
+Source adapters and the concurrent fetch pipeline used by MarketIndexAnalyzer.
+
+Every source is a callable ``fn(ticker, start, end)`` that returns a close-price
+Series indexed by date (empty if the source has no rows in the range) and
+raises on errors. Each index gets a fallback chain of (source, ticker)
+attempts; chains run concurrently in a thread pool, and a per-source
+semaphore bounds how many requests hit the same provider at once.
+"""
+
+import functools
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import pandas as pd
+
+
+def _requires(*modules):
+    """Tag a source function with the modules it needs and mark it as cache-aware"""
+    def decorate(fn):
+        fn.requires = modules
+        fn.cacheable = True
+        return fn
+    return decorate
+
+
+def _raw(cache, source, ticker, start, end, call):
+    """Run a raw source call through the response cache when one is configured"""
+    if cache is None:
+        return call()
+    return cache.fetch(source, ticker, start, end, call)
+
+
+def with_cache(sources, cache):
+    """Bind a ResponseCache to every cache-aware source in a source dict"""
+    if cache is None:
+        return dict(sources)
+    bound = {}
+    for name, fn in sources.items():
+        if getattr(fn, 'cacheable', False):
+            bound[name] = functools.partial(fn, cache=cache)
+        else:
+            bound[name] = fn
+    return bound
+
+
+def _filter_dates(df, start, end):
+    """Convert an AkShare date/close frame to a close Series within [start, end]"""
+    df = df.copy()
+    df['date'] = pd.to_datetime(df['date'])
+    df = df[(df['date'] >= pd.Timestamp(start)) & (df['date'] <= pd.Timestamp(end))]
+    df = df.set_index('date')
+    return pd.Series(df['close'].values, index=df.index)
+
+
+def extract_closes(df, tickers):
+    """
+    Pick the close column for each ticker out of a yf.download frame
+
+    Handles single-ticker frames (flat or MultiIndex columns) and multi-ticker
+    frames in either ('Close', ticker) or (ticker, 'Close') layout. Returns a
+    DataFrame with one column per ticker, in the order given; tickers missing
+    from the response come back as all-NaN columns.
+    """
+    tickers = list(tickers)
+    if df.empty:
+        return pd.DataFrame(index=df.index, columns=tickers, dtype=float)
+
+    if isinstance(df.columns, pd.MultiIndex):
+        if 'Close' in df.columns.get_level_values(0):
+            closes = df['Close']
+        elif 'Close' in df.columns.get_level_values(1):
+            closes = df.xs('Close', axis=1, level=1)
+        else:
+            closes = df.droplevel(1, axis=1) if len(tickers) > 1 else df.iloc[:, :1]
+    else:
+        closes = df[['Close']] if 'Close' in df.columns else df.iloc[:, :1]
+
+    if len(tickers) == 1:
+        # Single download: take the first close column whatever it is labelled
+        return pd.DataFrame({tickers[0]: closes.iloc[:, 0].values}, index=closes.index)
+    return closes.reindex(columns=tickers)
+
+
+def _yf_download(tickers, start, end):
+    import yfinance as yf
+    return yf.download(tickers, start=start, end=end, progress=False, auto_adjust=True)
+
+
+@_requires('yfinance')
+def fetch_yahoo(ticker, start, end, cache=None):
+    """Download a single ticker's close series from Yahoo Finance"""
+    df = _raw(cache, 'yahoo', ticker, start, end, lambda: _yf_download(ticker, start, end))
+    if df.empty:
+        return pd.Series(dtype=float)
+    return extract_closes(df, [ticker])[ticker]
+
+
+@_requires('yfinance')
+def fetch_yahoo_batch(tickers, start, end, cache=None):
+    """Download many tickers in one Yahoo Finance call; returns ticker -> close Series"""
+    tickers = list(tickers)
+    df = _raw(cache, 'yahoo_batch', tickers, start, end, lambda: _yf_download(tickers, start, end))
+    closes = extract_closes(df, tickers)
+    # The batch frame is on the union calendar; drop each ticker's non-trading days
+    return {ticker: closes[ticker].dropna() for ticker in tickers}
+
+
+# The AkShare endpoints always return full history, so their raw responses are
+# cached per ticker (no date range) and every requested range is cut locally.
+
+@_requires('akshare')
+def fetch_akshare_china(ticker, start, end, cache=None):
+    """Download a China index from AkShare (full history, filtered locally)"""
+    def call():
+        import akshare as ak
+        return ak.stock_zh_index_daily(symbol=ticker)
+    df = _raw(cache, 'akshare_china', ticker, None, None, call)
+    if df.empty:
+        return pd.Series(dtype=float)
+    return _filter_dates(df, start, end)
+
+
+@_requires('akshare')
+def fetch_akshare_us(ticker, start, end, cache=None):
+    """Download a US index from AkShare/Sina (full history, filtered locally)"""
+    def call():
+        import akshare as ak
+        return ak.index_us_stock_sina(symbol=ticker)
+    df = _raw(cache, 'akshare_us', ticker, None, None, call)
+    if df.empty:
+        return pd.Series(dtype=float)
+    return _filter_dates(df, start, end)
+
+
+DEFAULT_SOURCES = {
+    'yahoo': fetch_yahoo,
+    'akshare_china': fetch_akshare_china,
+    'akshare_us': fetch_akshare_us,
+}
+
+# Sources that can serve many tickers in one request: fn(tickers, start, end) -> {ticker: Series}
+DEFAULT_BATCH_SOURCES = {
+    'yahoo': fetch_yahoo_batch,
+}
+
+# Maximum simultaneous requests per source
+DEFAULT_CONCURRENCY = {
+    'yahoo': 4,
+    'akshare_china': 2,
+    'akshare_us': 2,
+}
+
+
+def missing_dependencies(*source_maps):
+    """Return the import errors for modules required by the given source dicts"""
+    errors = []
+    modules = {m for sources in source_maps for fn in sources.values() for m in getattr(fn, 'requires', ())}
+    for module in sorted(modules):
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            errors.append(e)
+    return errors
+
+
+def _describe(series):
+    return f"{len(series)} trading days ({series.index[0].strftime('%Y-%m-%d')} to {series.index[-1].strftime('%Y-%m-%d')})"
+
+
+def fetch_concurrently(chains, sources, start_dates, end, concurrency=None, default_start=None,
+                       incremental=(), batch_sources=None):
+    """
+    Run every index's fallback chain concurrently
+
+    Parameters:
+    - chains: dict of index name -> list of (source_name, ticker) attempts, in order
+    - sources: dict of source_name -> fetch function
+    - start_dates: dict of index name -> first date to request
+    - end: last date to request
+    - concurrency: dict of source_name -> maximum simultaneous requests
+    - default_start: start date for indices missing from start_dates
+    - incremental: names for which every source coming back empty, without
+      an error, means "no new rows" rather than a failure
+    - batch_sources: dict of source_name -> batch fetch function. Chains whose
+      primary attempt uses one of these sources are requested together (one
+      call per distinct start date); only the ones that come back empty run
+      their per-ticker chain.
+
+    Returns a dict of index name -> close Series (named after the index).
+    """
+    concurrency = dict(DEFAULT_CONCURRENCY, **(concurrency or {}))
+    batch_sources = batch_sources or {}
+    limits = {name: threading.BoundedSemaphore(max(1, concurrency.get(name, 1)))
+              for name in set(sources) | set(batch_sources)}
+    print_lock = threading.Lock()
+
+    def report(message):
+        with print_lock:
+            print(message)
+
+    def run_chain(name, attempts):
+        start = start_dates.get(name, default_start)
+        failed = False
+        for i, (source_name, ticker) in enumerate(attempts):
+            try:
+                with limits[source_name]:
+                    series = sources[source_name](ticker, start, end)
+            except Exception as e:
+                report(f"  ✗ {name}: {source_name} {ticker} error - {e}")
+                failed = True
+                continue
+
+            if series is None or series.empty:
+                # Empty may be a silent failure (yfinance) or a source the index never came from:
+                # keep going down the chain
+                if name not in incremental:
+                    report(f"  ✗ {name}: no data from {source_name} {ticker}")
+                continue
+
+            series = pd.Series(series.values, index=series.index, name=name)
+            via = f" via fallback {source_name} {ticker}" if i > 0 else ""
+            report(f"  ✓ {name}: {_describe(series)}{via}")
+            return name, series
+
+        if name in incremental and not failed:
+            report(f"  - {name}: no new rows")
+        else:
+            report(f"  ✗ {name}: all sources failed")
+        return name, None
+
+    def run_batch(source_name, start, names):
+        tickers = {chains[name][0][1]: name for name in names}
+        try:
+            with limits[source_name]:
+                fetched = batch_sources[source_name](list(tickers), start, end)
+        except Exception as e:
+            report(f"  ✗ {source_name} batch of {len(tickers)} tickers failed - {e}")
+            fetched = {}
+
+        found, retry = {}, []
+        for ticker, name in tickers.items():
+            series = fetched.get(ticker)
+            if series is not None and not series.empty:
+                found[name] = pd.Series(series.values, index=series.index, name=name)
+                report(f"  ✓ {name}: {_describe(found[name])} (batched)")
+            else:
+                # A batch cannot tell a failed symbol from one without new rows; its own chain decides
+                retry.append(name)
+        return found, retry
+
+    # Group batchable chains by source and start date
+    batches, singles = {}, []
+    for name, attempts in chains.items():
+        if attempts and attempts[0][0] in batch_sources:
+            key = (attempts[0][0], start_dates.get(name, default_start))
+            batches.setdefault(key, []).append(name)
+        else:
+            singles.append(name)
+
+    # One thread per chain: the semaphores do the limiting, so a chain waiting on a
+    # busy source never blocks chains that use another source
+    max_workers = max(1, len(chains) + len(batches))
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {pool.submit(run_batch, source_name, start, names)
+                   for (source_name, start), names in batches.items()}
+        pending |= {pool.submit(run_chain, name, chains[name]) for name in singles}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if isinstance(result[0], dict):
+                    # Batch finished: fall back to per-ticker chains for empty symbols
+                    found, retry = result
+                    results.update(found)
+                    pending |= {pool.submit(run_chain, name, chains[name]) for name in retry}
+                else:
+                    name, series = result
+                    if series is not None:
+                        results[name] = series
+
+    # Keep the configured index order regardless of completion order
+    return {name: results[name] for name in chains if name in results}
@@ -0,0 +1,106 @@
+"""
+Line Downsampling
+Shape-preserving reduction of long series before they are drawn.
+
+A PNG line chart cannot show more than about one value range per pixel
+column, so each series can be cut down to roughly the figure's pixel width
+before it reaches matplotlib:
+
+- 'minmax': splits the x axis into one bucket per pixel and keeps the lowest
+  and highest point of every bucket (in time order), so spikes and crashes
+  survive and the drawn line is visually identical.
+- 'lttb': Largest-Triangle-Three-Buckets, which keeps one point per bucket,
+  chosen to preserve the visual shape of the line.
+
+Both work on positions, so dates and values stay exactly as they were.
+"""
+
+import numpy as np
+
+METHODS = ('minmax', 'lttb')
+
+
+def _as_float(x):
+    """Numeric view of an x array (datetime64 -> int64 nanoseconds)"""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def minmax_indices(x, y, n_buckets, x_range=None):
+    """
+    Positions of the min and max point in each of n_buckets equal-width x buckets
+
+    x_range (lo, hi) fixes the bucket grid, e.g. to the shared axis range of
+    several series; it defaults to the series' own first and last x.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    xf = _as_float(x)
+    if len(y) <= 2 * n_buckets:
+        return np.arange(len(y))
+    lo, hi = (xf[0], xf[-1]) if x_range is None else (float(_as_float([x_range[0]])[0]),
+                                                         float(_as_float([x_range[1]])[0]))
+    span = hi - lo if hi > lo else 1.0
+    bucket = np.clip(((xf - lo) / span * n_buckets).astype(np.int64), 0, n_buckets - 1)
+
+    # Within each bucket (x is sorted, so buckets are contiguous) order by y:
+    # the first entry of a group is its minimum, the last its maximum
+    order = np.lexsort((y, bucket))
+    sorted_bucket = bucket[order]
+    starts = np.flatnonzero(np.r_[True, sorted_bucket[1:] != sorted_bucket[:-1]])
+    ends = np.r_[starts[1:], len(order)] - 1
+    keep = np.unique(np.concatenate([order[starts], order[ends], [0, len(y) - 1]]))
+    return keep
+
+
+def lttb_indices(x, y, n_out):
+    """Positions of the n_out points chosen by Largest-Triangle-Three-Buckets"""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    xf = _as_float(x)
+
+    # Interior points are split into n_out - 2 buckets; the ends are always kept
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Third vertex: average of the next bucket (or the last point)
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_start = end if i + 2 < len(edges) else n - 1
+        cx = xf[next_start:next_end].mean()
+        cy = y[next_start:next_end].mean()
+        area = np.abs((xf[a] - cx) * (y[start:end] - y[a]) - (xf[a] - xf[start:end]) * (cy - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def downsample(x, y, n_points, method='minmax', x_range=None, log_scale=False):
+    """
+    Reduce one series to about n_points points for drawing
+
+    Parameters:
+    - x, y: arrays of equal length, x sorted ascending (dates or numbers)
+    - n_points: target size, typically the plot's width in pixels
+    - method: 'minmax' (min and max per pixel bucket, at most 2 * n_points
+      points) or 'lttb' (exactly n_points points); None returns the input
+    - x_range: shared (lo, hi) x range for the 'minmax' bucket grid
+    - log_scale: choose points by their shape on a log y axis (positive y)
+
+    Returns (x, y) arrays of the kept points, in order.
+    """
+    if method is None:
+        return x, y
+    shape = np.log(np.asarray(y, dtype=np.float64)) if log_scale else y
+    if method == 'minmax':
+        keep = minmax_indices(x, shape, n_points, x_range)
+    elif method == 'lttb':
+        keep = lttb_indices(x, shape, n_points)
+    else:
+        raise ValueError(f"Unknown downsampling method: {method} (expected one of {METHODS})")
+    return np.asarray(x)[keep], np.asarray(y)[keep]
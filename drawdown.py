@@ -0,0 +1,105 @@
+"""
+Drawdown Analytics
+Vectorized drawdowns for a whole price panel, plus top-N episode extraction.
+
+The running peak is np.fmax.accumulate down the date axis, which ignores NaN,
+so a peak carries across holidays and before a late listing nothing is
+underwater. An episode runs from a peak, through its trough, to the first
+date the price regains the peak (recovery); unrecovered episodes have no
+recovery date and their duration runs to the last observation.
+"""
+
+import numpy as np
+import pandas as pd
+
+from ragged import RaggedPanel, segment_accumulate
+
+
+def drawdown_matrix(values):
+    """Drawdown (price / running peak - 1) for a 2-D float array; NaN where price is NaN"""
+    running_max = np.fmax.accumulate(values, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return values / running_max - 1
+
+
+def ragged_drawdowns(panel):
+    """Drawdown of every price of a RaggedPanel (same layout as panel.values)"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return panel.values / segment_accumulate(np.maximum, panel.values, panel.offsets) - 1
+
+
+def max_drawdowns(data):
+    """Maximum drawdown (negative fraction) of every column (DataFrame or RaggedPanel) in one pass"""
+    if isinstance(data, RaggedPanel):
+        worst = np.full(len(data.columns), np.nan)
+        has_data = data.counts > 0
+        if has_data.any():
+            worst[has_data] = np.minimum.reduceat(ragged_drawdowns(data), data.offsets[:-1][has_data])
+        return pd.Series(worst, index=data.columns)
+    if data.empty:
+        return pd.Series(np.nan, index=data.columns)
+    # fmin skips NaN; all-NaN columns stay NaN
+    worst = np.fmin.reduce(drawdown_matrix(data.to_numpy(dtype=np.float64)), axis=0)
+    return pd.Series(worst, index=data.columns)
+
+
+def _column_episodes(drawdown, top_n):
+    """Top-N drawdown episodes of one column's drawdown over its valid prices (positions only)"""
+    underwater = drawdown < 0
+    if not underwater.any():
+        return []
+
+    # Episode boundaries: entering and leaving the underwater state
+    change = np.diff(underwater.astype(np.int8), prepend=0, append=0)
+    starts = np.flatnonzero(change == 1)
+    ends = np.flatnonzero(change == -1)  # first at-peak index after the episode (== len if unrecovered)
+
+    # Each reduceat segment runs to the next start; the rows after an episode's
+    # end are at a peak (drawdown 0), so the segment minimum is the episode depth
+    depths = np.minimum.reduceat(drawdown, starts)
+    order = np.argsort(depths, kind='stable')[:top_n]
+
+    last = len(drawdown) - 1
+    episodes = []
+    for k in order:
+        start, end = starts[k], ends[k]
+        trough = start + int(np.argmin(drawdown[start:end]))
+        episodes.append((start - 1, trough, end, end <= last, drawdown[trough]))
+    return episodes
+
+
+def drawdown_episodes(data, top_n=5):
+    """
+    Top-N drawdown episodes for every index
+
+    Parameters:
+    - data: DataFrame of prices (dates x indices)
+    - top_n: number of deepest episodes to keep per index
+
+    Returns a tidy DataFrame with one row per (index, rank): peak_date,
+    trough_date, recovery_date (NaT if not yet recovered), drawdown (negative
+    fraction), decline_days and duration_days (trading days from the peak to
+    the trough / to recovery or the last observation) and recovered.
+    """
+    # Column-major so each column's slice is contiguous
+    values = np.asfortranarray(data.to_numpy(dtype=np.float64))
+    drawdowns = np.asfortranarray(drawdown_matrix(values))
+    dates = data.index.values
+    columns = ['index', 'rank', 'peak_date', 'trough_date', 'recovery_date', 'drawdown',
+               'decline_days', 'duration_days', 'recovered']
+    rows = []
+    for i, col in enumerate(data.columns):
+        valid = np.flatnonzero(~np.isnan(values[:, i]))
+        if len(valid) == 0:
+            continue
+        last = len(valid) - 1
+        for rank, (peak, trough, end, recovered, depth) in enumerate(
+                _column_episodes(drawdowns[valid, i], top_n), start=1):
+            rows.append((col, rank, dates[valid[peak]], dates[valid[trough]],
+                         dates[valid[end]] if recovered else np.datetime64('NaT'), depth,
+                         trough - peak, (end if recovered else last) - peak, recovered))
+
+    episodes = pd.DataFrame(rows, columns=columns)
+    for col in ('peak_date', 'trough_date', 'recovery_date'):
+        episodes[col] = pd.to_datetime(episodes[col])
+    return episodes
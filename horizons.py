@@ -0,0 +1,223 @@
+"""
+Calendar Horizons
+Holding-period returns over calendar horizons ("5 years", "18 months") instead
+of fixed row counts of the union-calendar frame.
+
+A row count such as 252 per year is only approximately one year: markets
+trade a different number of days per year, and on the union calendar of all
+indices the NaN holes of one market make pct_change(periods=...) compare
+days further apart than intended (or drop the window). Here every index is
+measured on its own trading dates:
+
+  - the window ending on a trading date e starts at the index's last trading
+    date on or before e - horizon (month ends are clipped, as with
+    pd.DateOffset: 31 March - 1 month = 28/29 February)
+  - windows whose start would fall before the index's first price are skipped
+
+HorizonIndex precomputes, for every index and every row of the shared date
+table within its history, the position of its last price on or before that
+row (a running count of its trading days). A horizon is then resolved once on
+the date table (one searchsorted of the shifted dates into themselves), and
+the starts of all of an index's windows are one vectorized gather from its
+table. Statistics are reduced per index with
+bincount / reduceat on the ragged result, without a dates x indices matrix.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from ragged import RaggedPanel
+from rolling_returns import STAT_NAMES, _histogram_edges
+
+_UNITS = {
+    'y': (12, 0), 'yr': (12, 0), 'yrs': (12, 0), 'year': (12, 0), 'years': (12, 0),
+    'm': (1, 0), 'mo': (1, 0), 'month': (1, 0), 'months': (1, 0),
+    'w': (0, 7), 'wk': (0, 7), 'week': (0, 7), 'weeks': (0, 7),
+    'd': (0, 1), 'day': (0, 1), 'days': (0, 1),
+}
+_HORIZON = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([a-z]+)\s*$')
+
+
+def parse_horizon(horizon):
+    """
+    Parse a calendar horizon into (months, days)
+
+    Accepts strings such as '5 years', '18 months', '6 weeks', '90 days'
+    (or '5y', '18m', '6w', '90d'); fractional years and months are rounded
+    to whole months. A (months, days) tuple is returned unchanged.
+    """
+    if isinstance(horizon, tuple):
+        months, days = horizon
+        return int(months), int(days)
+    match = _HORIZON.match(str(horizon).lower())
+    if not match or match.group(2) not in _UNITS:
+        raise ValueError(f"Unrecognised horizon {horizon!r}; use e.g. '5 years', '18 months', '6 weeks' or '90 days'")
+    amount = float(match.group(1))
+    months, days = _UNITS[match.group(2)]
+    months, days = int(round(amount * months)), int(round(amount * days))
+    if months <= 0 and days <= 0:
+        raise ValueError(f"Horizon {horizon!r} must be positive")
+    return months, days
+
+
+class HorizonIndex:
+    """Per-index date -> price position lookup tables of a RaggedPanel"""
+
+    def __init__(self, panel):
+        self.panel = panel
+        offsets, starts, spans = panel.offsets, panel.starts, panel.spans
+        # For each index and row of its span: the position of its last price on or before that row
+        # (intp, so gathers through these tables need no index conversion)
+        self.last = np.empty(spans.sum(), dtype=np.intp)
+        self.positions = np.empty(len(panel.values), dtype=np.intp)
+        self._span_offsets = np.concatenate([[0], np.cumsum(spans)])
+        for i in range(len(panel.columns)):
+            valid = panel._valid(i)
+            last = self.last[self._span_offsets[i]:self._span_offsets[i + 1]]
+            np.cumsum(valid, out=last)
+            last += offsets[i] - 1
+            self.positions[offsets[i]:offsets[i + 1]] = starts[i] + np.flatnonzero(valid)
+        table = panel.dates.values.astype('M8[D]')
+        self.table_days = table.astype(np.int64)
+        # Calendar month and day of month of every row, for month arithmetic on the distinct months only
+        self._months, self._month_of_row = np.unique(table.astype('M8[M]'), return_inverse=True)
+        self._day_of_month = self.table_days - self._months.astype('M8[D]').astype(np.int64)[self._month_of_row]
+        self._positive = bool((panel.values > 0).all())
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(RaggedPanel.from_frame(df))
+
+    def table_dates(self, horizon):
+        """Day numbers (since 1970-01-01) of each row's date minus the horizon, month ends clipped"""
+        months, days = parse_horizon(horizon)
+        target = self.table_days
+        if months:
+            shifted = self._months - months
+            first = shifted.astype('M8[D]').astype(np.int64)
+            length = (shifted + 1).astype('M8[D]').astype(np.int64) - first
+            target = first[self._month_of_row] + np.minimum(self._day_of_month, length[self._month_of_row] - 1)
+        return target - days
+
+    def table_starts(self, horizon):
+        """Row of the shared date table on or before each row's date minus the horizon (-1 if none)"""
+        target = self.table_dates(horizon)
+        return np.searchsorted(self.table_days, target, side='right') - 1
+
+    def _index_windows(self, horizon):
+        """Yield (index number, position of its first complete window's end, start positions) per index"""
+        # The horizon is resolved once on the shared date table ...
+        rows = self.table_starts(horizon)
+        offsets, starts = self.panel.offsets, self.panel.starts
+        for i in range(len(offsets) - 1):
+            row = rows[self.positions[offsets[i]:offsets[i + 1]]]
+            # ... rows ascend with the index's dates, so its complete windows are a suffix
+            k = int(np.searchsorted(row, starts[i]))
+            yield i, offsets[i] + k, self.last[row[k:] + (self._span_offsets[i] - starts[i])]
+
+    def windows(self, horizon):
+        """
+        (start, end) value positions of every complete window for a horizon
+
+        end runs over every price of every index (in panel order) that has a
+        price at least one horizon earlier; start is that index's last price
+        on or before end's date minus the horizon.
+        """
+        starts, ends = [], []
+        for i, first_end, start in self._index_windows(horizon):
+            starts.append(start)
+            ends.append(np.arange(first_end, self.panel.offsets[i + 1]))
+        return np.concatenate(starts), np.concatenate(ends)
+
+    def window_days(self, horizon):
+        """Mean number of its own trading days spanned by each index's complete windows (NaN without any)"""
+        days = np.full(len(self.panel.columns), np.nan)
+        for i, first_end, start in self._index_windows(horizon):
+            if len(start):
+                days[i] = (np.arange(first_end, self.panel.offsets[i + 1]) - start).mean()
+        return pd.Series(days, index=self.panel.columns)
+
+    def returns(self, horizon):
+        """Fractional return of every complete window, windows per index, and the windows' end positions"""
+        values = self.panel.values
+        returns, ends = [], []
+        count = np.zeros(len(self.panel.columns), dtype=np.int64)
+        for i, first_end, start in self._index_windows(horizon):
+            end = np.arange(first_end, self.panel.offsets[i + 1])
+            start_prices, end_prices = values[start], values[first_end:self.panel.offsets[i + 1]]
+            if not self._positive:
+                # Non-positive prices have no return, as in rolling_return_summary
+                valid = (start_prices > 0) & (end_prices > 0)
+                start_prices, end_prices, end = start_prices[valid], end_prices[valid], end[valid]
+            returns.append(end_prices / start_prices - 1)
+            ends.append(end)
+            count[i] = len(end)
+        if not returns:
+            return np.empty(0), count, np.empty(0, dtype=np.int64)
+        return np.concatenate(returns), count, np.concatenate(ends)
+
+    def rolling_returns(self, horizon):
+        """Returns of each horizon window as a dates x indices DataFrame, labelled by end date"""
+        returns, count, end = self.returns(horizon)
+        out = np.full(self.panel.shape, np.nan)
+        out[self.positions[end], np.repeat(np.arange(len(count)), count)] = returns
+        return pd.DataFrame(out, index=self.panel.dates, columns=self.panel.columns)
+
+    def summary(self, horizon, bins=None):
+        """Per-index statistics of one horizon's returns, like rolling_return_summary"""
+        returns, count, _ = self.returns(horizon)
+        n = len(count)
+        # Windows are grouped by index, so every per-index reduction is one reduceat
+        has_data = count > 0
+        first = (np.cumsum(count) - count)[has_data]
+
+        def per_index(ufunc, values, empty=np.nan):
+            out = np.full(n, empty)
+            if len(first):
+                out[has_data] = ufunc.reduceat(values, first)
+            return out
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = per_index(np.add, returns) / count
+            centered = returns - np.repeat(mean, count)
+            std = np.sqrt(per_index(np.add, centered ** 2) / (count - 1))
+            positive = per_index(np.add, (returns > 0).astype(float)) / count
+        std = np.where(count > 1, std, np.nan)
+        minimum = per_index(np.minimum, returns)
+        maximum = per_index(np.maximum, returns)
+
+        columns = self.panel.columns
+        stats = {name: pd.Series(value, index=columns) for name, value in
+                 zip(STAT_NAMES, (count, mean, std, minimum, maximum, positive * 100))}
+        if bins:
+            lo, hi, edges = _histogram_edges(minimum, maximum, bins)
+            position = (returns - np.repeat(lo, count)) * np.repeat(bins / (hi - lo), count)
+            bin_index = np.minimum(np.maximum(np.floor(position), 0), bins - 1).astype(np.intp)
+            bin_index += np.repeat(np.arange(n) * bins, count)
+            stats['hist_counts'] = np.bincount(bin_index, minlength=n * bins).reshape(n, bins)
+            stats['hist_edges'] = edges
+        return stats
+
+
+def horizon_return_summary(prices, horizons, bins=None):
+    """
+    Summarize calendar-horizon returns of every index for several horizons
+
+    Parameters:
+    - prices: DataFrame of prices, RaggedPanel or HorizonIndex
+    - horizons: dict of label -> horizon ('5 years', '18 months', ...), or an iterable of horizons
+    - bins: if set, also return per-column histograms with this many bins
+
+    Returns the same structure as rolling_return_summary: label -> dict of
+    'count', 'mean', 'std', 'min', 'max', 'positive_pct' Series (plus
+    'hist_counts' and 'hist_edges' arrays when bins is set).
+    """
+    if not isinstance(horizons, dict):
+        horizons = {horizon: horizon for horizon in horizons}
+    if isinstance(prices, pd.DataFrame):
+        prices = HorizonIndex.from_frame(prices)
+    elif isinstance(prices, RaggedPanel):
+        prices = HorizonIndex(prices)
+    return {label: prices.summary(horizon, bins=bins) for label, horizon in horizons.items()}
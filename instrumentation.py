@@ -0,0 +1,269 @@
+"""
+Run Instrumentation
+Opt-in per-stage timing and memory accounting with a JSON run report.
+
+Functions decorated with @instrumented (the analyzer's fetch, returns,
+statistics, drawdown and plotting methods, analyze_market_timing_cost) are
+recorded as stages while a RunRecorder is active: wall time, CPU time, peak
+memory, the size of their input (the analyzer's price panel, a CSV file or
+DataFrame argument) and of their result. Stages called from other stages are
+nested under them. When no recorder is active the decorator adds a single
+attribute check per call.
+
+Peak memory is measured with tracemalloc (Python and NumPy allocations made
+during the stage, at some cost in speed) or, with memory='rss', as the
+process's resident-set high-water mark after the stage. Work done in worker
+processes (parallel chart rendering, bootstrap) is counted in wall time only.
+
+Configuration from the environment (see RunRecorder.from_env):
+  MARKET_RUN_REPORT     enable and write the JSON report to this file
+  MARKET_RUN_MEMORY     'tracemalloc' (default), 'rss' or 'off'
+  MARKET_PROFILE_STAGE  also cProfile every call of this stage
+  MARKET_PROFILE_FILE   where to dump the profile (default <stage>.prof)
+"""
+
+import cProfile
+import functools
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_active = None
+
+
+def active_recorder():
+    """The recorder currently collecting stages, or None"""
+    return _active
+
+
+def _after_fork_in_child():
+    """Forked workers (chart rendering, bootstrap) neither record stages nor pay for tracemalloc"""
+    global _active
+    if _active is not None and _active._started_tracemalloc:
+        tracemalloc.stop()
+    _active = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def _max_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def _size(value):
+    """Size summary of a stage input or result"""
+    if isinstance(value, pd.DataFrame):
+        return {'rows': len(value), 'columns': value.shape[1],
+                'mb': round(value.memory_usage(deep=False).sum() / 2**20, 3)}
+    if isinstance(value, pd.Series):
+        return {'rows': len(value)}
+    if isinstance(value, dict):
+        return {'items': len(value)}
+    if isinstance(value, tuple):
+        sizes = [_size(item) for item in value]
+        return sizes if any(sizes) else None
+    if isinstance(value, str) and os.path.isfile(value):
+        return {'file': value, 'mb': round(os.path.getsize(value) / 2**20, 3)}
+    return None
+
+
+def _panel_size(analyzer):
+    """Size of an analyzer's prices, read from its stored frame or ragged panel (never the lazy data property)"""
+    data = getattr(analyzer, '_data', None)
+    if isinstance(data, pd.DataFrame):
+        return _size(data)
+    panel = getattr(analyzer, '_panel', None)
+    if panel is not None:
+        rows, columns = panel.shape
+        return {'rows': rows, 'columns': columns, 'values': len(panel.values),
+                'mb': round(panel.nbytes / 2**20, 3)}
+    return None
+
+
+def _input_size(args, kwargs):
+    """Describe what a stage works on: the analyzer's panel, or DataFrame / file arguments"""
+    sizes = {}
+    size = _panel_size(args[0]) if args else None
+    if size:
+        sizes['data'] = size
+    for i, value in enumerate(args):
+        if i == 0 and 'data' in sizes:
+            continue
+        size = _size(value) if isinstance(value, (pd.DataFrame, str)) else None
+        if size:
+            sizes[f'arg{i}'] = size
+    for name, value in kwargs.items():
+        size = _size(value) if isinstance(value, (pd.DataFrame, str)) else None
+        if size:
+            sizes[name] = size
+    return sizes
+
+
+class RunRecorder:
+    """Collects stage records; use as a context manager or via start() / finish()"""
+
+    def __init__(self, report_file='run_report.json', memory='tracemalloc', profile_stage=None,
+                 profile_file=None):
+        if memory not in ('tracemalloc', 'rss', 'off'):
+            raise ValueError(f"memory must be 'tracemalloc', 'rss' or 'off', not {memory!r}")
+        self.report_file = report_file
+        self.memory = memory
+        self.profile_stage = profile_stage
+        self.profile_file = profile_file or (f'{profile_stage}.prof' if profile_stage else None)
+        self.stages = []
+        self._stack = []
+        self._profiler = None
+        self._profiling = False
+        self._started = None
+        self._started_tracemalloc = False
+
+    @classmethod
+    def from_env(cls):
+        """Build a recorder from MARKET_RUN_REPORT etc., or return None if not enabled"""
+        report_file = os.environ.get('MARKET_RUN_REPORT')
+        if not report_file:
+            return None
+        return cls(report_file=report_file,
+                   memory=os.environ.get('MARKET_RUN_MEMORY', 'tracemalloc'),
+                   profile_stage=os.environ.get('MARKET_PROFILE_STAGE') or None,
+                   profile_file=os.environ.get('MARKET_PROFILE_FILE') or None)
+
+    def start(self):
+        """Make this the active recorder"""
+        global _active
+        if self.memory == 'tracemalloc' and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._started = (time.perf_counter(), time.process_time(), datetime.now())
+        _active = self
+        return self
+
+    def stop(self):
+        """Stop collecting (the records are kept)"""
+        global _active
+        if _active is self:
+            _active = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.finish()
+
+    def call(self, name, func, args, kwargs):
+        """Run func(*args, **kwargs) as stage name"""
+        record = {'stage': name, 'depth': len(self._stack),
+                  'parent': self._stack[-1]['stage'] if self._stack else None,
+                  'input': _input_size(args, kwargs)}
+        frame = {'stage': name, 'peak': 0}
+        tracing = self.memory == 'tracemalloc' and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+            frame['base'] = current
+        profile = name == self.profile_stage and not self._profiling
+        if profile:
+            self._profiler = self._profiler or cProfile.Profile()
+            self._profiling = True
+            self._profiler.enable()
+
+        self._stack.append(frame)
+        wall, cpu = time.perf_counter(), time.process_time()
+        status = 'ok'
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            status = f'{type(e).__name__}: {e}'
+            raise
+        finally:
+            record['wall_seconds'] = round(time.perf_counter() - wall, 6)
+            record['cpu_seconds'] = round(time.process_time() - cpu, 6)
+            if profile:
+                self._profiler.disable()
+                self._profiling = False
+            self._stack.pop()
+            if tracing:
+                peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+                record['peak_mb'] = round((peak - frame['base']) / 2**20, 3)
+                if self._stack:
+                    self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+                tracemalloc.reset_peak()
+            elif self.memory == 'rss':
+                record['max_rss_mb'] = _max_rss_mb()
+            record['status'] = status
+            self.stages.append(record)
+        record['output'] = _size(result)
+        return result
+
+    def report(self):
+        """The run report as a dict"""
+        start_wall, start_cpu, started_at = self._started or (time.perf_counter(), time.process_time(), datetime.now())
+        return {
+            'started': started_at.isoformat(timespec='seconds'),
+            'wall_seconds': round(time.perf_counter() - start_wall, 6),
+            'cpu_seconds': round(time.process_time() - start_cpu, 6),
+            'max_rss_mb': _max_rss_mb(),
+            'memory': self.memory,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'argv': sys.argv,
+            'profile': {'stage': self.profile_stage, 'file': self.profile_file} if self._profiler else None,
+            'stages': self.stages,
+        }
+
+    def summary(self):
+        """Total wall / CPU time and calls per stage, slowest first"""
+        if not self.stages:
+            return pd.DataFrame(columns=['calls', 'wall_seconds', 'cpu_seconds'])
+        table = pd.DataFrame(self.stages).groupby('stage').agg(
+            calls=('stage', 'size'), wall_seconds=('wall_seconds', 'sum'), cpu_seconds=('cpu_seconds', 'sum'))
+        return table.sort_values('wall_seconds', ascending=False)
+
+    def finish(self):
+        """Stop, write the JSON report (and profile dump) and return the report"""
+        report = self.report()
+        self.stop()
+        if self._profiler is not None:
+            self._profiler.dump_stats(self.profile_file)
+            print(f"Saved profile of '{self.profile_stage}' to '{self.profile_file}'")
+        if self.report_file:
+            with open(self.report_file, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=1, default=str)
+            print(f"Saved run report ({len(self.stages)} stage calls) to '{self.report_file}'")
+        return report
+
+
+def instrumented(func=None, name=None):
+    """Decorator recording each call as a stage (named after the function) while a recorder is active"""
+    if func is None:
+        return functools.partial(instrumented, name=name)
+    stage = name or func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _active is None:
+            return func(*args, **kwargs)
+        return _active.call(stage, func, args, kwargs)
+    return wrapper
@@ -1,20 +1,46 @@
 import pandas as pd
-import matplotlib.pyplot as plt
-try:
-    import seaborn as sns
-except ImportError:
-    sns = None
-    print("Warning: Seaborn not found. Heatmaps will be skipped or degraded.")
-try:
-    import plotly.express as px
-    import plotly.graph_objects as go
-except ImportError:
-    px = None
-    go = None
-    print("Warning: Plotly not found. Interactive charts will be skipped.")
 from datetime import datetime, timedelta
 import numpy as np
 import os
+from price_store import (store_path_for, price_store_is_current, read_price_store, read_price_store_ragged,
+                         write_price_store, append_price_store)
+from data_sources import (DEFAULT_SOURCES, DEFAULT_BATCH_SOURCES, DEFAULT_CONCURRENCY,
+                          fetch_concurrently, missing_dependencies, with_cache)
+from response_cache import ResponseCache
+from build_cache import BuildCache
+from instrumentation import instrumented, RunRecorder
+from rolling_returns import STAT_NAMES, rolling_return_summary
+from horizons import HorizonIndex, parse_horizon
+from summary_kernel import summary_statistics, consecutive_returns
+from correlation import pairwise_correlation, cluster_order
+from rolling_comoments import rolling_beta, rolling_correlation_matrices
+from ragged import RaggedPanel
+from streaming import iter_price_chunks, stream_statistics
+from drawdown import max_drawdowns, drawdown_episodes
+from bootstrap import bootstrap_holding_periods
+from downsample import downsample
+from charts import (FINANCIAL_COLORS, FIGURE_DPI, CUMULATIVE_RETURNS_FIGSIZE, HEATMAP_ANNOTATE_MAX, apply_style,
+                    render_charts, render_normalized_performance, render_cumulative_returns, render_correlation_heatmap,
+                    render_rolling_returns_distribution, render_positive_return_probability)
+
+# Old column names -> current names with country codes, so CSVs and stores
+# written before the rename load without a re-fetch
+COLUMN_MIGRATIONS = {
+    'S&P 500': 'S&P 500 (US)',
+    'NASDAQ Composite': 'NASDAQ Composite (US)',
+    'FTSE 100': 'FTSE 100 (UK)',
+    'Hang Seng': 'Hang Seng (HK)',
+    'Nikkei 225': 'Nikkei 225 (JP)',
+    'S&P/TSX Composite': 'S&P/TSX Composite (CA)',
+    'FTSE Bursa Malaysia KLCI': 'FTSE Bursa Malaysia KLCI (MY)',
+    'CAC 40': 'CAC 40 (FR)',
+    'DAX': 'DAX (German)',
+    'Straits Times Index': 'Straits Times Index (SG)',
+    'S&P/ASX 200': 'S&P/ASX 200 (AU)',
+    'Shanghai Composite': 'Shanghai Composite (CN)',
+    'Shenzhen Component': 'Shenzhen Component (CN)',
+    'CSI 300': 'CSI 300 (CN)'
+}
 
 class MarketIndexAnalyzer:
     def __init__(self):
@@ -34,7 +60,7 @@ class MarketIndexAnalyzer:
         }
         # Optional Yahoo Finance fallback tickers for select indices
         self.yf_fallbacks = {
-            'FTSE Bursa Malaysia KLCI': ['^FBMKLCI'],
+            'FTSE Bursa Malaysia KLCI (MY)': ['^FBMKLCI'],
         }
         # China indices via AkShare (better historical data)
         self.akshare_china_indices = {
@@ -47,219 +73,358 @@ class MarketIndexAnalyzer:
             '.INX': 'S&P 500 (US)',             # S&P 500 via Sina
             '.IXIC': 'NASDAQ Composite (US)',    # NASDAQ Composite via Sina
         }
+        # Source adapters and per-source request limits for the concurrent fetch.
+        # batch_sources request all primary tickers of a source in one call;
+        # set it to {} to download every ticker separately.
+        self.sources = dict(DEFAULT_SOURCES)
+        self.batch_sources = dict(DEFAULT_BATCH_SOURCES)
+        # Optional on-disk cache of raw source responses (MARKET_CACHE_DIR / MARKET_OFFLINE)
+        self.response_cache = ResponseCache.from_env()
+        self.source_concurrency = dict(DEFAULT_CONCURRENCY)
+        # Memoized derived series, keyed on (data version, date range, ...).
+        # Replacing self.data bumps the version, which invalidates everything.
+        self._data_version = 0
+        self._derived_cache = {}
+        self.cache_hits = {}
+        self.cache_misses = {}
         self.data = pd.DataFrame()
+        # 'download' when self.data was fetched from the sources, 'local' when it is a
+        # (possibly date-sliced) view of the stored panel that must not be saved back
+        self.data_source = None
         self.start_date = '1950-09-07'
         self.end_date = datetime.now().strftime('%Y-%m-%d')
         
-        # Set style for professional financial look (Navy/Gold/White theme)
-        plt.style.use('seaborn-v0_8-whitegrid')
-        
-        self.colors = [
-            '#003366',  # Deep Navy (Primary)
-            '#C0B283',  # Muted Gold (Secondary)
-            '#2E8B57',  # Sea Green (Success/Growth)
-            '#D32F2F',  # Crimson (Risk/Loss)
-            '#5D4037',  # Brown (Earth tones)
-            '#757575',  # Grey (Neutral)
-            '#0288D1',  # Light Blue
-            '#7B1FA2',  # Purple
-            '#388E3C',  # Dark Green
-            '#FBC02D',  # Bright Gold
-            '#E64A19',  # Deep Orange
-            '#455A64',  # Blue Grey
-            '#1976D2',  # Blue
-            '#C2185B'   # Pink
-        ]
-        
-        plt.rcParams.update({
-            'font.family': 'sans-serif',
-            'font.sans-serif': ['Arial', 'Helvetica', 'DejaVu Sans'],
-            'font.size': 12,
-            'axes.titlesize': 16,
-            'axes.labelsize': 14,
-            'axes.prop_cycle': plt.cycler(color=self.colors),
-            'figure.facecolor': 'white',
-            'axes.facecolor': 'white',
-            'axes.grid': True,
-            'grid.alpha': 0.3,
-            'grid.color': '#cccccc',
-            'text.color': '#333333',
-            'axes.labelcolor': '#333333',
-            'xtick.color': '#333333',
-            'ytick.color': '#333333',
-            'legend.frameon': True,
-            'legend.facecolor': 'white',
-            'legend.edgecolor': '#cccccc',
-            'figure.autolayout': True
-        })
+        # Professional financial look (Navy/Gold/White theme); matplotlib is only
+        # imported and styled when the first chart is drawn
+        self.colors = list(FINANCIAL_COLORS)
+        self._styled = False
+        # Long line series are cut to about the chart's pixel width before plotting
+        # ('minmax' or 'lttb'); set to None to draw every daily point
+        self.chart_downsample = 'minmax'
+        # Interactive chart: 'standard' (every point, plotly.js inlined) or 'webgl'
+        # (Scattergl, typed arrays, multi-resolution); plotlyjs=True inlines plotly.js,
+        # 'directory' shares one plotly.min.js next to the HTML
+        self.interactive_mode = 'standard'
+        self.plotlyjs = True
+        # Correlation heatmap row order: 'cluster', None (column order) or 'auto' (cluster
+        # when the matrix is too large to annotate); float32 products for large panels
+        self.correlation_order = 'auto'
+        self.correlation_dtype = np.float64
+        # Output stages whose inputs are unchanged are skipped (MARKET_BUILD_CACHE / MARKET_FORCE_REBUILD)
+        self.build_cache = BuildCache.from_env()
     
-    def fetch_data(self, use_local_if_available=True):
-        """Fetch historical market data or load from local CSV"""
-        csv_file = 'market_indices_data.csv'
-        
-        if use_local_if_available and os.path.exists(csv_file):
-            print(f"Loading data from local file: {csv_file}")
+    @property
+    def data(self):
+        """Price panel (dates x indices); assigning a new frame invalidates derived caches"""
+        if self._data is None:
+            # Loaded as a ragged panel: the aligned frame is built on first request
+            self._data = self._panel.to_frame()
+        return self._data
+    
+    @data.setter
+    def data(self, value):
+        self._data = value
+        self._panel = None
+        self.invalidate_cache()
+    
+    @property
+    def panel(self):
+        """The prices as a RaggedPanel (per-index arrays without NaN padding)"""
+        if self._panel is None:
+            self._panel = RaggedPanel.from_frame(self._data)
+        return self._panel
+    
+    @panel.setter
+    def panel(self, value):
+        self._panel = value
+        self._data = None
+        self.invalidate_cache()
+    
+    def _is_empty(self):
+        """True without any prices, checked without building the aligned frame"""
+        if self._data is not None:
+            return self._data.empty
+        return 0 in self._panel.shape
+    
+    def invalidate_cache(self):
+        """Drop memoized derived series (call after mutating self.data in place)"""
+        self._data_version += 1
+        self._derived_cache.clear()
+        if self._data is not None:
+            # The ragged view is derived from the frame
+            self._panel = None
+    
+    def _memoize(self, name, compute, *params):
+        """Return a cached derived value, computing it on first use for the current data"""
+        key = (name, self._data_version, self.start_date, self.end_date) + params
+        if key in self._derived_cache:
+            self.cache_hits[name] = self.cache_hits.get(name, 0) + 1
+            return self._derived_cache[key]
+        self.cache_misses[name] = self.cache_misses.get(name, 0) + 1
+        value = compute()
+        self._derived_cache[key] = value
+        return value
+    
+    def cache_info(self):
+        """Return per-series hit/miss counters for the derived-series cache"""
+        names = sorted(set(self.cache_hits) | set(self.cache_misses))
+        return pd.DataFrame({
+            'hits': [self.cache_hits.get(name, 0) for name in names],
+            'misses': [self.cache_misses.get(name, 0) for name in names],
+        }, index=names)
+    
+    @instrumented
+    def fetch_data(self, use_local_if_available=True, columns=None, csv_file='market_indices_data.csv',
+                   ragged=False):
+        """
+        Fetch historical market data or load from the local columnar store / CSV
+        
+        With ragged=True a current columnar store is read straight into
+        self.panel (a RaggedPanel) and that is returned; self.data is then
+        only built if a method needs the aligned frame.
+        """
+        if ragged and use_local_if_available and price_store_is_current(store_path_for(csv_file), csv_file):
             try:
-                self.data = pd.read_csv(csv_file, index_col=0, parse_dates=True)
-                
-                # Migration logic: Rename old columns to new names with country codes
-                # This handles data loaded from existing CSVs without needing to re-fetch
-                migration_map = {
-                    'S&P 500': 'S&P 500 (US)',
-                    'NASDAQ Composite': 'NASDAQ Composite (US)',
-                    'FTSE 100': 'FTSE 100 (UK)',
-                    'Hang Seng': 'Hang Seng (HK)',
-                    'Nikkei 225': 'Nikkei 225 (JP)',
-                    'S&P/TSX Composite': 'S&P/TSX Composite (CA)',
-                    'FTSE Bursa Malaysia KLCI': 'FTSE Bursa Malaysia KLCI (MY)',
-                    'CAC 40': 'CAC 40 (FR)',
-                    'DAX': 'DAX (German)',
-                    'Straits Times Index': 'Straits Times Index (SG)',
-                    'S&P/ASX 200': 'S&P/ASX 200 (AU)',
-                    'Shanghai Composite': 'Shanghai Composite (CN)',
-                    'Shenzhen Component': 'Shenzhen Component (CN)',
-                    'CSI 300': 'CSI 300 (CN)'
-                }
-                
-                renamed_cols = {}
-                for col in self.data.columns:
-                    if col in migration_map:
-                        renamed_cols[col] = migration_map[col]
-                
-                if renamed_cols:
-                    print(f"Migrating {len(renamed_cols)} columns to new format (adding country codes)...")
-                    self.data.rename(columns=renamed_cols, inplace=True)
-                
-                print(f"Loaded {len(self.data.columns)} indices with {len(self.data)} rows.")
-                return self.data
+                panel = self._migrate_columns(read_price_store_ragged(
+                    store_path_for(csv_file), columns=self._stored_names(columns),
+                    start=self.start_date, end=self.end_date))
+                self.panel = panel if columns is None else panel.select(columns)
+                print(f"Loaded {self.panel!r} from columnar store")
+                self.data_source = 'local'
+                return self.panel
             except Exception as e:
-                print(f"Failed to load local file: {e}. Attempting to fetch...")
+                print(f"Failed to load columnar store: {e}. Falling back to CSV...")
+        if use_local_if_available:
+            data = self._load_local(csv_file, columns=columns, start=self.start_date, end=self.end_date)
+            if data is not None:
+                self.data = data
+                self.data_source = 'local'
+                return self.data
         
         print(f"Fetching data from {self.start_date} to {self.end_date}")
         print("-" * 50)
         
-        # Lazy import to avoid hard dependency if using local data
-        try:
-            import yfinance as yf
-            import akshare as ak
-        except ImportError as e:
-            print(f"CRITICAL ERROR: Missing dependencies for data fetching ({e}).")
+        all_data = self._download_all()
+        if all_data is None:
             print(f"Please install requirements or ensure '{csv_file}' exists.")
             if os.path.exists(csv_file):
                 print(f"Falling back to local file {csv_file}...")
                 self.data = pd.read_csv(csv_file, index_col=0, parse_dates=True)
+                self.data_source = 'local'
                 return self.data
             return pd.DataFrame()
-
-        all_data = {}
-        failed_yf = []  # Track failed Yahoo Finance downloads
-        start_dt = datetime.strptime(self.start_date, '%Y-%m-%d')
-        end_dt = datetime.strptime(self.end_date, '%Y-%m-%d')
         
-        # Fetch from Yahoo Finance
-        print("Fetching from Yahoo Finance...")
-        for ticker, name in self.yf_indices.items():
+        self.data = pd.DataFrame(all_data)
+        self.data_source = 'download'
+        print("-" * 50)
+        print(f"Total indices loaded: {len(self.data.columns)}")
+        
+        return self.data
+    
+    def _load_local(self, csv_file, columns=None, start=None, end=None):
+        """Load stored data from the columnar store or CSV; returns None if neither is usable"""
+        store_dir = store_path_for(csv_file)
+        
+        # Fast path: binary columnar store written by save_data_to_csv.
+        # Only the requested columns and date range are read from disk.
+        if price_store_is_current(store_dir, csv_file):
+            print(f"Loading data from columnar store: {store_dir}")
             try:
-                df = yf.download(ticker, start=self.start_date, end=self.end_date, progress=False, auto_adjust=True)
-                if not df.empty:
-                    # Handle both single and multi-level column index
-                    if isinstance(df.columns, pd.MultiIndex):
-                        if 'Close' in df.columns.get_level_values(0):
-                            close_col = df['Close'].iloc[:, 0]
-                        else:
-                            close_col = df.iloc[:, 0]
-                    else:
-                        close_col = df['Close'] if 'Close' in df.columns else df.iloc[:, 0]
-                    
-                    close_series = pd.Series(close_col.values, index=close_col.index, name=name)
-                    all_data[name] = close_series
-                    print(f"  ✓ {name}: {len(close_series)} trading days ({close_series.index[0].strftime('%Y-%m-%d')} to {close_series.index[-1].strftime('%Y-%m-%d')})")
-                else:
-                    print(f"  ✗ {name}: No data from Yahoo Finance")
-                    failed_yf.append(name)
+                data = self._migrate_columns(read_price_store(store_dir, columns=self._stored_names(columns),
+                                                              start=start, end=end))
+                if columns is not None:
+                    data = data[[col for col in columns if col in data.columns]]
+                print(f"Loaded {len(data.columns)} indices with {len(data)} rows.")
+                return data
             except Exception as e:
-                print(f"  ✗ {name}: Yahoo Finance error")
-                failed_yf.append(name)
-
-        # Attempt Yahoo Finance fallbacks for tickers with known alternates
-        if failed_yf:
-            print("\nRetrying failed indices with Yahoo Finance fallback tickers...")
-            still_failed = []
-            for name in failed_yf:
-                fallback_tickers = self.yf_fallbacks.get(name, [])
-                recovered = False
-                for fb_ticker in fallback_tickers:
-                    try:
-                        df = yf.download(fb_ticker, start=self.start_date, end=self.end_date, progress=False, auto_adjust=True)
-                        if not df.empty:
-                            if isinstance(df.columns, pd.MultiIndex):
-                                if 'Close' in df.columns.get_level_values(0):
-                                    close_col = df['Close'].iloc[:, 0]
-                                else:
-                                    close_col = df.iloc[:, 0]
-                            else:
-                                close_col = df['Close'] if 'Close' in df.columns else df.iloc[:, 0]
-
-                            close_series = pd.Series(close_col.values, index=close_col.index, name=name)
-                            all_data[name] = close_series
-                            print(f"  ✓ {name}: recovered via fallback ticker {fb_ticker}")
-                            recovered = True
-                            break
-                    except Exception:
-                        continue
-                if not recovered:
-                    still_failed.append(name)
-            failed_yf = still_failed
-        
-        # Try AkShare as fallback for failed US indices
-        if failed_yf:
-            print("\nFetching failed indices from AkShare (backup)...")
-            for ak_ticker, name in self.akshare_us_indices.items():
-                if name in failed_yf and name not in all_data:
-                    try:
-                        df = ak.index_us_stock_sina(symbol=ak_ticker)
-                        if not df.empty:
-                            df['date'] = pd.to_datetime(df['date'])
-                            df = df[(df['date'] >= start_dt) & (df['date'] <= end_dt)]
-                            df = df.set_index('date')
-                            
-                            close_series = pd.Series(df['close'].values, index=df.index, name=name)
-                            all_data[name] = close_series
-                            print(f"  ✓ {name}: {len(close_series)} trading days ({close_series.index[0].strftime('%Y-%m-%d')} to {close_series.index[-1].strftime('%Y-%m-%d')})")
-                    except Exception as e:
-                        print(f"  ✗ {name}: AkShare also failed - {str(e)}")
-        
-        # Fetch from AkShare (for China indices with better historical data)
-        print("\nFetching from AkShare (China indices)...")
-        for ticker, name in self.akshare_china_indices.items():
+                print(f"Failed to load columnar store: {e}. Falling back to CSV...")
+        
+        if not os.path.exists(csv_file):
+            return None
+        
+        print(f"Loading data from local file: {csv_file}")
+        try:
+            data = pd.read_csv(csv_file, index_col=0, parse_dates=True)
+            
+            # Old CSVs: rename columns to the names with country codes without re-fetching
+            data = self._migrate_columns(data)
+            
+            # Build the columnar store so the next start skips CSV parsing and migration
             try:
-                df = ak.stock_zh_index_daily(symbol=ticker)
-                if not df.empty:
-                    # Convert date column and filter by date range
-                    df['date'] = pd.to_datetime(df['date'])
-                    df = df[(df['date'] >= start_dt) & (df['date'] <= end_dt)]
-                    df = df.set_index('date')
-                    
-                    close_series = pd.Series(df['close'].values, index=df.index, name=name)
-                    all_data[name] = close_series
-                    print(f"  ✓ {name}: {len(close_series)} trading days ({close_series.index[0].strftime('%Y-%m-%d')} to {close_series.index[-1].strftime('%Y-%m-%d')})")
-                else:
-                    print(f"  ✗ {name}: No data available")
+                write_price_store(data, store_dir)
             except Exception as e:
-                print(f"  ✗ {name}: Error - {str(e)}")
+                print(f"Note: could not write columnar store ({e})")
+            
+            if columns is not None:
+                data = data[[col for col in columns if col in data.columns]]
+            data = data.loc[start:end]
+            
+            print(f"Loaded {len(data.columns)} indices with {len(data)} rows.")
+            return data
+        except Exception as e:
+            print(f"Failed to load local file: {e}. Attempting to fetch...")
+            return None
+    
+    def _migrate_columns(self, data):
+        """Rename old index names (without country codes) in a DataFrame or RaggedPanel"""
+        renamed_cols = {col: COLUMN_MIGRATIONS[col] for col in data.columns if col in COLUMN_MIGRATIONS}
+        if not renamed_cols:
+            return data
+        print(f"Migrating {len(renamed_cols)} columns to new format (adding country codes)...")
+        if isinstance(data, RaggedPanel):
+            return data.rename(renamed_cols)
+        return data.rename(columns=renamed_cols)
+    
+    def _stored_names(self, columns):
+        """Names to read from storage for the requested columns, old names included"""
+        if columns is None:
+            return None
+        return list(columns) + [old for old, new in COLUMN_MIGRATIONS.items() if new in columns]
+    
+    def high_water_marks(self):
+        """Return the last date with a valid price for each index in self.data"""
+        if self.data.empty:
+            return pd.Series(dtype='datetime64[ns]')
+        return self.data.apply(lambda x: x.last_valid_index())
+    
+    @instrumented
+    def update_data(self, csv_file='market_indices_data.csv'):
+        """
+        Incrementally refresh stored data.
+        
+        Loads the stored panel, requests only the rows after each index's
+        high-water mark from its source, merges them into self.data and
+        appends the new rows to the CSV and columnar store. Falls back to a
+        full rewrite only when the new rows cannot be appended (a lagging
+        index filled in a date that is already stored, or a new index).
+        """
+        # Full stored history, regardless of the analysis window in start_date/end_date
+        data = self._load_local(csv_file)
+        self.data = data if data is not None else pd.DataFrame()
+        self.data_source = 'local'
+        if self.data.empty:
+            print("No stored data found - running a full fetch instead.")
+            self.fetch_data(use_local_if_available=False, csv_file=csv_file)
+            self.save_data_to_csv(csv_file)
+            return self.data
+        
+        end_ts = pd.Timestamp(self.end_date)
+        start_dates = {}
+        for name, last_date in self.high_water_marks().items():
+            if last_date is not None and pd.notna(last_date):
+                start_dates[name] = (last_date + timedelta(days=1)).strftime('%Y-%m-%d')
+        up_to_date = [name for name, start in start_dates.items() if pd.Timestamp(start) > end_ts]
+        
+        print(f"Updating data up to {self.end_date} ({len(up_to_date)} indices already current)")
+        print("-" * 50)
+        new_data = self._download_all(start_dates=start_dates, skip=set(up_to_date))
+        if new_data is None:
+            return self.data
+        
+        # Keep strictly-new rows only; sources may repeat the boundary day
+        hwm = self.high_water_marks()
+        new_series = {}
+        for name, series in new_data.items():
+            if name in hwm.index and pd.notna(hwm[name]):
+                series = series[series.index > hwm[name]]
+            series = series.dropna()
+            if not series.empty:
+                new_series[name] = series
         
-        self.data = pd.DataFrame(all_data)
+        if not new_series:
+            print("-" * 50)
+            print("No new rows - stored data is up to date.")
+            return self.data
+        
+        new_rows = pd.DataFrame(new_series)
+        last_stored = self.data.index.max()
+        column_order = list(self.data.columns) + [c for c in new_rows.columns if c not in self.data.columns]
+        self.data = self.data.combine_first(new_rows)[column_order].sort_index()
         print("-" * 50)
-        print(f"Total indices loaded: {len(self.data.columns)}")
+        print(f"Merged {new_rows.notna().sum().sum()} new values across {len(new_rows)} dates.")
         
+        if new_rows.index.min() > last_stored:
+            self._append_rows(new_rows, csv_file)
+        else:
+            self.save_data_to_csv(csv_file)
         return self.data
     
+    def _append_rows(self, new_rows, csv_file):
+        """Append rows newer than everything stored to the CSV and the columnar store"""
+        stored_columns = list(pd.read_csv(csv_file, index_col=0, nrows=0).columns)
+        if not set(new_rows.columns) <= set(stored_columns):
+            self.save_data_to_csv(csv_file)
+            return
+        
+        rows = new_rows.reindex(columns=stored_columns)
+        rows.index.name = 'snapshot_date'
+        rows.to_csv(csv_file, mode='a', header=False)
+        print(f"Appended {len(rows)} rows to '{csv_file}'")
+        
+        # Store is written after the CSV so it stays at least as new as its export
+        store_dir = store_path_for(csv_file)
+        try:
+            append_price_store(rows, store_dir)
+            print(f"Appended {len(rows)} rows to '{store_dir}'")
+        except Exception as e:
+            print(f"Note: rebuilding columnar store ({e})")
+            write_price_store(pd.read_csv(csv_file, index_col=0, parse_dates=True), store_dir)
+    
+    def fetch_chains(self):
+        """Build each index's ordered list of (source, ticker) attempts"""
+        chains = {}
+        for ticker, name in self.yf_indices.items():
+            chains[name] = [('yahoo', ticker)]
+            chains[name] += [('yahoo', fb_ticker) for fb_ticker in self.yf_fallbacks.get(name, [])]
+            # AkShare (Sina) as the last resort for US indices
+            chains[name] += [('akshare_us', ak_ticker) for ak_ticker, ak_name in self.akshare_us_indices.items()
+                             if ak_name == name]
+        for ticker, name in self.akshare_china_indices.items():
+            chains.setdefault(name, []).append(('akshare_china', ticker))
+        return chains
+    
+    def _download_all(self, start_dates=None, skip=()):
+        """
+        Download close prices for every configured index.
+        
+        Index fallback chains run concurrently (see data_sources.fetch_concurrently),
+        bounded per source by self.source_concurrency; primary tickers of
+        sources in self.batch_sources are requested together. start_dates maps index
+        name -> first date to request (default: self.start_date); names in skip
+        are not requested at all. Returns a dict of name -> close Series, or
+        None if the fetch libraries are missing.
+        """
+        # Lazy import check to avoid hard dependency if using local data.
+        # Offline replay from the response cache needs no fetch libraries.
+        cache = self.response_cache
+        if cache is None or not cache.offline:
+            errors = missing_dependencies(self.sources, self.batch_sources)
+            if errors:
+                print(f"CRITICAL ERROR: Missing dependencies for data fetching ({errors[0]}).")
+                return None
+        
+        start_dates = start_dates or {}
+        chains = {name: attempts for name, attempts in self.fetch_chains().items() if name not in skip}
+        
+        print(f"Fetching {len(chains)} indices (concurrency: {self.source_concurrency})...")
+        results = fetch_concurrently(chains, with_cache(self.sources, cache), start_dates, self.end_date,
+                                     concurrency=self.source_concurrency,
+                                     default_start=self.start_date,
+                                     incremental=set(start_dates),
+                                     batch_sources=with_cache(self.batch_sources, cache))
+        if cache is not None:
+            print(f"Response cache: {cache.stats()}")
+        return results
+    
+    @instrumented
     def calculate_returns(self):
         """Calculate daily and cumulative returns"""
         if self.data.empty:
             print("Please fetch data first using fetch_data()")
             return None, None
-        
+        return self._memoize('returns', self._compute_returns)
+    
+    def _compute_returns(self):
         # Calculate daily returns
         # Avoid implicit forward-fill default in future pandas versions
         daily_returns = self.data.pct_change(fill_method=None).dropna()
@@ -269,259 +434,372 @@ class MarketIndexAnalyzer:
         
         return daily_returns, cumulative_returns
     
-    def calculate_rolling_returns(self, years=1):
-        """Calculate rolling returns for a given period"""
-        trading_days = years * 252  # Approximate trading days per year
-        rolling_returns = self.data.pct_change(periods=trading_days, fill_method=None)
-        return rolling_returns
+    def horizon_index(self):
+        """Per-index date -> position lookup tables for calendar horizons"""
+        return self._memoize('horizon_index', lambda: HorizonIndex(self.panel))
+    
+    def calculate_rolling_returns(self, years=1, horizon=None):
+        """
+        Rolling returns over a calendar horizon, labelled by the window's end date
+        
+        Each index's return from its last trading day on or before the date
+        one horizon earlier (horizon such as '18 months'; default: years).
+        """
+        months, days = parse_horizon(horizon or f'{years} years')
+        return self._memoize('rolling_returns',
+                             lambda: self.horizon_index().rolling_returns((months, days)),
+                             months, days)
+    
+    def rolling_return_summary(self, horizons, bins=None):
+        """
+        Memoized summary of rolling returns (horizons: dict of label -> horizon)
+        
+        Calendar horizons ('5 years', '18 months') are measured on each
+        index's own trading dates; integer horizons are row counts of the
+        union-calendar frame, as pct_change(periods=...).
+        """
+        # Cache per window, not per label or horizon set, so callers share every horizon they have in common
+        keys = {label: int(h) if isinstance(h, (int, np.integer)) else parse_horizon(h) for label, h in horizons.items()}
+        summary = {key: self._horizon_summary(key, bins) for key in set(keys.values())}
+        return {label: summary[key] for label, key in keys.items()}
+    
+    def _horizon_summary(self, key, bins):
+        """Statistics of one horizon (a row count or (months, days)), memoized apart from its histogram"""
+        if isinstance(key, tuple):
+            name, compute = 'horizon', lambda bins: self.horizon_index().summary(key, bins=bins)
+        else:
+            name, compute = 'rolling', lambda bins: rolling_return_summary(self.data, [int(key)], bins=bins)[int(key)]
+        if not bins:
+            return self._memoize(f'{name}_summary', lambda: compute(None), key)
+        full = {}
+        def histogram():
+            # One pass yields the statistics as well; keep them for the statistics entry
+            full.update(compute(bins))
+            return {'hist_counts': full['hist_counts'], 'hist_edges': full['hist_edges']}
+        hist = self._memoize(f'{name}_histogram', histogram, key, bins)
+        stats = self._memoize(f'{name}_summary',
+                              lambda: {stat: full[stat] for stat in STAT_NAMES} if full else compute(None), key)
+        return {**stats, **hist}
+    
+    def calculate_column_cumulative_returns(self):
+        """Cumulative returns of each index from its own first valid price"""
+        def compute():
+            cumulative = {}
+            panel = self.panel
+            for col in panel.columns:
+                positions, prices = panel.column(col)
+                if len(prices):
+                    daily_ret = prices[1:] / prices[:-1] - 1
+                    cumulative[col] = pd.Series(np.cumprod(1 + daily_ret), index=panel.dates[positions[1:]],
+                                                name=col)
+            return cumulative
+        return self._memoize('column_cumulative_returns', compute)
+    
+    def calculate_normalized(self):
+        """Each index rebased to 100 at its own first valid price"""
+        def compute():
+            normalized = pd.DataFrame()
+            for col in self.panel.columns:
+                series = self.panel.series(col)
+                if not series.empty:
+                    normalized[col] = series / series.iloc[0] * 100
+            return normalized
+        return self._memoize('normalized', compute)
+    
+    @instrumented
+    def calculate_correlation_matrix(self, min_periods=2, dtype=np.float64):
+        """
+        Pairwise-complete correlation matrix of daily returns
+        
+        Each pair of indices is correlated over the days both have a return,
+        with returns taken between consecutive valid prices of each index, so
+        long histories are not cut to the youngest index's start.
+        """
+        if self.data.empty:
+            print("Please fetch data first using fetch_data()")
+            return None
+        def compute():
+            return pairwise_correlation(self._consecutive_returns(), min_periods=min_periods, dtype=dtype)
+        return self._memoize('correlation', compute, min_periods, np.dtype(dtype).name)
     
+    def _consecutive_returns(self):
+        """Daily returns between consecutive valid prices of each index, NaN elsewhere (no rows dropped)"""
+        def compute():
+            returns, _ = consecutive_returns(self.data.to_numpy(dtype=float))
+            return pd.DataFrame(returns, index=self.data.index, columns=self.data.columns)
+        return self._memoize('consecutive_returns', compute)
+    
+    @instrumented
+    def calculate_rolling_correlation_beta(self, benchmark='S&P 500 (US)', windows=(60, 252), min_periods=None):
+        """
+        Rolling correlation with and beta against a benchmark for every index
+        
+        Built on each index's returns between consecutive valid prices, so a
+        late listing or another market's holiday does not drop rows. Windows
+        are in rows of the date table; a window needs min_periods days on
+        which both indices have a return (default: 80% of the window).
+        Returns {window: {'correlation': DataFrame, 'beta': DataFrame}} with
+        one column per index.
+        """
+        if self._is_empty():
+            print("Please fetch data first using fetch_data()")
+            return None
+        if benchmark not in self.data.columns:
+            print(f"Benchmark '{benchmark}' not found in data")
+            return None
+        daily_returns = self._consecutive_returns()
+        def compute():
+            results = {}
+            for window in windows:
+                correlation, beta = rolling_beta(daily_returns, benchmark, window,
+                                                 min_periods=self._rolling_min_periods(window, min_periods))
+                results[window] = {'correlation': correlation, 'beta': beta}
+            return results
+        return self._memoize('rolling_beta', compute, benchmark, tuple(windows), min_periods)
+    
+    def _rolling_min_periods(self, window, min_periods):
+        """Common days a rolling window needs: min_periods, or 80% of the window"""
+        return max(2, int(0.8 * window)) if min_periods is None else min_periods
+    
+    def save_rolling_correlation_matrices(self, window=60, output_file=None, min_periods=None):
+        """Stream the (dates x indices x indices) rolling correlation matrices of daily returns to a .npy file"""
+        if self._is_empty():
+            print("Please fetch data first using fetch_data()")
+            return None
+        if output_file is None:
+            output_file = f'rolling_correlation_{window}d.npy'
+        daily_returns = self._consecutive_returns()
+        rolling_correlation_matrices(daily_returns, window, output_file=output_file,
+                                     min_periods=self._rolling_min_periods(window, min_periods))
+        print(f"Saved {len(daily_returns)} rolling {window}-day correlation matrices to '{output_file}'")
+        return output_file
+    
+    @instrumented
     def calculate_holding_period_returns(self):
         """Calculate returns for different holding periods to study time impact"""
         holding_periods = {
-            '1 Year': 252,
-            '3 Years': 252 * 3,
-            '5 Years': 252 * 5,
-            '10 Years': 252 * 10,
-            '15 Years': 252 * 15,
-            '20 Years': 252 * 20
+            '1 Year': '1 year',
+            '3 Years': '3 years',
+            '5 Years': '5 years',
+            '10 Years': '10 years',
+            '15 Years': '15 years',
+            '20 Years': '20 years'
         }
         
+        # Same windows and bins as plot_rolling_returns_distribution, so the summary is shared
+        summary = self.rolling_return_summary(holding_periods, bins=50)
+        
         results = {}
-        for period_name, days in holding_periods.items():
-            rolling = self.data.pct_change(periods=days, fill_method=None)
-            # Calculate stats for each column separately to handle different data lengths
+        for period_name, stats in summary.items():
+            # Stats are computed per column to handle different data lengths
             results[period_name] = {
-                'mean': rolling.mean() * 100,
-                'std': rolling.std() * 100,
-                'min': rolling.min() * 100,
-                'max': rolling.max() * 100,
-                'positive_pct': (rolling > 0).sum() / rolling.notna().sum() * 100
+                'mean': stats['mean'] * 100,
+                'std': stats['std'] * 100,
+                'min': stats['min'] * 100,
+                'max': stats['max'] * 100,
+                'positive_pct': stats['positive_pct']
             }
         return results
     
-    def plot_normalized_performance(self):
-        """Plot normalized performance (all starting at 100) for comparison"""
-        if px is None or go is None:
-            print("Skipping normalized performance plot (Plotly not installed)")
-            return
-
+    @instrumented
+    def calculate_holding_period_confidence_intervals(self, n_replicates=1000, block_length=252,
+                                                      method='stationary', confidence=0.95, seed=None, n_jobs=None):
+        """Block-bootstrap confidence intervals for holding-period positive_pct and mean return"""
+        return self._memoize(
+            'holding_period_ci',
+            lambda: bootstrap_holding_periods(self.data, n_replicates=n_replicates, block_length=block_length,
+                                              method=method, confidence=confidence, seed=seed, n_jobs=n_jobs),
+            n_replicates, block_length, method, confidence, seed)
+    
+    def _normalized_performance_job(self):
+        """Render job for the interactive normalized performance chart"""
         # Normalize each column from its first valid value
-        normalized = pd.DataFrame()
-        for col in self.data.columns:
-            series = self.data[col].dropna()
-            if not series.empty:
-                normalized[col] = series / series.iloc[0] * 100
-        
-        # Set style for professional financial look
-        plt.style.use('seaborn-v0_8-whitegrid')
-        
-        # Financial Color Palette (Navy, Gold, White theme)
-        colors = [
-            '#003366',  # Deep Navy (Primary)
-            '#C0B283',  # Muted Gold (Secondary)
-            '#2E8B57',  # Sea Green (Success/Growth)
-            '#D32F2F',  # Crimson (Risk/Loss)
-            '#5D4037',  # Brown (Earth tones)
-            '#757575',  # Grey (Neutral)
-            '#0288D1',  # Light Blue
-            '#7B1FA2',  # Purple
-            '#388E3C',  # Dark Green
-            '#FBC02D',  # Bright Gold
-            '#E64A19',  # Deep Orange
-            '#455A64',  # Blue Grey
-            '#1976D2',  # Blue
-            '#C2185B'   # Pink
-        ]
-        
-        plt.rcParams.update({
-            'font.family': 'sans-serif',
-            'font.sans-serif': ['Arial', 'Helvetica', 'DejaVu Sans'],
-            'font.size': 12,
-            'axes.titlesize': 16,
-            'axes.labelsize': 14,
-            'axes.prop_cycle': plt.cycler(color=colors),
-            'figure.facecolor': 'white',
-            'axes.facecolor': 'white',
-            'axes.grid': True,
-            'grid.alpha': 0.3,
-            'grid.color': '#cccccc',
-            'text.color': '#333333',
-            'axes.labelcolor': '#333333',
-            'xtick.color': '#333333',
-            'ytick.color': '#333333',
-            'legend.frameon': True,
-            'legend.facecolor': 'white',
-            'legend.edgecolor': '#cccccc',
-            'figure.autolayout': True
-        })
-        fig = go.Figure()
+        normalized = self.calculate_normalized()
+        series = []
         for column in normalized.columns:
-            fig.add_trace(go.Scatter(
-                x=normalized[column].dropna().index,
-                y=normalized[column].dropna(),
-                mode='lines',
-                name=column
-            ))
-        
-        fig.update_layout(
-            title='Normalized Performance of Major Market Indices (Base = 100)',
-            xaxis_title='Date',
-            yaxis_title='Index Value (Normalized)',
-            hovermode='x unified',
-            template='plotly_white',
-            height=600,
-            paper_bgcolor='white',
-            plot_bgcolor='white',
-            font=dict(
-                family="Arial, sans-serif",
-                size=12,
-                color="#333333"
-            ),
-            title_font_color="#003366",
-            colorway=self.colors
-        )
-        fig.write_html('normalized_performance.html')
-        print("Saved normalized performance plot as 'normalized_performance.html'")
-        return fig
+            values = normalized[column].dropna()
+            series.append((column, values.index.values, values.to_numpy()))
+        return ('normalized_performance', render_normalized_performance,
+                {'series': series, 'colors': self.colors, 'mode': self.interactive_mode,
+                 'plotlyjs': self.plotlyjs})
+    
+    def _cumulative_returns_job(self):
+        """Render job for the cumulative returns chart"""
+        # Cumulative returns of each index from its first valid value
+        series = [(column, cum_ret.index.values, cum_ret.to_numpy())
+                  for column, cum_ret in self.calculate_column_cumulative_returns().items()]
+        if self.chart_downsample and series:
+            # One bucket grid over the shared date axis, one bucket per pixel column
+            pixels = int(CUMULATIVE_RETURNS_FIGSIZE[0] * FIGURE_DPI)
+            x_range = (min(dates[0] for _, dates, _ in series), max(dates[-1] for _, dates, _ in series))
+            series = [(column,) + downsample(dates, values, pixels, self.chart_downsample,
+                                             x_range=x_range, log_scale=True)
+                      for column, dates, values in series]
+        return 'cumulative_returns', render_cumulative_returns, {'series': series}
+    
+    def _correlation_heatmap_job(self):
+        """Render job for the correlation heatmap (None without data)"""
+        corr_matrix = self.calculate_correlation_matrix(dtype=self.correlation_dtype)
+        if corr_matrix is None:
+            return None
+        ordered = self.correlation_order == 'cluster' or (
+            self.correlation_order == 'auto' and len(corr_matrix) > HEATMAP_ANNOTATE_MAX)
+        if ordered:
+            order = cluster_order(corr_matrix)
+            corr_matrix = corr_matrix.iloc[order, order]
+        matrix = corr_matrix.to_numpy()
+        if len(matrix) > HEATMAP_ANNOTATE_MAX:
+            # Only drawn as an image, so single precision is plenty and halves the transfer to the worker
+            matrix = matrix.astype(np.float32)
+        return ('correlation_heatmap', render_correlation_heatmap,
+                {'labels': list(corr_matrix.columns), 'matrix': matrix, 'ordered': ordered})
+    
+    def _rolling_returns_distribution_job(self):
+        """Render job for the rolling returns distribution grid"""
+        periods = [1, 3, 5, 10, 15, 20]
+        summary = self.rolling_return_summary({years: f'{years} years' for years in periods}, bins=50)
+        panels = []
+        for years in periods:
+            stats = summary[years]
+            panels.append((years, [(column, stats['hist_edges'][i] * 100, stats['hist_counts'][i])
+                                   for i, column in enumerate(self.data.columns)
+                                   if stats['count'].iloc[i] > 0]))
+        return 'rolling_returns_distribution', render_rolling_returns_distribution, {'panels': panels}
+    
+    def _positive_return_probability_job(self):
+        """Render job for probability of positive returns vs holding period"""
+        periods = list(range(1, 21))  # 1 to 20 years
+        summary = self.rolling_return_summary({years: f'{years} years' for years in periods})
+        prob_data = {col: [summary[years]['positive_pct'][col] for years in periods]
+                     for col in self.data.columns}
+        return ('positive_return_probability', render_positive_return_probability,
+                {'periods': periods, 'prob_data': prob_data})
+    
+    def _render_now(self, job, description):
+        """Render one job in this process"""
+        if job is None:
+            return None
+        if not self._styled:
+            apply_style(self.colors)
+            self._styled = True
+        _, render, kwargs = job
+        output = render(**kwargs)
+        if output:
+            print(f"Saved {description} as '{output}'")
+        return output
     
+    @instrumented
+    def plot_normalized_performance(self):
+        """Plot normalized performance (all starting at 100) for comparison"""
+        return self._render_now(self._normalized_performance_job(), 'normalized performance plot')
+    
+    @instrumented
     def plot_cumulative_returns(self):
         """Plot cumulative returns of all indices"""
-        plt.figure(figsize=(16, 8))
-        
-        for column in self.data.columns:
-            series = self.data[column].dropna()
-            if not series.empty:
-                # Calculate cumulative returns from first valid value
-                daily_ret = series.pct_change().dropna()
-                cum_ret = (1 + daily_ret).cumprod()
-                plt.plot(cum_ret.index, cum_ret, label=column, linewidth=1.5)
-        
-        plt.title('Cumulative Returns of Major Market Indices', fontsize=16)
-        plt.xlabel('Date', fontsize=12)
-        plt.ylabel('Cumulative Returns', fontsize=12)
-        plt.legend(loc='upper left')
-        plt.grid(True, alpha=0.3)
-        plt.yscale('log')  # Log scale to better visualize long-term growth
-        plt.tight_layout()
-        plt.savefig('cumulative_returns.png', dpi=150)
-        plt.close()
-        print("Saved cumulative returns plot as 'cumulative_returns.png'")
+        return self._render_now(self._cumulative_returns_job(), 'cumulative returns plot')
     
+    @instrumented
     def plot_correlation_heatmap(self):
         """Plot correlation heatmap of index returns"""
-        daily_returns, _ = self.calculate_returns()
-        if daily_returns is None:
-            return
-        
-        plt.figure(figsize=(10, 8))
-        corr_matrix = daily_returns.corr()
-        
-        if sns:
-            sns.heatmap(corr_matrix, annot=True, cmap='RdYlGn', vmin=-1, vmax=1, 
-                        fmt='.2f', square=True, linewidths=0.5)
-        else:
-            plt.imshow(corr_matrix, cmap='RdYlGn', vmin=-1, vmax=1)
-            plt.colorbar()
-            plt.xticks(range(len(corr_matrix.columns)), corr_matrix.columns, rotation=90)
-            plt.yticks(range(len(corr_matrix.columns)), corr_matrix.columns)
-            for i in range(len(corr_matrix.columns)):
-                for j in range(len(corr_matrix.columns)):
-                    text = plt.text(j, i, f"{corr_matrix.iloc[i, j]:.2f}",
-                                   ha="center", va="center", color="black")
-            
-        plt.title('Correlation Matrix of Market Index Daily Returns', fontsize=14)
-        plt.tight_layout()
-        plt.savefig('correlation_heatmap.png', dpi=150)
-        plt.close()
-        print("Saved correlation heatmap as 'correlation_heatmap.png'")
+        return self._render_now(self._correlation_heatmap_job(), 'correlation heatmap')
     
+    @instrumented
     def plot_rolling_returns_distribution(self):
         """Plot distribution of rolling returns for different holding periods"""
-        fig, axes = plt.subplots(2, 3, figsize=(18, 12))
-        periods = [1, 3, 5, 10, 15, 20]
-        
-        for ax, years in zip(axes.flatten(), periods):
-            rolling = self.calculate_rolling_returns(years)
-            if not rolling.empty:
-                for column in rolling.columns:
-                    ax.hist(rolling[column].dropna() * 100, bins=50, alpha=0.5, label=column)
-                ax.axvline(x=0, color='black', linestyle='--', linewidth=1)
-                ax.set_title(f'{years}-Year Rolling Returns Distribution', fontsize=12)
-                ax.set_xlabel('Return (%)')
-                ax.set_ylabel('Frequency')
-                ax.legend(fontsize=8)
-        
-        plt.tight_layout()
-        plt.savefig('rolling_returns_distribution.png', dpi=150)
-        plt.close()
-        print("Saved rolling returns distribution as 'rolling_returns_distribution.png'")
+        return self._render_now(self._rolling_returns_distribution_job(), 'rolling returns distribution')
     
+    @instrumented
     def plot_positive_return_probability(self):
         """Plot probability of positive returns vs holding period"""
-        periods = list(range(1, 21))  # 1 to 20 years
-        
-        prob_data = {col: [] for col in self.data.columns}
-        
-        for years in periods:
-            rolling = self.calculate_rolling_returns(years)
-            for col in self.data.columns:
-                if col in rolling.columns and not rolling[col].dropna().empty:
-                    prob = (rolling[col].dropna() > 0).mean() * 100
-                    prob_data[col].append(prob)
-                else:
-                    prob_data[col].append(np.nan)
-        
-        plt.figure(figsize=(14, 8))
-        for col, probs in prob_data.items():
-            plt.plot(periods, probs, marker='o', label=col, linewidth=2, markersize=6)
-        
-        plt.axhline(y=50, color='gray', linestyle='--', alpha=0.7)
-        plt.xlabel('Holding Period (Years)', fontsize=12)
-        plt.ylabel('Probability of Positive Return (%)', fontsize=12)
-        plt.title('Probability of Positive Returns vs Holding Period', fontsize=16)
-        plt.legend(loc='lower right')
-        plt.grid(True, alpha=0.3)
-        plt.ylim(0, 105)
-        plt.xticks(periods)
-        plt.tight_layout()
-        plt.savefig('positive_return_probability.png', dpi=150)
-        plt.close()
-        print("Saved positive return probability plot as 'positive_return_probability.png'")
+        return self._render_now(self._positive_return_probability_job(), 'positive return probability plot')
+    
+    def chart_jobs(self):
+        """Render jobs for every report chart, with their data precomputed"""
+        jobs = [self._normalized_performance_job(), self._cumulative_returns_job(),
+                self._correlation_heatmap_job(), self._rolling_returns_distribution_job(),
+                self._positive_return_probability_job()]
+        return [job for job in jobs if job is not None]
     
+    @instrumented
+    def render_charts(self, extra_jobs=(), parallel=True, max_workers=None):
+        """
+        Render all report charts as one stage
+        
+        Parameters:
+        - extra_jobs: additional (name, render function, kwargs) jobs, e.g. the
+          market timing cost chart
+        - parallel: render in a process pool (headless Agg backend); False
+          renders one chart after another in this process
+        - max_workers: worker processes (default: one per chart, capped at CPU count)
+        
+        Charts that are up to date in self.build_cache are skipped. Returns a
+        DataFrame with chart, output, seconds and status per chart.
+        """
+        if self.data.empty:
+            print("Please fetch data first using fetch_data()")
+            return None
+        return render_charts(self.chart_jobs() + list(extra_jobs), max_workers=max_workers,
+                             parallel=parallel, colors=self.colors, cache=self.build_cache)
+    
+    @instrumented
     def generate_summary_statistics(self):
         """Generate comprehensive summary statistics"""
-        daily_returns, _ = self.calculate_returns()
-        if daily_returns is None:
+        if self._is_empty():
+            print("Please fetch data first using fetch_data()")
             return None
         
+        # One pass over each index's contiguous prices in the ragged panel
+        kernel = self._memoize('summary_kernel', lambda: summary_statistics(self.panel))
+        return self._summary_table(kernel)
+    
+    @instrumented
+    def stream_summary_statistics(self, csv_file='market_indices_data.csv', columns=None, chunk_rows=None):
+        """
+        generate_summary_statistics() in one streaming pass over a file, without loading it
+        
+        Reads csv_file (or its columnar store) in chunks of chunk_rows rows
+        (default: about 8 MB of prices) between start_date and end_date, so
+        memory stays constant however long the panel is. self.data is not touched.
+        """
+        state = stream_statistics(iter_price_chunks(csv_file, columns=columns, start=self.start_date,
+                                                    end=self.end_date, chunk_rows=chunk_rows))
+        if state.columns is None:
+            print(f"No data in {csv_file} between {self.start_date} and {self.end_date}")
+            return None
+        print(f"Streamed {state.rows} rows of {len(state.columns)} indices in {state.chunks} chunks")
+        return self._summary_table(state.summary())
+    
+    def _summary_table(self, kernel):
+        """Display table of summary_statistics() output"""
         # Annualized statistics
         stats = pd.DataFrame({
-            'Total Return (%)': ((self.data.iloc[-1] / self.data.iloc[0] - 1) * 100).round(2),
-            'Annualized Return (%)': ((self.data.iloc[-1] / self.data.iloc[0]) ** (252 / len(self.data)) - 1) * 100,
-            'Annualized Volatility (%)': daily_returns.std() * np.sqrt(252) * 100,
-            'Sharpe Ratio': (daily_returns.mean() / daily_returns.std()) * np.sqrt(252),
-            'Max Drawdown (%)': self._calculate_max_drawdown() * 100,
-            'Best Day (%)': daily_returns.max() * 100,
-            'Worst Day (%)': daily_returns.min() * 100,
-            'Data Start': self.data.apply(lambda x: x.dropna().index[0].strftime('%Y-%m-%d') if not x.dropna().empty else 'N/A'),
-            'Data End': self.data.apply(lambda x: x.dropna().index[-1].strftime('%Y-%m-%d') if not x.dropna().empty else 'N/A'),
-            'Trading Days': self.data.count()
+            'Total Return (%)': kernel['total_return'] * 100,
+            'Annualized Return (%)': kernel['annualized_return'] * 100,
+            'Annualized Volatility (%)': kernel['volatility'] * 100,
+            'Sharpe Ratio': kernel['sharpe'],
+            'Max Drawdown (%)': kernel['max_drawdown'] * 100,
+            'Best Day (%)': kernel['best_day'] * 100,
+            'Worst Day (%)': kernel['worst_day'] * 100,
+            'Data Start': kernel['start'].dt.strftime('%Y-%m-%d').fillna('N/A'),
+            'Data End': kernel['end'].dt.strftime('%Y-%m-%d').fillna('N/A'),
+            'Trading Days': kernel['count']
         })
         
         return stats.round(2)
     
+    @instrumented
     def _calculate_max_drawdown(self):
         """Calculate maximum drawdown for each index"""
-        max_dd = {}
-        for col in self.data.columns:
-            series = self.data[col].dropna()
-            rolling_max = series.expanding().max()
-            drawdown = (series - rolling_max) / rolling_max
-            max_dd[col] = drawdown.min()
-        return pd.Series(max_dd)
-    
-    def save_data_to_csv(self):
-        """Save the fetched data to CSV for further analysis"""
+        return max_drawdowns(self.panel)
+    
+    @instrumented
+    def calculate_drawdown_episodes(self, top_n=5):
+        """Top-N drawdown episodes (peak, trough, recovery, duration) for each index"""
+        return self._memoize('drawdown_episodes', lambda: drawdown_episodes(self.data, top_n), top_n)
+    
+    @instrumented
+    def save_data_to_csv(self, csv_file='market_indices_data.csv'):
+        """Save the fetched data to CSV and to the columnar store next to it"""
         # Reorder columns as requested
         desired_order = [
             'Shanghai Composite (CN)', 'Shenzhen Component (CN)', 'CSI 300 (CN)',
@@ -544,8 +822,16 @@ class MarketIndexAnalyzer:
         # Rename index to snapshot_date
         df_to_save.index.name = 'snapshot_date'
         
-        df_to_save.to_csv('market_indices_data.csv')
-        print("Saved raw data to 'market_indices_data.csv'")
+        df_to_save.to_csv(csv_file)
+        print(f"Saved raw data to '{csv_file}'")
+        
+        # Binary columnar copy for fast loads; the CSV remains the export/fallback format
+        store_dir = store_path_for(csv_file)
+        try:
+            write_price_store(df_to_save, store_dir)
+            print(f"Saved columnar store to '{store_dir}'")
+        except Exception as e:
+            print(f"Note: could not write columnar store ({e})")
 
 def get_date_input(prompt, default_value):
     """Get date input from user with validation"""
@@ -560,6 +846,22 @@ def get_date_input(prompt, default_value):
             print("Invalid date format. Please use YYYY-MM-DD format.")
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='Market index analysis')
+    parser.add_argument('--run-report', help='record per-stage time and memory to this JSON file '
+                                             '(or set MARKET_RUN_REPORT)')
+    parser.add_argument('--run-memory', default=os.environ.get('MARKET_RUN_MEMORY', 'tracemalloc'),
+                        choices=['tracemalloc', 'rss', 'off'], help='how stage peak memory is measured')
+    parser.add_argument('--profile-stage', default=os.environ.get('MARKET_PROFILE_STAGE'),
+                        help='cProfile this stage, e.g. generate_summary_statistics')
+    args = parser.parse_args()
+    if args.run_report:
+        recorder = RunRecorder(report_file=args.run_report, memory=args.run_memory, profile_stage=args.profile_stage)
+    else:
+        recorder = RunRecorder.from_env()
+    if recorder is not None:
+        recorder.start()
+    
     print("=" * 60)
     print("MARKET INDEX ANALYSIS - Time Matters for Investors")
     print("=" * 60)
@@ -581,47 +883,71 @@ if __name__ == "__main__":
     analyzer.end_date = end_date
     
     analyzer.fetch_data()
+    cache = analyzer.build_cache or BuildCache(manifest_file=None)
     
     # Save raw data
     print("\n" + "=" * 60)
     print("SAVING DATA")
     print("=" * 60)
-    analyzer.save_data_to_csv()
+    def save_data():
+        analyzer.save_data_to_csv()
+        return 'market_indices_data.csv'
+    if analyzer.data_source == 'download':
+        cache.run('market_indices_data', cache.key(analyzer.data, MarketIndexAnalyzer.save_data_to_csv), save_data)
+    else:
+        # Loaded from the store for this date range only; saving it would truncate the stored history
+        print("Data loaded from local storage - stored history left unchanged")
     
     # Generate summary statistics
     print("\n" + "=" * 60)
     print("SUMMARY STATISTICS")
     print("=" * 60)
-    stats = analyzer.generate_summary_statistics()
-    if stats is not None:
+    def save_summary_statistics():
+        stats = analyzer.generate_summary_statistics()
+        if stats is None:
+            return None
         print(stats.to_string())
         stats.to_csv('summary_statistics.csv')
         print("\nSaved summary statistics to 'summary_statistics.csv'")
+        return 'summary_statistics.csv'
+    ran, _ = cache.run('summary_statistics',
+                       cache.key(analyzer.data, MarketIndexAnalyzer.generate_summary_statistics),
+                       save_summary_statistics)
+    if not ran:
+        # Up to date: show the saved table rather than nothing
+        print(pd.read_csv('summary_statistics.csv', index_col=0).to_string())
     
-    # Generate visualizations
-    print("\n" + "=" * 60)
-    print("GENERATING VISUALIZATIONS")
-    print("=" * 60)
-    analyzer.plot_normalized_performance()
-    analyzer.plot_cumulative_returns()
-    analyzer.plot_correlation_heatmap()
-    analyzer.plot_rolling_returns_distribution()
-    analyzer.plot_positive_return_probability()
-    
-    # Market timing cost analysis
+    # Market timing cost analysis (its chart is rendered with the others below)
     print("\n" + "=" * 60)
     print("MARKET TIMING COST ANALYSIS")
     print("=" * 60)
+    timing_jobs = []
     try:
-        from market_timing_cost import analyze_market_timing_cost
-        analyze_market_timing_cost(
+        from market_timing_cost import analyze_market_timing_cost, create_visualization
+        timing_index = 'S&P 500 (US)'
+        timing_results = analyze_market_timing_cost(
             csv_file='market_indices_data.csv',
-            index_name='S&P 500 (US)',
-            initial_investment=10000
+            index_name=timing_index,
+            initial_investment=10000,
+            visualize=False,
+            start=analyzer.start_date,
+            end=analyzer.end_date
         )
+        if timing_results is not None:
+            # The period of the prices the analysis actually used
+            start_date, end_date = timing_results.attrs['period']
+            timing_jobs.append(('market_timing_cost', create_visualization, {
+                'results_df': timing_results, 'index_name': timing_index, 'initial_investment': 10000,
+                'start_date': start_date, 'end_date': end_date}))
     except Exception as e:
         print(f"Note: Market timing cost analysis skipped - {str(e)}")
     
+    # Generate visualizations (independent charts, rendered in parallel)
+    print("\n" + "=" * 60)
+    print("GENERATING VISUALIZATIONS")
+    print("=" * 60)
+    analyzer.render_charts(extra_jobs=timing_jobs)
+    
     # Holding period analysis
     print("\n" + "=" * 60)
     print("HOLDING PERIOD ANALYSIS - How Time Matters")
@@ -633,6 +959,9 @@ if __name__ == "__main__":
         for idx, prob in metrics['positive_pct'].items():
             print(f"    {idx}: {prob:.1f}%")
     
+    print("\nDerived series cache (misses = computations):")
+    print(analyzer.cache_info().to_string())
+    
     print("\n" + "=" * 60)
     print("ANALYSIS COMPLETE!")
     print("=" * 60)
@@ -646,3 +975,8 @@ if __name__ == "__main__":
     print("  - positive_return_probability.png")
     print("  - market_timing_cost.png (cost of missing best trading days)")
     print("  - market_timing_cost_results.csv (timing cost analysis results)")
+    
+    if recorder is not None:
+        print("\nStage timings (seconds):")
+        print(recorder.summary().round(3).to_string())
+        recorder.finish()
@@ -4,11 +4,17 @@ Analyzes the cost of missing the best trading days
 """
 
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 from datetime import datetime
+from price_store import load_prices, available_columns
+from summary_kernel import consecutive_returns
+from build_cache import BuildCache
+from instrumentation import instrumented, RunRecorder
+from streaming import iter_price_chunks, stream_statistics
 
-def analyze_market_timing_cost(csv_file='market_indices_data.csv', index_name='S&P 500 (US)', initial_investment=10000):
+@instrumented
+def analyze_market_timing_cost(csv_file='market_indices_data.csv', index_name='S&P 500 (US)', initial_investment=10000,
+                               n_paths=0, block_length=1, seed=None, visualize=True, cache=None, start=None, end=None):
     """
     Analyze the cost of missing the best trading days
     
@@ -16,14 +22,27 @@ def analyze_market_timing_cost(csv_file='market_indices_data.csv', index_name='S
     - csv_file: Path to the CSV file with market data
     - index_name: Name of the index to analyze
     - initial_investment: Starting investment amount
+    - n_paths: if > 0, also simulate this many investors who miss the same
+      number of random days (or random blocks) and add their 5th/50th/95th
+      percentile final values next to each 'Miss N Best' scenario
+    - block_length: length of the random missed blocks in trading days
+    - seed: random seed for the simulation
+    - visualize: render market_timing_cost.png here; pass False to render it
+      later with create_visualization (e.g. in a parallel rendering stage)
+    - cache: optional BuildCache; the chart is skipped when the results,
+      index, investment and period are unchanged since it was last drawn
+    - start, end: inclusive date bounds of the analysis (default: full history)
+    
+    The analyzed period is returned in results_df.attrs['period'] as a
+    (first date, last date) tuple.
     """
     
-    # Load data
+    # Load data (only the requested column; uses the columnar store when current)
     print(f"Loading data from {csv_file}...")
-    df = pd.read_csv(csv_file, index_col='snapshot_date', parse_dates=True)
+    df = load_prices(csv_file, columns=[index_name], start=start, end=end)
     
     if index_name not in df.columns:
-        print(f"Error: {index_name} not found in data. Available indices: {list(df.columns)}")
+        print(f"Error: {index_name} not found in data. Available indices: {available_columns(csv_file)}")
         return None
     
     # Get the price series
@@ -36,51 +55,41 @@ def analyze_market_timing_cost(csv_file='market_indices_data.csv', index_name='S
     print(f"Analyzing {index_name} from {prices.index[0].date()} to {prices.index[-1].date()}")
     print(f"Total trading days: {len(prices)}")
     
-    # Calculate daily returns
-    daily_returns = prices.pct_change().dropna()
-    
-    # Calculate fully invested scenario
-    fully_invested_value = initial_investment * (1 + daily_returns).prod()
-    fully_invested_annualized = ((fully_invested_value / initial_investment) ** (252 / len(daily_returns))) - 1
-    
-    # Sort returns to find best days
-    sorted_returns = daily_returns.sort_values(ascending=False)
-    
-    # Calculate scenarios for missing best days
-    scenarios = []
+    # Missing a day = a 0% return that day; read the scenarios off the miss-best curve
     best_days_to_miss = [5, 10, 20, 30, 40]
+    curve = timing_cost_curves(prices.to_frame(), max_days=max(best_days_to_miss),
+                               initial_investment=initial_investment)
+    curve = curve[curve['scenario'] == 'Miss Best'].set_index('days_missed')
+    daily_returns = prices.pct_change().dropna()
     
+    scenarios = [{
+        'scenario': 'Fully Invested',
+        'final_value': curve.loc[0, 'final_value'],
+        'annualized_return': curve.loc[0, 'annualized_return'],
+        'lost_amount': 0,
+        'lost_percentage': 0
+    }]
     for n_days in best_days_to_miss:
-        # Remove the top N best days
-        best_days = sorted_returns.head(n_days).index
-        returns_without_best = daily_returns.copy()
-        returns_without_best.loc[best_days] = 0  # Set best days to 0% return (missed them)
-        
-        # Calculate final value
-        final_value = initial_investment * (1 + returns_without_best).prod()
-        annualized_return = ((final_value / initial_investment) ** (252 / len(returns_without_best))) - 1
-        lost_amount = fully_invested_value - final_value
-        lost_percentage = (lost_amount / fully_invested_value) * 100
-        
+        row = curve.loc[n_days]
         scenarios.append({
             'scenario': f'Miss {n_days} Best',
-            'final_value': final_value,
-            'annualized_return': annualized_return * 100,
-            'lost_amount': lost_amount,
-            'lost_percentage': lost_percentage
+            'final_value': row['final_value'],
+            'annualized_return': row['annualized_return'],
+            'lost_amount': row['lost_amount'],
+            'lost_percentage': row['lost_percentage']
         })
     
-    # Add fully invested scenario
-    scenarios.insert(0, {
-        'scenario': 'Fully Invested',
-        'final_value': fully_invested_value,
-        'annualized_return': fully_invested_annualized * 100,
-        'lost_amount': 0,
-        'lost_percentage': 0
-    })
-    
     # Create DataFrame
     results_df = pd.DataFrame(scenarios)
+    results_df.attrs['period'] = (prices.index[0], prices.index[-1])
+    
+    if n_paths > 0:
+        print(f"Simulating {n_paths:,} investors per scenario (random blocks of {block_length} day(s))...")
+        bands = simulate_missed_days(prices.to_frame(), days_missed=best_days_to_miss, n_paths=n_paths,
+                                     block_length=block_length, initial_investment=initial_investment,
+                                     percentiles=(5, 50, 95), seed=seed).set_index('days_missed')
+        for q in (5, 50, 95):
+            results_df[f'random_p{q}'] = [np.nan] + [bands.loc[n, f'p{q}'] for n in best_days_to_miss]
     
     # Print results
     print("\n" + "=" * 80)
@@ -93,12 +102,200 @@ def analyze_market_timing_cost(csv_file='market_indices_data.csv', index_name='S
     print(results_df.to_string(index=False))
     
     # Create visualization
-    create_visualization(results_df, index_name, initial_investment, prices.index[0], prices.index[-1])
+    if visualize:
+        chart = {'results_df': results_df, 'index_name': index_name, 'initial_investment': initial_investment,
+                 'start_date': prices.index[0], 'end_date': prices.index[-1]}
+        if cache is None:
+            create_visualization(**chart)
+        else:
+            cache.run('market_timing_cost', cache.key(create_visualization, chart),
+                      lambda: create_visualization(**chart))
     
     return results_df
 
+def timing_cost_curves(prices, max_days=100, initial_investment=10000):
+    """
+    Cost of missing the best / worst / both N days, for every N and every index
+    
+    Parameters:
+    - prices: DataFrame of prices (dates x indices); NaN gaps are skipped
+    - max_days: largest N to evaluate (the curve covers N = 0..max_days)
+    - initial_investment: Starting investment amount
+    
+    Each index's daily log returns are sorted once; one cumulative sum then
+    gives the log growth removed by missing its N best (or worst) days for
+    every N at once. Missed days earn 0%, so the number of days, and with it
+    the annualization, is unchanged. 'Miss Best and Worst' removes N of each.
+    
+    Returns a tidy DataFrame with columns index, scenario, days_missed,
+    final_value, annualized_return (%), lost_amount and lost_percentage
+    (relative to staying fully invested). N larger than the history gives NaN.
+    """
+    values = prices.to_numpy(dtype=np.float64)
+    returns, has_prev = consecutive_returns(values)
+    with np.errstate(invalid='ignore'):
+        log_returns = np.where(has_prev, np.log1p(returns), np.nan)
+    n_returns = has_prev.sum(axis=0)
+    total = np.nansum(log_returns, axis=0)
+    
+    # One sort per column (NaN sorts last)
+    ascending = np.sort(log_returns, axis=0)[:max_days]
+    descending = np.sort(-log_returns, axis=0)[:max_days]
+    return timing_cost_table(prices.columns, total, n_returns, descending, ascending, max_days=max_days,
+                             initial_investment=initial_investment)
+
+def timing_cost_table(columns, total, n_returns, descending, ascending, max_days=100, initial_investment=10000):
+    """
+    timing_cost_curves from per-index totals and extreme days
+    
+    Parameters:
+    - columns: index names
+    - total, n_returns: sum of daily log returns and number of returns per index
+    - descending: (at least max_days x indices) negated log returns, smallest
+      first (i.e. the best days), NaN-padded
+    - ascending: the same for the worst days, log returns smallest first
+    """
+    days = np.arange(max_days + 1)
+    
+    # Prefix sums of the top / bottom N
+    def removed(sorted_values, sign):
+        prefix = np.cumsum(np.nan_to_num(sorted_values[:max_days]), axis=0) * sign
+        prefix = np.vstack([np.zeros((1, prefix.shape[1])), prefix])
+        if len(prefix) < len(days):
+            prefix = np.vstack([prefix, np.full((len(days) - len(prefix), prefix.shape[1]), np.nan)])
+        return prefix
+    
+    best = removed(descending, -1)
+    worst = removed(ascending, 1)
+    enough = days[:, None] <= n_returns[None, :]
+    scenarios = {
+        'Miss Best': np.where(enough, total - best, np.nan),
+        'Miss Worst': np.where(enough, total - worst, np.nan),
+        'Miss Best and Worst': np.where(2 * days[:, None] <= n_returns[None, :], total - best - worst, np.nan),
+    }
+    
+    # Stack to (index, scenario, days_missed) so the table comes out in column order
+    log_growth = np.stack([scenarios[name].T for name in scenarios], axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        full_value = initial_investment * np.exp(total)[:, None, None]
+        final_value = initial_investment * np.exp(log_growth)
+        annualized = np.expm1(log_growth * 252 / n_returns[:, None, None]) * 100
+        lost = full_value - final_value
+        lost_percentage = lost / full_value * 100
+    
+    n_index, n_scenarios = len(columns), len(scenarios)
+    return pd.DataFrame({
+        'index': np.repeat(np.asarray(columns), n_scenarios * len(days)),
+        'scenario': np.tile(np.repeat(list(scenarios), len(days)), n_index),
+        'days_missed': np.tile(days, n_index * n_scenarios),
+        'final_value': final_value.ravel(),
+        'annualized_return': annualized.ravel(),
+        'lost_amount': lost.ravel(),
+        'lost_percentage': lost_percentage.ravel(),
+    })
+
+@instrumented
+def analyze_market_timing_cost_batch(csv_file='market_indices_data.csv', max_days=100, initial_investment=10000,
+                                     indices=None, stream=False, chunk_rows=None):
+    """
+    Run the timing cost curves over every index in the dataset
+    
+    Parameters:
+    - csv_file: Path to the CSV file with market data
+    - max_days: largest number of missed days to evaluate
+    - initial_investment: Starting investment amount
+    - indices: optional list of index names (default: all)
+    - stream: read the file in row chunks instead of loading it whole (for
+      panels larger than memory); chunk_rows overrides the default chunk size
+    """
+    if stream:
+        print(f"Streaming {csv_file}...")
+        state = stream_statistics(iter_price_chunks(csv_file, columns=indices, chunk_rows=chunk_rows),
+                                  top_days=max_days)
+        if state.columns is None:
+            print(f"No data in {csv_file}")
+            return None
+        print(f"Computing timing cost curves for {len(state.columns)} indices, N = 0..{max_days}")
+        return timing_cost_table(state.columns, state.log_total, state.n_returns, -state.top_best, state.top_worst,
+                                 max_days=max_days, initial_investment=initial_investment)
+    print(f"Loading data from {csv_file}...")
+    df = load_prices(csv_file, columns=indices)
+    print(f"Computing timing cost curves for {len(df.columns)} indices, N = 0..{max_days}")
+    return timing_cost_curves(df, max_days=max_days, initial_investment=initial_investment)
+
+def _sample_without_replacement(rng, population, k, n_rows):
+    """k distinct sorted integers from range(population) per row (Floyd's algorithm, vectorized over rows)"""
+    chosen = np.empty((n_rows, k), dtype=np.int64)
+    rows = np.arange(n_rows)
+    for i, j in enumerate(range(population - k, population)):
+        t = rng.integers(0, j + 1, size=n_rows)
+        taken = (chosen[:, :i] == t[:, None]).any(axis=1)
+        chosen[rows, i] = np.where(taken, j, t)
+    chosen.sort(axis=1)
+    return chosen
+
+def simulate_missed_days(prices, days_missed=(5, 10, 20, 30, 40), n_paths=100000, block_length=1,
+                         initial_investment=10000, percentiles=(5, 25, 50, 75, 95), seed=None,
+                         chunk_size=20000):
+    """
+    Monte Carlo distribution of outcomes when out of the market on random days
+    
+    Parameters:
+    - prices: DataFrame of prices (dates x indices)
+    - days_missed: numbers of trading days spent out of the market
+    - n_paths: simulated investors per (index, days missed)
+    - block_length: days are missed in random non-overlapping blocks of this
+      many consecutive trading days (1 = independent random days)
+    - initial_investment: Starting investment amount
+    - percentiles: percentiles of final value to report
+    - seed: seed for numpy's default_rng (results are reproducible per seed)
+    - chunk_size: paths simulated at a time; memory is O(chunk_size * blocks)
+    
+    Missed days earn 0%, so a path's log growth is the total minus the log
+    returns of its missed days. Block sums come from one prefix sum of log
+    returns, so each path costs O(number of blocks) regardless of history length.
+    
+    Returns a tidy DataFrame: index, days_missed, block_length, mean and one
+    p<q> column per percentile of final value.
+    """
+    rng = np.random.default_rng(seed)
+    values = prices.to_numpy(dtype=np.float64)
+    returns, has_prev = consecutive_returns(values)
+    rows = []
+    for col_idx, index_name in enumerate(prices.columns):
+        log_returns = np.log1p(returns[has_prev[:, col_idx], col_idx])
+        n_days = len(log_returns)
+        prefix = np.concatenate([[0.0], np.cumsum(log_returns)])
+        total = prefix[-1]
+        
+        for missed in days_missed:
+            n_blocks = -(-missed // block_length)
+            # Non-overlapping blocks: pick block slots in a shortened range, then spread them out
+            slots = n_days - n_blocks * (block_length - 1)
+            if n_days == 0 or slots < n_blocks:
+                continue
+            final_values = np.empty(n_paths)
+            for start in range(0, n_paths, chunk_size):
+                n = min(chunk_size, n_paths - start)
+                block_starts = _sample_without_replacement(rng, slots, n_blocks, n)
+                block_starts += np.arange(n_blocks) * (block_length - 1)
+                block_ends = np.minimum(block_starts + block_length, n_days)
+                if n_blocks * block_length > missed:
+                    # Last block is partial so exactly `missed` days are skipped
+                    block_ends[:, -1] = block_starts[:, -1] + (missed - (n_blocks - 1) * block_length)
+                lost = (prefix[block_ends] - prefix[block_starts]).sum(axis=1)
+                final_values[start:start + n] = initial_investment * np.exp(total - lost)
+            
+            row = {'index': index_name, 'days_missed': missed, 'block_length': block_length,
+                   'mean': final_values.mean()}
+            for q, value in zip(percentiles, np.percentile(final_values, percentiles)):
+                row[f'p{q}'] = value
+            rows.append(row)
+    return pd.DataFrame(rows)
+
 def create_visualization(results_df, index_name, initial_investment, start_date, end_date):
     """Create a comprehensive visualization of market timing costs"""
+    import matplotlib.pyplot as plt
     
     fig = plt.figure(figsize=(16, 12))
     gs = fig.add_gridspec(3, 1, height_ratios=[2, 1.5, 0.8], hspace=0.3)
@@ -216,19 +413,42 @@ if __name__ == "__main__":
     print("=" * 80)
     print()
     
+    # Outputs whose inputs are unchanged are skipped (MARKET_BUILD_CACHE / MARKET_FORCE_REBUILD)
+    cache = BuildCache.from_env()
+    # Per-stage time and memory report (MARKET_RUN_REPORT)
+    recorder = RunRecorder.from_env()
+    if recorder is not None:
+        recorder.start()
+    
     # You can change these parameters
     results = analyze_market_timing_cost(
         csv_file='market_indices_data.csv',
-        index_name='S&P 500',
-        initial_investment=10000
+        index_name='S&P 500 (US)',
+        initial_investment=10000,
+        cache=cache
     )
     
-    if results is not None:
-        # Save results to CSV
-        results.to_csv('market_timing_cost_results.csv', index=False)
+    # Full miss-best / miss-worst / miss-both curves for every index
+    def save_curves():
+        curves = analyze_market_timing_cost_batch(
+            csv_file='market_indices_data.csv',
+            max_days=100,
+            initial_investment=10000
+        )
+        curves.to_csv('market_timing_cost_results.csv', index=False)
         print(f"\nResults saved to 'market_timing_cost_results.csv'")
+        return 'market_timing_cost_results.csv'
+    if cache is None:
+        save_curves()
+    else:
+        cache.run('market_timing_cost_results',
+                  cache.key(cache.file_digest('market_indices_data.csv'), 100, 10000, analyze_market_timing_cost_batch),
+                  save_curves)
     
     print("\n" + "=" * 80)
     print("ANALYSIS COMPLETE!")
     print("=" * 80)
+    
+    if recorder is not None:
+        recorder.finish()
 
@@ -0,0 +1,256 @@
+"""
+Columnar Price Store
+Binary, memory-mapped storage for the market indices panel.
+
+The store lives in a directory next to the CSV (``market_indices_data.csv`` ->
+``market_indices_data.store/``) and holds:
+  - dates.i8      int64 nanosecond timestamps, sorted ascending
+  - colNNNNN.f8   one raw float64 file per index, same length as dates
+  - meta.json     column names, file mapping and row count
+
+Each column is a contiguous file, so a load only touches the columns it asks
+for, and a date range is resolved with searchsorted on the date file instead
+of parsing text. Rows can be appended in place without rewriting history.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from ragged import RaggedPanel
+
+STORE_SUFFIX = '.store'
+STORE_VERSION = 1
+META_FILE = 'meta.json'
+DATES_FILE = 'dates.i8'
+
+
+def store_path_for(csv_file):
+    """Return the store directory that sits next to a CSV file"""
+    root, _ = os.path.splitext(csv_file)
+    return root + STORE_SUFFIX
+
+
+def _read_meta(store_dir):
+    with open(os.path.join(store_dir, META_FILE)) as f:
+        meta = json.load(f)
+    if meta.get('version') != STORE_VERSION:
+        raise ValueError(f"Unsupported price store version: {meta.get('version')}")
+    return meta
+
+
+def _write_meta(store_dir, meta):
+    # Write-then-rename so readers never see a half-written meta file
+    tmp_file = os.path.join(store_dir, META_FILE + '.tmp')
+    with open(tmp_file, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_file, os.path.join(store_dir, META_FILE))
+
+
+def _map(store_dir, filename, dtype, rows):
+    if rows == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(os.path.join(store_dir, filename), dtype=dtype, mode='r', shape=(rows,))
+
+
+def price_store_exists(store_dir):
+    """Check whether a price store has been written to store_dir"""
+    return os.path.exists(os.path.join(store_dir, META_FILE))
+
+
+def price_store_is_current(store_dir, csv_file):
+    """Check that the store exists and is at least as new as its CSV export"""
+    # Without the CSV the store may be left over from another run (e.g. a test's dummy data)
+    if not price_store_exists(store_dir) or not os.path.exists(csv_file):
+        return False
+    meta_mtime = os.path.getmtime(os.path.join(store_dir, META_FILE))
+    return meta_mtime >= os.path.getmtime(csv_file)
+
+
+def price_store_columns(store_dir):
+    """Return the index names held in the store, in stored order"""
+    return list(_read_meta(store_dir)['columns'])
+
+
+def write_price_store(df, store_dir):
+    """Write a date-indexed price DataFrame to store_dir, replacing any previous contents"""
+    df = df.sort_index()
+    os.makedirs(store_dir, exist_ok=True)
+
+    dates = df.index.values.astype('datetime64[ns]').astype(np.int64)
+    np.ascontiguousarray(dates).tofile(os.path.join(store_dir, DATES_FILE))
+
+    files = {}
+    for i, col in enumerate(df.columns):
+        filename = f'col{i:05d}.f8'
+        values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        np.ascontiguousarray(values).tofile(os.path.join(store_dir, filename))
+        files[col] = filename
+
+    # Drop column files left over from a wider panel
+    for filename in os.listdir(store_dir):
+        if filename.startswith('col') and filename.endswith('.f8') and filename not in files.values():
+            os.remove(os.path.join(store_dir, filename))
+
+    _write_meta(store_dir, {
+        'version': STORE_VERSION,
+        'rows': len(df),
+        'index_name': df.index.name,
+        'columns': list(df.columns),
+        'files': files,
+    })
+
+
+def append_price_store(df, store_dir):
+    """
+    Append rows that are strictly newer than the last stored date.
+
+    The columns of df must match the stored columns (missing ones are written
+    as NaN). Returns the number of rows appended. Raises ValueError when df
+    contains dates at or before the stored high-water mark or unknown columns;
+    callers should rewrite the store with write_price_store in that case.
+    """
+    meta = _read_meta(store_dir)
+    rows = meta['rows']
+    if df.empty:
+        return 0
+
+    unknown = [col for col in df.columns if col not in meta['files']]
+    if unknown:
+        raise ValueError(f"Cannot append unknown columns: {unknown}")
+
+    df = df.sort_index()
+    new_dates = df.index.values.astype('datetime64[ns]').astype(np.int64)
+    if rows:
+        last_date = _map(store_dir, DATES_FILE, np.int64, rows)[-1]
+        if new_dates[0] <= last_date:
+            raise ValueError("Appended rows must be newer than the last stored date")
+
+    # Data files first, meta last: a crash in between leaves the old row count valid
+    with open(os.path.join(store_dir, DATES_FILE), 'r+b') as f:
+        f.seek(rows * 8)
+        f.write(np.ascontiguousarray(new_dates).tobytes())
+        f.truncate()
+    for col in meta['columns']:
+        if col in df.columns:
+            values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            values = np.full(len(df), np.nan)
+        with open(os.path.join(store_dir, meta['files'][col]), 'r+b') as f:
+            f.seek(rows * 8)
+            f.write(np.ascontiguousarray(values).tobytes())
+            f.truncate()
+
+    meta['rows'] = rows + len(df)
+    _write_meta(store_dir, meta)
+    return len(df)
+
+
+def _row_range(dates, start, end):
+    """Rows [lo, hi) of the sorted date file within the inclusive bounds (empty when end < start)"""
+    lo = 0 if start is None else int(np.searchsorted(dates, pd.Timestamp(start).value, side='left'))
+    hi = len(dates) if end is None else int(np.searchsorted(dates, pd.Timestamp(end).value, side='right'))
+    return lo, max(hi, lo)
+
+
+def read_price_store(store_dir, columns=None, start=None, end=None):
+    """
+    Load a slice of the store as a DataFrame
+
+    Parameters:
+    - store_dir: Store directory written by write_price_store
+    - columns: Index names to load (default: all). Unknown names are skipped.
+    - start, end: Inclusive date bounds (default: full history)
+    """
+    meta = _read_meta(store_dir)
+    rows = meta['rows']
+    dates = _map(store_dir, DATES_FILE, np.int64, rows)
+
+    lo, hi = _row_range(dates, start, end)
+
+    if columns is None:
+        columns = meta['columns']
+    columns = [col for col in columns if col in meta['files']]
+
+    data = {}
+    for col in columns:
+        values = _map(store_dir, meta['files'][col], np.float64, rows)
+        data[col] = np.array(values[lo:hi])
+
+    index = pd.DatetimeIndex(np.array(dates[lo:hi]).view('datetime64[ns]'), name=meta['index_name'])
+    return pd.DataFrame(data, index=index, columns=columns)
+
+
+def read_price_store_ragged(store_dir, columns=None, start=None, end=None):
+    """
+    Load a slice of the store as a RaggedPanel, one column at a time
+
+    Same arguments as read_price_store; the aligned frame is never built, so
+    memory is proportional to the number of valid prices.
+    """
+    meta = _read_meta(store_dir)
+    rows = meta['rows']
+    dates = _map(store_dir, DATES_FILE, np.int64, rows)
+
+    lo, hi = _row_range(dates, start, end)
+
+    if columns is None:
+        columns = meta['columns']
+    columns = [col for col in columns if col in meta['files']]
+
+    arrays = (_map(store_dir, meta['files'][col], np.float64, rows)[lo:hi] for col in columns)
+    index = pd.DatetimeIndex(np.array(dates[lo:hi]).view('datetime64[ns]'), name=meta['index_name'])
+    return RaggedPanel.from_arrays(index, columns, arrays)
+
+
+def load_prices(csv_file, columns=None, start=None, end=None):
+    """Load prices from the columnar store when it is current, otherwise from the CSV"""
+    store_dir = store_path_for(csv_file)
+    if price_store_is_current(store_dir, csv_file):
+        try:
+            return read_price_store(store_dir, columns=columns, start=start, end=end)
+        except Exception as e:
+            print(f"Failed to read price store {store_dir}: {e}. Falling back to CSV...")
+
+    df = pd.read_csv(csv_file, index_col=0, parse_dates=True)
+    if columns is not None:
+        df = df[[col for col in columns if col in df.columns]]
+    return df.loc[start:end]
+
+
+def available_columns(csv_file):
+    """List the index names available for csv_file, reading only metadata when possible"""
+    store_dir = store_path_for(csv_file)
+    if price_store_is_current(store_dir, csv_file):
+        try:
+            return price_store_columns(store_dir)
+        except Exception:
+            pass
+    return list(pd.read_csv(csv_file, index_col=0, nrows=0).columns)
+
+
+def iter_price_store(store_dir, columns=None, start=None, end=None, chunk_rows=50000):
+    """
+    Yield a slice of the store as DataFrames of at most chunk_rows rows, oldest first
+
+    Same arguments as read_price_store; only one chunk of the mapped column
+    files is copied into memory at a time.
+    """
+    meta = _read_meta(store_dir)
+    rows = meta['rows']
+    dates = _map(store_dir, DATES_FILE, np.int64, rows)
+
+    lo, hi = _row_range(dates, start, end)
+
+    if columns is None:
+        columns = meta['columns']
+    columns = [col for col in columns if col in meta['files']]
+    mapped = [_map(store_dir, meta['files'][col], np.float64, rows) for col in columns]
+
+    for chunk_lo in range(lo, hi, chunk_rows):
+        chunk_hi = min(chunk_lo + chunk_rows, hi)
+        index = pd.DatetimeIndex(np.array(dates[chunk_lo:chunk_hi]).view('datetime64[ns]'), name=meta['index_name'])
+        yield pd.DataFrame({col: np.array(values[chunk_lo:chunk_hi]) for col, values in zip(columns, mapped)},
+                           index=index, columns=columns)
@@ -0,0 +1,186 @@
+"""
+Ragged Price Panel
+Compact per-index storage for panels whose indices have different histories.
+
+Instead of one wide frame on the union of every trading calendar (mostly NaN
+once thousands of instruments of different ages are involved), each index
+keeps only its valid prices:
+  - dates     shared, sorted date table (DatetimeIndex)
+  - values    every index's prices, concatenated index by index (float64);
+              index i owns values[offsets[i]:offsets[i + 1]]
+  - starts    offset into the date table of each index's first price
+  - spans     rows of the date table from its first to its last price
+  - mask      bit-packed validity of each index's span (market holidays
+              inside a span are 0 bits); index i owns bytes
+              mask[mask_offsets[i]:mask_offsets[i + 1]]
+
+That is about 8 bytes per price, against 8 bytes per (date, index) cell of
+the union frame. An index's prices are one contiguous slice, so per-index
+work (returns, running peaks, first / last price) runs on plain arrays
+without dropna(). Date positions, aligned 2-D arrays and DataFrames are only
+built when a caller asks for them.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class RaggedPanel:
+    """Per-index contiguous prices with offsets into a shared date table"""
+
+    def __init__(self, dates, columns, values, offsets, starts, spans, mask, mask_offsets):
+        self.dates = pd.DatetimeIndex(dates)
+        self.columns = pd.Index(columns)
+        self.values = np.asarray(values, dtype=np.float64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.spans = np.asarray(spans, dtype=np.int64)
+        self.mask = np.asarray(mask, dtype=np.uint8)
+        self.mask_offsets = np.asarray(mask_offsets, dtype=np.int64)
+        if len(self.offsets) != len(self.columns) + 1 or self.offsets[-1] != len(self.values):
+            raise ValueError("offsets must have one entry per column plus the total length")
+        self._lookup = None
+
+    @classmethod
+    def from_columns(cls, dates, columns, items):
+        """Build from a date table and one (positions, values) pair per column, positions ascending"""
+        values, starts, spans, masks = [], [], [], []
+        for positions, column_values in items:
+            positions = np.asarray(positions, dtype=np.int64)
+            if len(positions):
+                start, span = positions[0], positions[-1] - positions[0] + 1
+                valid = np.zeros(span, dtype=bool)
+                valid[positions - start] = True
+            else:
+                start, span, valid = 0, 0, np.zeros(0, dtype=bool)
+            values.append(np.asarray(column_values, dtype=np.float64))
+            starts.append(start)
+            spans.append(span)
+            masks.append(np.packbits(valid))
+        counts = [len(v) for v in values]
+        return cls(dates, columns,
+                   np.concatenate(values) if values else np.empty(0),
+                   np.concatenate([[0], np.cumsum(counts, dtype=np.int64)]),
+                   starts, spans,
+                   np.concatenate(masks) if masks else np.empty(0, dtype=np.uint8),
+                   np.concatenate([[0], np.cumsum([len(m) for m in masks], dtype=np.int64)]))
+
+    @classmethod
+    def from_arrays(cls, dates, columns, arrays):
+        """Build from a shared date table and one full-length float array per column (NaN = missing)"""
+        def items():
+            for array in arrays:
+                array = np.asarray(array, dtype=np.float64)
+                positions = np.flatnonzero(~np.isnan(array))
+                yield positions, array[positions]
+        return cls.from_columns(dates, columns, items())
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build from a date-indexed DataFrame, dropping NaN"""
+        values = np.asfortranarray(df.to_numpy(dtype=np.float64, na_value=np.nan))
+        return cls.from_arrays(df.index, df.columns, values.T)
+
+    @property
+    def shape(self):
+        """(dates, indices) of the aligned panel"""
+        return len(self.dates), len(self.columns)
+
+    @property
+    def empty(self):
+        return len(self.values) == 0
+
+    @property
+    def counts(self):
+        """Number of prices of each index"""
+        return np.diff(self.offsets)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in (self.values, self.offsets, self.starts, self.spans, self.mask,
+                                              self.mask_offsets)) + self.dates.nbytes
+
+    def _position(self, column):
+        if self._lookup is None:
+            self._lookup = {name: i for i, name in enumerate(self.columns)}
+        return self._lookup[column]
+
+    def _valid(self, i):
+        """Validity of index i over its span"""
+        packed = self.mask[self.mask_offsets[i]:self.mask_offsets[i + 1]]
+        return np.unpackbits(packed, count=int(self.spans[i])).view(bool)
+
+    def _item(self, i):
+        """(positions, values) of the i-th index; values is a view"""
+        positions = self.starts[i] + np.flatnonzero(self._valid(i))
+        return positions, self.values[self.offsets[i]:self.offsets[i + 1]]
+
+    def column(self, column):
+        """(date table positions, values view) of one index's prices"""
+        return self._item(self._position(column))
+
+    def series(self, column):
+        """One index's prices as a Series on its own dates (like data[column].dropna())"""
+        positions, values = self.column(column)
+        return pd.Series(values, index=self.dates[positions], name=column)
+
+    def segment_ids(self):
+        """Column number of every value"""
+        return np.repeat(np.arange(len(self.columns)), self.counts)
+
+    def aligned(self, columns=None):
+        """Dates x indices float array with NaN where an index has no price"""
+        indices = range(len(self.columns)) if columns is None else [self._position(c) for c in columns]
+        out = np.full((len(self.dates), len(indices)), np.nan)
+        for j, i in enumerate(indices):
+            span = out[self.starts[i]:self.starts[i] + self.spans[i], j]
+            span[self._valid(i)] = self.values[self.offsets[i]:self.offsets[i + 1]]
+        return out
+
+    def to_frame(self, columns=None):
+        """The aligned DataFrame on the shared date table"""
+        columns = self.columns if columns is None else pd.Index(columns)
+        return pd.DataFrame(self.aligned(columns), index=self.dates, columns=columns)
+
+    def with_values(self, values):
+        """A panel with the same layout (dates, spans, mask) and new per-price values"""
+        return RaggedPanel(self.dates, self.columns, values, self.offsets, self.starts, self.spans, self.mask,
+                           self.mask_offsets)
+
+    def rename(self, mapping):
+        """A panel with indices renamed by a dict (names not in it are kept)"""
+        return RaggedPanel(self.dates, [mapping.get(c, c) for c in self.columns], self.values, self.offsets,
+                           self.starts, self.spans, self.mask, self.mask_offsets)
+
+    def select(self, columns):
+        """A panel with only the given indices (unknown names are skipped)"""
+        known = set(self.columns)
+        indices = [self._position(c) for c in columns if c in known]
+        return RaggedPanel.from_columns(self.dates, self.columns[indices], (self._item(i) for i in indices))
+
+    def slice_dates(self, start=None, end=None):
+        """A panel restricted to inclusive date bounds, with a trimmed date table"""
+        lo = 0 if start is None else int(self.dates.searchsorted(pd.Timestamp(start), side='left'))
+        hi = len(self.dates) if end is None else int(self.dates.searchsorted(pd.Timestamp(end), side='right'))
+        hi = max(hi, lo)
+
+        def items():
+            for i in range(len(self.columns)):
+                positions, values = self._item(i)
+                a, b = np.searchsorted(positions, [lo, hi])
+                yield positions[a:b] - lo, values[a:b]
+        return RaggedPanel.from_columns(self.dates[lo:hi], self.columns, items())
+
+    def __repr__(self):
+        n_dates, n_columns = self.shape
+        density = len(self.values) / max(n_dates * n_columns, 1)
+        return f"RaggedPanel({n_columns} indices, {n_dates} dates, {len(self.values)} prices, {density:.0%} dense)"
+
+
+def segment_accumulate(ufunc, values, offsets):
+    """ufunc.accumulate (e.g. np.maximum) restarted at every segment of a ragged array"""
+    out = np.empty_like(values)
+    for start, stop in zip(offsets[:-1], offsets[1:]):
+        if stop > start:
+            ufunc.accumulate(values[start:stop], out=out[start:stop])
+    return out
@@ -0,0 +1,178 @@
+"""
+Response Cache
+On-disk cache for raw data-source responses (yf.download, AkShare frames).
+
+Entries are pickled DataFrames named by a hash of (source, ticker, date range).
+Freshness is controlled by a TTL, the directory is kept under a size budget
+by evicting least-recently-used entries, and offline mode replays cached
+responses without touching the network (stale entries included).
+
+Configuration from the environment (see ResponseCache.from_env):
+  MARKET_CACHE_DIR      enable the cache in this directory
+  MARKET_CACHE_TTL      time-to-live in seconds (default 86400)
+  MARKET_CACHE_MAX_MB   size budget in megabytes (default 512)
+  MARKET_OFFLINE=1      replay only; a miss raises OfflineCacheMiss
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+
+class OfflineCacheMiss(LookupError):
+    """Raised in offline mode when a response is not in the cache"""
+
+
+class ResponseCache:
+    def __init__(self, cache_dir='.response_cache', ttl_seconds=86400, max_bytes=512 * 1024 * 1024,
+                 offline=False):
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """Build a cache from MARKET_CACHE_* variables, or return None if not configured"""
+        cache_dir = os.environ.get('MARKET_CACHE_DIR')
+        offline = os.environ.get('MARKET_OFFLINE', '').lower() in ('1', 'true', 'yes')
+        if not cache_dir and not offline:
+            return None
+        return cls(
+            cache_dir=cache_dir or '.response_cache',
+            ttl_seconds=float(os.environ.get('MARKET_CACHE_TTL', 86400)),
+            max_bytes=int(float(os.environ.get('MARKET_CACHE_MAX_MB', 512)) * 1024 * 1024),
+            offline=offline,
+        )
+
+    def _path(self, source, ticker, start=None, end=None):
+        if isinstance(ticker, (list, tuple)):
+            ticker = sorted(ticker)
+        key = json.dumps([source, ticker, start, end], sort_keys=True, default=str)
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f'{source}-{digest}.pkl')
+
+    def fetch(self, source, ticker, start, end, call):
+        """
+        Return the cached response for (source, ticker, start, end), or run call()
+
+        Fresh entries are returned directly. Expired entries are refetched; if
+        the refetch fails or comes back empty the stale copy is used. Empty
+        responses are never cached. In offline mode call() is
+        never run: any cached entry is replayed and a miss raises OfflineCacheMiss.
+        """
+        path = self._path(source, ticker, start, end)
+        cached = self._read(path)
+
+        if cached is not None:
+            age = time.time() - os.path.getmtime(path)
+            if self.offline or age <= self.ttl_seconds:
+                self._touch(path)
+                with self._lock:
+                    self.hits += 1
+                return cached
+
+        if self.offline:
+            raise OfflineCacheMiss(f"No cached response for {source} {ticker} ({start} to {end})")
+
+        try:
+            response = call()
+        except Exception:
+            if cached is None:
+                raise
+            with self._lock:
+                self.stale_hits += 1
+            return cached
+
+        if (response is None or getattr(response, 'empty', False)) and cached is not None:
+            # yfinance reports failures as empty frames, so treat one like a failed refetch
+            with self._lock:
+                self.stale_hits += 1
+            return cached
+        with self._lock:
+            self.misses += 1
+        if response is None or getattr(response, 'empty', False):
+            # Not cached: a transient failure must not be replayed for the whole TTL
+            return response
+        self._write(path, response)
+        return response
+
+    def _read(self, path):
+        try:
+            return pd.read_pickle(path)
+        except (FileNotFoundError, EOFError):
+            return None
+        except Exception:
+            # Corrupt or incompatible entry: drop it and refetch
+            self._remove(path)
+            return None
+
+    def _write(self, path, response):
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        pd.to_pickle(response, tmp_path)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def _touch(self, path):
+        # Hits refresh atime only, so the mtime-based TTL is unaffected
+        try:
+            stat = os.stat(path)
+            os.utime(path, (time.time(), stat.st_mtime))
+        except FileNotFoundError:
+            pass
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def entries(self):
+        """Return (path, size, last_used) for every cache entry"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pkl'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((path, stat.st_size, max(stat.st_atime, stat.st_mtime)))
+        return entries
+
+    def evict(self):
+        """Remove least-recently-used entries until the cache fits in max_bytes"""
+        with self._lock:
+            entries = sorted(self.entries(), key=lambda e: e[2])
+            total = sum(size for _, size, _ in entries)
+            for path, size, _ in entries:
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    def clear(self):
+        """Delete every cached response"""
+        for path, _, _ in self.entries():
+            self._remove(path)
+
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        entries = self.entries()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale_hits': self.stale_hits,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+        }
@@ -0,0 +1,161 @@
+"""
+Rolling Co-moments Engine
+Rolling correlations, covariances and betas of many series pairs over time.
+
+For every selected pair (a, b) the window keeps six running sums over the
+rows where both have a return: count, sum of a, sum of b, sums of squares
+and the cross product. Sliding the window by one row adds the new row's
+terms and subtracts those of the row that drops out, so each window costs
+O(pairs) instead of O(window x pairs). Rows are processed in chunks (the
+updates within a chunk are one cumulative sum), carrying the sums from chunk
+to chunk, so results can be written out chunk by chunk: a (T, N, N) matrix
+stack goes straight into a memory-mapped .npy file.
+
+Returns are centered by their column means before the sums, which keeps the
+running-sum cancellation error far below the statistics' own precision.
+Windows with fewer than min_periods common rows (default: the window) are
+NaN, as in DataFrame.rolling(window).corr() / .cov().
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+TERMS = ('count', 'sum_a', 'sum_b', 'sq_a', 'sq_b', 'cross')
+
+
+def _pair_terms(x, valid, a, b):
+    """Per-row contributions (terms x rows x pairs) of each pair's rows where both are valid"""
+    both = valid[:, a] & valid[:, b]
+    xa = np.where(both, x[:, a], 0.0)
+    xb = np.where(both, x[:, b], 0.0)
+    return np.stack([both.astype(float), xa, xb, xa * xa, xb * xb, xa * xb])
+
+
+def _statistics(sums, min_periods):
+    """Correlation, covariance, variances and beta (a on b) from window sums"""
+    count, sum_a, sum_b, sq_a, sq_b, cross = sums
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = (cross - sum_a * sum_b / count) / (count - 1)
+        var_a = (sq_a - sum_a ** 2 / count) / (count - 1)
+        var_b = (sq_b - sum_b ** 2 / count) / (count - 1)
+        corr = np.clip(cov / np.sqrt(var_a * var_b), -1.0, 1.0)
+        beta = cov / var_b
+    short = count < max(min_periods, 2)
+    for values in (cov, var_a, var_b):
+        values[short] = np.nan
+    corr[short | ~(var_a > 0) | ~(var_b > 0)] = np.nan
+    beta[short | ~(var_b > 0)] = np.nan
+    return {'count': count, 'correlation': corr, 'covariance': cov, 'var_a': var_a, 'var_b': var_b, 'beta': beta}
+
+
+def _pair_positions(columns, pairs):
+    """Column positions of pairs given as labels or positions"""
+    lookup = {name: i for i, name in enumerate(columns)}
+    position = lambda key: lookup[key] if key in lookup else int(key)
+    a = np.array([position(first) for first, _ in pairs], dtype=np.int64)
+    b = np.array([position(second) for _, second in pairs], dtype=np.int64)
+    return a, b
+
+
+def rolling_comoments(returns, window, pairs, min_periods=None, chunk_rows=None, max_chunk_mb=64):
+    """
+    Stream rolling pair statistics chunk by chunk
+
+    Parameters:
+    - returns: DataFrame or 2-D array (rows x series) of returns, NaN for missing
+    - window: rows per window
+    - pairs: list of (a, b) column labels or positions
+    - min_periods: minimum common rows per window (default: window)
+    - chunk_rows: rows per chunk (default: sized to max_chunk_mb)
+
+    Yields (start, stop, stats) for consecutive row ranges; stats maps
+    count, correlation, covariance, var_a, var_b and beta (the slope of a on
+    b) to (stop - start) x len(pairs) arrays.
+    """
+    columns = returns.columns if isinstance(returns, pd.DataFrame) else []
+    values = returns.to_numpy(dtype=float) if isinstance(returns, pd.DataFrame) else np.asarray(returns, dtype=float)
+    n_rows = values.shape[0]
+    min_periods = window if min_periods is None else min_periods
+    a, b = _pair_positions(columns, pairs)
+    if chunk_rows is None:
+        # new, old and cumulative terms are alive at once
+        chunk_rows = max(1, int(max_chunk_mb * 2**20 // (3 * len(TERMS) * 8 * max(len(a), 1))))
+
+    valid = ~np.isnan(values)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        shift = np.nan_to_num(np.nanmean(values, axis=0))
+    x = np.where(valid, values - shift, 0.0)
+
+    state = np.zeros((len(TERMS), len(a)))
+    for start in range(0, n_rows, chunk_rows):
+        stop = min(start + chunk_rows, n_rows)
+        delta = _pair_terms(x[start:stop], valid[start:stop], a, b)
+        # Rows leaving the window: start - window .. stop - window (none before row 0)
+        old_start, old_stop = start - window, stop - window
+        if old_stop > 0:
+            skip = max(0, -old_start)
+            delta[:, skip:] -= _pair_terms(x[old_start + skip:old_stop], valid[old_start + skip:old_stop], a, b)
+        sums = state[:, None, :] + np.cumsum(delta, axis=1)
+        state = sums[:, -1].copy()
+        yield start, stop, _statistics(sums, min_periods)
+
+
+def rolling_pairs(returns, window, pairs, statistics=('correlation', 'beta'), min_periods=None, chunk_rows=None):
+    """
+    Rolling statistics of selected pairs as DataFrames
+
+    Returns a dict of statistic -> DataFrame (rows like returns, one column
+    per pair, labelled (a, b)).
+    """
+    index = returns.index if isinstance(returns, pd.DataFrame) else pd.RangeIndex(len(returns))
+    columns = pd.MultiIndex.from_tuples(pairs) if pairs else pd.Index([])
+    blocks = {name: [] for name in statistics}
+    for _, _, stats in rolling_comoments(returns, window, pairs, min_periods, chunk_rows):
+        for name in statistics:
+            blocks[name].append(stats[name])
+    return {name: pd.DataFrame(np.vstack(parts) if parts else np.empty((0, len(pairs))), index=index, columns=columns)
+            for name, parts in blocks.items()}
+
+
+def rolling_beta(returns, benchmark, window, min_periods=None):
+    """
+    Rolling correlation with and beta against a benchmark column for every other column
+
+    Returns (correlation, beta) DataFrames with one column per series.
+    """
+    others = [column for column in returns.columns if column != benchmark]
+    result = rolling_pairs(returns, window, [(column, benchmark) for column in others], min_periods=min_periods)
+    correlation, beta = result['correlation'], result['beta']
+    correlation.columns = beta.columns = others
+    return correlation, beta
+
+
+def rolling_correlation_matrices(returns, window, min_periods=None, output_file=None, dtype=np.float32,
+                                 chunk_rows=None):
+    """
+    Rolling correlation matrix of all series for every row, shape (T, N, N)
+
+    With output_file (.npy) the stack is written chunk by chunk into a
+    memory-mapped file and the memmap is returned, so T x N x N never has to
+    fit in memory; otherwise an in-memory array is returned.
+    """
+    n_rows, n = returns.shape
+    a, b = np.triu_indices(n)
+    pairs = list(zip(a.tolist(), b.tolist()))
+    if output_file:
+        out = np.lib.format.open_memmap(output_file, mode='w+', dtype=dtype, shape=(n_rows, n, n))
+    else:
+        out = np.empty((n_rows, n, n), dtype=dtype)
+    values = returns.to_numpy(dtype=float) if isinstance(returns, pd.DataFrame) else returns
+    for start, stop, stats in rolling_comoments(values, window, pairs, min_periods, chunk_rows):
+        corr = stats['correlation']
+        # A series' correlation with itself is exactly 1 wherever it is defined
+        corr[:, a == b] = np.where(np.isnan(corr[:, a == b]), np.nan, 1.0)
+        out[start:stop, a, b] = corr
+        out[start:stop, b, a] = corr
+    if output_file:
+        out.flush()
+    return out
@@ -0,0 +1,124 @@
+"""
+Rolling Returns Engine
+Summary statistics of rolling returns for many holding periods in one pass.
+
+The price matrix is converted to log prices once; the h-day return for every
+horizon is then a single vectorized difference of the log matrix, reduced
+straight to per-column statistics. Only one horizon's return block (and at
+most chunk_columns columns of it) is alive at a time.
+
+Returns match DataFrame.pct_change(periods=h, fill_method=None): a window is
+valid only when both its start and end rows hold a price.
+"""
+
+import numpy as np
+import pandas as pd
+
+STAT_NAMES = ('count', 'mean', 'std', 'min', 'max', 'positive_pct')
+
+
+def _histogram_edges(lo, hi, bins):
+    """Per-column (lo, hi, edges) of np.histogram-style bins between lo and hi"""
+    # Degenerate ranges get the same +/-0.5 padding np.histogram uses
+    flat = ~(hi > lo)
+    lo = np.where(flat, lo - 0.5, lo)
+    hi = np.where(flat, hi + 0.5, hi)
+    lo = np.where(np.isfinite(lo), lo, 0.0)
+    hi = np.where(np.isfinite(hi), hi, 1.0)
+    edges = lo[:, None] + (hi - lo)[:, None] * np.linspace(0.0, 1.0, bins + 1)[None, :]
+    return lo, hi, edges
+
+
+def _histograms(returns, valid, lo, hi, bins):
+    """Per-column histogram counts with np.histogram-style edges between lo and hi"""
+    n_cols = returns.shape[1]
+    lo, hi, edges = _histogram_edges(lo, hi, bins)
+    with np.errstate(invalid='ignore'):
+        position = (returns - lo) / (hi - lo) * bins
+    bin_index = np.clip(np.floor(np.where(valid, position, 0)), 0, bins - 1).astype(np.int64)
+    # One bincount over (column, bin) pairs instead of a histogram call per column
+    flat_index = (bin_index + np.arange(n_cols) * bins)[valid]
+    counts = np.bincount(flat_index, minlength=n_cols * bins).reshape(n_cols, bins)
+    return counts, edges
+
+
+def _summarize_block(log_prices, days, bins):
+    """Reduce one horizon's returns for a block of columns"""
+    diff = log_prices[days:] - log_prices[:-days]
+    valid = ~np.isnan(diff)
+    count = valid.sum(axis=0)
+
+    returns = np.expm1(diff)
+    zeroed = np.where(valid, returns, 0.0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = zeroed.sum(axis=0) / count
+        centered = np.where(valid, returns - mean, 0.0)
+        std = np.sqrt((centered ** 2).sum(axis=0) / (count - 1))
+        positive = (diff > 0).sum(axis=0) / count
+    std = np.where(count > 1, std, np.nan)
+
+    has_data = count > 0
+    minimum = np.where(has_data, np.where(valid, returns, np.inf).min(axis=0), np.nan)
+    maximum = np.where(has_data, np.where(valid, returns, -np.inf).max(axis=0), np.nan)
+
+    stats = {
+        'count': count,
+        'mean': mean,
+        'std': std,
+        'min': minimum,
+        'max': maximum,
+        'positive_pct': positive * 100,
+    }
+    if bins:
+        stats['hist_counts'], stats['hist_edges'] = _histograms(returns, valid, minimum, maximum, bins)
+    return stats
+
+
+def rolling_return_summary(prices, horizons, bins=None, chunk_columns=512):
+    """
+    Summarize rolling returns of a price panel for several horizons at once
+
+    Parameters:
+    - prices: DataFrame of prices (dates x indices)
+    - horizons: dict of label -> window length in rows, or an iterable of row counts
+    - bins: if set, also return per-column histograms with this many bins
+    - chunk_columns: number of columns processed together (bounds peak memory)
+
+    Returns a dict of label -> dict with 'count', 'mean', 'std', 'min', 'max'
+    (Series, returns as fractions) and 'positive_pct' (Series, 0-100), plus
+    'hist_counts' (columns x bins array) and 'hist_edges' (columns x bins+1
+    array of fractional returns) when bins is set.
+    """
+    if not isinstance(horizons, dict):
+        horizons = {days: days for days in horizons}
+
+    columns = prices.columns
+    values = prices.to_numpy(dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_prices = np.log(values)
+    # Non-positive prices have no log return; treat them like missing data
+    log_prices[~np.isfinite(log_prices)] = np.nan
+
+    results = {}
+    for label, days in horizons.items():
+        days = int(days)
+        if days <= 0 or days >= len(log_prices):
+            # No complete window: same as an all-NaN pct_change
+            blocks = [{
+                'count': np.zeros(len(columns), dtype=np.int64),
+                **{name: np.full(len(columns), np.nan) for name in STAT_NAMES if name != 'count'},
+            }]
+            if bins:
+                blocks[0]['hist_counts'] = np.zeros((len(columns), bins), dtype=np.int64)
+                blocks[0]['hist_edges'] = np.tile(np.linspace(0.0, 1.0, bins + 1), (len(columns), 1))
+        else:
+            blocks = [_summarize_block(log_prices[:, i:i + chunk_columns], days, bins)
+                      for i in range(0, len(columns), chunk_columns)]
+
+        summary = {name: pd.Series(np.concatenate([b[name] for b in blocks]), index=columns)
+                   for name in STAT_NAMES}
+        if bins:
+            summary['hist_counts'] = np.concatenate([b['hist_counts'] for b in blocks])
+            summary['hist_edges'] = np.concatenate([b['hist_edges'] for b in blocks])
+        results[label] = summary
+    return results
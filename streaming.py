@@ -0,0 +1,193 @@
+"""
+Streaming Statistics
+Summary statistics and timing costs of price panels larger than memory.
+
+The panel is read in row chunks (from the columnar store when it is current,
+otherwise from the CSV), oldest first, and each chunk is folded into a small
+per-index state that carries across chunk boundaries:
+  - first / last valid price and date (the running product of 1 + daily
+    return telescopes to last / first, so total and annualized return need
+    nothing else)
+  - the previous valid price, so the first return of a chunk spans the gap
+    back into the previous one, as in series.dropna().pct_change()
+  - count, mean and sum of squared deviations of the daily returns (Welford /
+    Chan merge of each chunk's own moments) for volatility and Sharpe
+  - running peak and deepest drawdown
+  - best and worst day, and optionally the top N best and worst daily log
+    returns for the market timing cost curves
+
+Memory is one chunk plus O(indices x N). summary() equals
+summary_statistics() on the whole panel, and the carried log-return total and
+extreme days feed timing_cost_table() for the market timing cost curves.
+"""
+
+import numpy as np
+import pandas as pd
+
+from price_store import store_path_for, price_store_is_current, price_store_columns, iter_price_store
+from summary_kernel import TRADING_DAYS, consecutive_returns
+
+# Default chunk size: MB of float64 prices per chunk (the per-chunk work holds about ten such arrays)
+CHUNK_MB = 8
+
+
+def iter_price_chunks(csv_file, columns=None, start=None, end=None, chunk_rows=None):
+    """
+    Yield the prices of csv_file as DataFrames of at most chunk_rows rows, oldest first
+
+    Uses the columnar store when it is current; the CSV must be sorted by
+    date (as save_data_to_csv writes it). Unknown columns are skipped. The
+    default chunk_rows holds about CHUNK_MB of prices.
+    """
+    store_dir = store_path_for(csv_file)
+    use_store = price_store_is_current(store_dir, csv_file)
+    header = price_store_columns(store_dir) if use_store else list(pd.read_csv(csv_file, index_col=0, nrows=0).columns)
+    if columns is not None:
+        columns = [col for col in columns if col in header]
+    if chunk_rows is None:
+        chunk_rows = max(1, CHUNK_MB * 2**20 // (8 * max(len(header if columns is None else columns), 1)))
+    if use_store:
+        yield from iter_price_store(store_dir, columns=columns, start=start, end=end, chunk_rows=chunk_rows)
+        return
+
+    # By position: the date column may have no name
+    usecols = None if columns is None else [0] + [header.index(col) + 1 for col in columns]
+    start = None if start is None else pd.Timestamp(start)
+    end = None if end is None else pd.Timestamp(end)
+    for chunk in pd.read_csv(csv_file, index_col=0, parse_dates=True, usecols=usecols, chunksize=chunk_rows):
+        if columns is not None:
+            chunk = chunk[columns]
+        if start is not None:
+            chunk = chunk[chunk.index >= start]
+        if end is not None:
+            if len(chunk) and chunk.index[0] > end:
+                return
+            chunk = chunk[chunk.index <= end]
+        if len(chunk):
+            yield chunk
+
+
+class StreamingSummary:
+    """Per-index running state; feed chunks with update(), read the statistics with summary()"""
+
+    def __init__(self, top_days=0):
+        self.top_days = top_days
+        self.columns = None
+        self.chunks = 0
+        self.rows = 0
+
+    def _start(self, columns):
+        n = len(columns)
+        self.columns = pd.Index(columns)
+        self.count = np.zeros(n, dtype=np.int64)
+        self.first_date = np.full(n, np.datetime64('NaT'), dtype='M8[ns]')
+        self.last_date = np.full(n, np.datetime64('NaT'), dtype='M8[ns]')
+        self.first_price = np.full(n, np.nan)
+        self.last_price = np.full(n, np.nan)
+        self.n_returns = np.zeros(n, dtype=np.int64)
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros(n)
+        self.best = np.full(n, -np.inf)
+        self.worst = np.full(n, np.inf)
+        self.peak = np.full(n, np.nan)
+        self.max_drawdown = np.full(n, np.nan)
+        self.log_total = np.zeros(n)
+        # Largest / smallest daily log returns so far, NaN-padded, top_days x indices
+        self.top_best = np.full((self.top_days, n), np.nan)
+        self.top_worst = np.full((self.top_days, n), np.nan)
+
+    def update(self, chunk):
+        """Fold the next (later) chunk of prices, a date-indexed DataFrame, into the state"""
+        if self.columns is None:
+            self._start(chunk.columns)
+        elif not chunk.columns.equals(self.columns):
+            raise ValueError("Every chunk must have the same columns")
+        values = chunk.to_numpy(dtype=np.float64)
+        if not len(values):
+            return self
+        dates = chunk.index.values.astype('M8[ns]')
+        valid = ~np.isnan(values)
+        any_valid = valid.any(axis=0)
+        self.chunks += 1
+        self.rows += len(values)
+
+        # First / last valid price and date
+        first_row = valid.argmax(axis=0)
+        last_row = len(values) - 1 - valid[::-1].argmax(axis=0)
+        cols = np.arange(len(self.columns))
+        new = any_valid & (self.count == 0)
+        self.first_date[new] = dates[first_row[new]]
+        self.first_price[new] = values[first_row[new], cols[new]]
+        self.count += valid.sum(axis=0)
+
+        # Daily returns, with the previous chunk's last price as the row before this one
+        returns, has_prev = consecutive_returns(np.vstack([self.last_price, values]))
+        returns, has_prev = returns[1:], has_prev[1:]
+        self.last_date[any_valid] = dates[last_row[any_valid]]
+        self.last_price[any_valid] = values[last_row[any_valid], cols[any_valid]]
+        self._fold_returns(returns, has_prev)
+
+        # Running peak carried into the chunk; fmax / fmin skip NaN
+        running_max = np.fmax.accumulate(np.vstack([self.peak, values]), axis=0)[1:]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            drawdown = np.fmin.reduce(values / running_max - 1, axis=0)
+        self.peak = running_max[-1]
+        self.max_drawdown = np.fmin(self.max_drawdown, drawdown)
+        return self
+
+    def _fold_returns(self, returns, has_prev):
+        """Merge one chunk's return moments, extremes and top days into the state"""
+        n_chunk = has_prev.sum(axis=0)
+        zeroed = np.where(has_prev, returns, 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            chunk_mean = np.where(n_chunk > 0, zeroed.sum(axis=0) / n_chunk, 0.0)
+            chunk_m2 = (np.where(has_prev, returns - chunk_mean, 0.0) ** 2).sum(axis=0)
+            # Chan et al. pairwise merge of (count, mean, M2)
+            total = self.n_returns + n_chunk
+            delta = chunk_mean - self.mean
+            self.mean = np.where(total > 0, self.mean + delta * n_chunk / total, 0.0)
+            self.m2 = self.m2 + chunk_m2 + np.where(total > 0, delta ** 2 * self.n_returns * n_chunk / total, 0.0)
+        self.n_returns = total
+        self.best = np.maximum(self.best, np.where(has_prev, returns, -np.inf).max(axis=0))
+        self.worst = np.minimum(self.worst, np.where(has_prev, returns, np.inf).min(axis=0))
+
+        with np.errstate(invalid='ignore'):
+            log_returns = np.where(has_prev, np.log1p(returns), np.nan)
+        self.log_total += np.nansum(log_returns, axis=0)
+        if self.top_days:
+            # Keep the top_days largest / smallest of the carried ones and this chunk's (NaN sorts last)
+            self.top_best = -np.sort(np.vstack([-self.top_best, -log_returns]), axis=0)[:self.top_days]
+            self.top_worst = np.sort(np.vstack([self.top_worst, log_returns]), axis=0)[:self.top_days]
+
+    def summary(self):
+        """Per-index statistics in the format of summary_statistics()"""
+        if self.columns is None:
+            return pd.DataFrame()
+        n_returns = self.n_returns
+        any_returns = n_returns > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.where(n_returns > 1, np.sqrt(self.m2 / (n_returns - 1)), np.nan)
+            mean = np.where(any_returns, self.mean, np.nan)
+            growth = self.last_price / self.first_price
+            annualized = np.where(any_returns, growth ** (TRADING_DAYS / n_returns) - 1, np.nan)
+        result = pd.DataFrame({
+            'count': self.count,
+            'total_return': growth - 1,
+            'annualized_return': annualized,
+            'volatility': std * np.sqrt(TRADING_DAYS),
+            'sharpe': mean / std * np.sqrt(TRADING_DAYS),
+            'max_drawdown': self.max_drawdown,
+            'best_day': np.where(any_returns, self.best, np.nan),
+            'worst_day': np.where(any_returns, self.worst, np.nan),
+        }, index=self.columns)
+        result['start'] = pd.DatetimeIndex(self.first_date)
+        result['end'] = pd.DatetimeIndex(self.last_date)
+        return result
+
+
+def stream_statistics(chunks, top_days=0):
+    """Fold an iterable of row chunks (oldest first) into a StreamingSummary"""
+    state = StreamingSummary(top_days=top_days)
+    for chunk in chunks:
+        state.update(chunk)
+    return state
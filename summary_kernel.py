@@ -0,0 +1,175 @@
+"""
+Summary Statistics Kernel
+Fused per-column performance statistics over a price panel.
+
+One pass over each block of columns computes, from the NumPy arrays directly:
+first/last valid row, price count, total and annualized return, volatility,
+Sharpe ratio, max drawdown and best/worst day. Every column is measured over
+its own valid history, so leading NaNs (late listings), trailing NaNs and
+holiday gaps inside the series are handled without per-column dropna copies.
+Daily returns are taken between consecutive valid prices, as in
+series.dropna().pct_change().
+"""
+
+import numpy as np
+import pandas as pd
+
+from drawdown import drawdown_matrix, ragged_drawdowns
+from ragged import RaggedPanel
+
+TRADING_DAYS = 252
+
+
+def consecutive_returns(prices):
+    """
+    Simple returns between consecutive valid prices of each column
+
+    Returns (returns, has_prev): returns is NaN where has_prev is False, i.e.
+    where the row has no price or no earlier valid price in its column.
+    """
+    n_rows, n_cols = prices.shape
+    valid = ~np.isnan(prices)
+    # Position of the previous valid price for every row, carried across NaN gaps
+    position = np.where(valid, np.arange(n_rows)[:, None], -1)
+    last_seen = np.maximum.accumulate(position, axis=0)
+    prev = np.vstack([np.full((1, n_cols), -1), last_seen[:-1]])
+    has_prev = valid & (prev >= 0)
+    prev_price = np.take_along_axis(prices, np.maximum(prev, 0), axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns = np.where(has_prev, prices / prev_price - 1, np.nan)
+    return returns, has_prev
+
+
+def _block_stats(prices):
+    """Statistics for a (dates x columns) float block; returns a dict of 1-D arrays"""
+    n_rows, n_cols = prices.shape
+    cols = np.arange(n_cols)
+    valid = ~np.isnan(prices)
+    has_data = valid.any(axis=0)
+
+    first = np.where(has_data, valid.argmax(axis=0), -1)
+    last = np.where(has_data, n_rows - 1 - valid[::-1].argmax(axis=0), -1)
+    count = valid.sum(axis=0)
+
+    returns, has_prev = consecutive_returns(prices)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns = np.where(has_prev, returns, 0.0)
+        n_returns = has_prev.sum(axis=0)
+        mean = returns.sum(axis=0) / n_returns
+        centered = np.where(has_prev, returns - mean, 0.0)
+        std = np.sqrt((centered ** 2).sum(axis=0) / (n_returns - 1))
+        std = np.where(n_returns > 1, std, np.nan)
+
+        first_price = prices[np.maximum(first, 0), cols]
+        last_price = prices[np.maximum(last, 0), cols]
+        growth = np.where(has_data, last_price / first_price, np.nan)
+        annualized = np.where(n_returns > 0, growth ** (TRADING_DAYS / n_returns) - 1, np.nan)
+
+        drawdown = np.where(valid, drawdown_matrix(prices), np.inf)
+
+    any_returns = n_returns > 0
+    return {
+        'first': first,
+        'last': last,
+        'count': count,
+        'total_return': growth - 1,
+        'annualized_return': annualized,
+        'volatility': std * np.sqrt(TRADING_DAYS),
+        'sharpe': mean / std * np.sqrt(TRADING_DAYS),
+        'max_drawdown': np.where(has_data, drawdown.min(axis=0), np.nan),
+        'best_day': np.where(any_returns, np.where(has_prev, returns, -np.inf).max(axis=0), np.nan),
+        'worst_day': np.where(any_returns, np.where(has_prev, returns, np.inf).min(axis=0), np.nan),
+    }
+
+
+def _ragged_stats(panel):
+    """The _block_stats statistics computed on a RaggedPanel's contiguous per-index prices"""
+    values, offsets = panel.values, panel.offsets
+    n_cols = len(panel.columns)
+    counts = panel.counts
+    has_data = counts > 0
+    starts = offsets[:-1][has_data]
+
+    # Returns between consecutive prices of the same index: every value but each index's first
+    is_first = np.zeros(len(values), dtype=bool)
+    is_first[starts] = True
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = np.empty_like(values)
+        ratio[0:1] = np.nan
+        ratio[1:] = values[1:] / values[:-1] - 1
+    returns = ratio[~is_first]
+    segment = panel.segment_ids()[~is_first]
+    n_returns = counts - has_data
+    any_returns = n_returns > 0
+    return_starts = np.concatenate([[0], np.cumsum(n_returns)])[:-1][any_returns]
+
+    first_price = np.full(n_cols, np.nan)
+    last_price = np.full(n_cols, np.nan)
+    first_price[has_data] = values[starts]
+    last_price[has_data] = values[offsets[1:][has_data] - 1]
+    best, worst, max_drawdown = (np.full(n_cols, np.nan) for _ in range(3))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.bincount(segment, weights=returns, minlength=n_cols) / n_returns
+        centered = returns - mean[segment]
+        std = np.sqrt(np.bincount(segment, weights=centered ** 2, minlength=n_cols) / (n_returns - 1))
+        std = np.where(n_returns > 1, std, np.nan)
+        growth = last_price / first_price
+        annualized = np.where(any_returns, growth ** (TRADING_DAYS / n_returns) - 1, np.nan)
+    if any_returns.any():
+        best[any_returns] = np.maximum.reduceat(returns, return_starts)
+        worst[any_returns] = np.minimum.reduceat(returns, return_starts)
+    if has_data.any():
+        max_drawdown[has_data] = np.minimum.reduceat(ragged_drawdowns(panel), starts)
+
+    first = np.where(has_data, panel.starts, -1)
+    last = np.where(has_data, panel.starts + panel.spans - 1, -1)
+    return {
+        'first': first,
+        'last': last,
+        'count': counts,
+        'total_return': growth - 1,
+        'annualized_return': annualized,
+        'volatility': std * np.sqrt(TRADING_DAYS),
+        'sharpe': mean / std * np.sqrt(TRADING_DAYS),
+        'max_drawdown': max_drawdown,
+        'best_day': best,
+        'worst_day': worst,
+    }
+
+
+def summary_statistics(data, chunk_columns=256):
+    """
+    Compute per-index summary statistics for a price panel
+
+    Parameters:
+    - data: DataFrame of prices (dates x indices), or a RaggedPanel
+    - chunk_columns: columns processed together (bounds peak memory on wide panels)
+
+    Returns a DataFrame indexed by index name with fractional statistics and
+    'Data Start' / 'Data End' timestamps (NaT for indices without data).
+    """
+    if isinstance(data, RaggedPanel):
+        return _summary_frame(_ragged_stats(data), data.dates, data.columns)
+    values = data.to_numpy(dtype=np.float64)
+    blocks = [_block_stats(values[:, i:i + chunk_columns])
+              for i in range(0, values.shape[1], chunk_columns)]
+    stats = {name: np.concatenate([b[name] for b in blocks]) if blocks else np.array([])
+             for name in ('first', 'last', 'count', 'total_return', 'annualized_return', 'volatility',
+                          'sharpe', 'max_drawdown', 'best_day', 'worst_day')}
+
+    return _summary_frame(stats, data.index, data.columns)
+
+
+def _summary_frame(stats, index, columns):
+    """Statistics dict (with first / last row positions) -> result DataFrame with start / end dates"""
+    stats = dict(stats)
+    dates = pd.DatetimeIndex(index)
+    first, last = stats.pop('first'), stats.pop('last')
+    start = dates[np.maximum(first, 0)].where(first >= 0) if len(dates) else pd.DatetimeIndex([pd.NaT] * len(first))
+    end = dates[np.maximum(last, 0)].where(last >= 0) if len(dates) else pd.DatetimeIndex([pd.NaT] * len(last))
+
+    result = pd.DataFrame(stats, index=columns)
+    result['start'] = start
+    result['end'] = end
+    return result
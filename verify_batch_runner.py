@@ -0,0 +1,59 @@
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from batch_runner import load_scenarios, parse_scenario, run_batch
+from market_analysis import MarketIndexAnalyzer
+
+
+def _panel():
+    rng = np.random.default_rng(18)
+    dates = pd.bdate_range(start='1995-01-02', periods=252 * 12)
+    data = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, (len(dates), 3)), axis=0)),
+                        index=dates, columns=['A', 'B', 'C'])
+    data.iloc[:800, 2] = np.nan
+    return data
+
+
+def test_parse_and_load_scenarios():
+    scenario = parse_scenario('2000-01-01,,A;B')
+    assert scenario['start'] == '2000-01-01' and scenario['end'] is None and scenario['indices'] == ['A', 'B']
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, 'scenarios.csv')
+        json_path = os.path.join(directory, 'scenarios.json')
+        with open(csv_path, 'w') as f:
+            f.write('name,start,end,indices\nearly,1995-01-01,1999-12-31,\n')
+        with open(json_path, 'w') as f:
+            json.dump([{'name': 'early', 'start': '1995-01-01', 'end': '1999-12-31'}], f)
+        assert load_scenarios(csv_path) == load_scenarios(json_path) == [
+            {'name': 'early', 'start': '1995-01-01', 'end': '1999-12-31', 'indices': None}]
+
+
+def test_batch_matches_single_window_analysis():
+    panel = _panel()
+    scenarios = [parse_scenario('1995-01-01,2000-12-31'), parse_scenario('2001-01-01,,A;C')]
+    combined = run_batch(scenarios, panel=panel)
+    assert list(combined.groupby('scenario', sort=False).size()) == [3, 2]
+
+    analyzer = MarketIndexAnalyzer()
+    analyzer.data = panel.loc['2001-01-01':, ['A', 'C']]
+    expected = analyzer.generate_summary_statistics()
+    rows = combined[combined['scenario'] == scenarios[1]['name']].set_index('index')
+    pd.testing.assert_series_equal(rows['Sharpe Ratio'], expected['Sharpe Ratio'], check_names=False)
+    assert rows['Miss 10 Best Lost (%)'].between(0, 100).all()
+
+
+def test_parallel_matches_serial():
+    panel = _panel()
+    scenarios = [parse_scenario('1995-01-01,2000-12-31'), parse_scenario('2001-01-01,')]
+    pd.testing.assert_frame_equal(run_batch(scenarios, panel=panel, n_jobs=2), run_batch(scenarios, panel=panel))
+
+
+if __name__ == "__main__":
+    test_parse_and_load_scenarios()
+    test_batch_matches_single_window_analysis()
+    test_parallel_matches_serial()
+    print("PASS: batch runner")
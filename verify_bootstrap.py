@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+from bootstrap import bootstrap_holding_periods, _resample_positions
+from market_analysis import MarketIndexAnalyzer
+
+
+def _panel():
+    rng = np.random.default_rng(5)
+    dates = pd.bdate_range(start='2000-01-03', periods=1500)
+    data = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, (1500, 2)), axis=0)),
+                        index=dates, columns=['A', 'B'])
+    data.iloc[:300, 1] = np.nan
+    data.iloc[rng.random(1500) < 0.05, 0] = np.nan
+    return data
+
+
+def test_resampled_blocks_are_contiguous():
+    rng = np.random.default_rng(0)
+    for method in ('stationary', 'moving'):
+        positions = _resample_positions(rng, 1000, 20, 50, method)
+        assert positions.shape == (20, 1000)
+        assert positions.min() >= 0 and positions.max() < 1000
+        # Most steps continue the current block (circularly)
+        steps = (np.diff(positions, axis=1) % 1000) == 1
+        assert steps.mean() > 0.9
+
+
+def test_estimates_and_intervals():
+    data = _panel()
+    horizons = {'1 Year': 252, '3 Years': 756}
+    result = bootstrap_holding_periods(data, horizons, n_replicates=200, block_length=50, seed=1, n_jobs=1)
+    assert set(result['statistic']) == {'positive_pct', 'mean_return'}
+    assert len(result) == 2 * 2 * 2
+
+    # The point estimate is the rolling statistic on each index's own trading days
+    series = data['A'].dropna().reset_index(drop=True)
+    window = series.pct_change(252, fill_method=None).dropna()
+    row = result[(result['index'] == 'A') & (result['horizon'] == '1 Year')].set_index('statistic')
+    np.testing.assert_allclose(row.loc['positive_pct', 'estimate'], (window > 0).mean() * 100)
+    np.testing.assert_allclose(row.loc['mean_return', 'estimate'], window.mean() * 100)
+    assert (result['ci_low'] <= result['ci_high']).all()
+    assert (result['std_error'] > 0).all()
+
+    # An index with a single price has no returns and is left out
+    data['C'] = np.nan
+    data.iloc[-1, 2] = 100.0
+    result = bootstrap_holding_periods(data, horizons, n_replicates=20, block_length=50, seed=1, n_jobs=1)
+    assert set(result['index']) == {'A', 'B'}
+
+
+def test_calendar_horizons_match_holding_periods():
+    analyzer = MarketIndexAnalyzer()
+    analyzer.data = _panel()
+    result = analyzer.calculate_holding_period_confidence_intervals(n_replicates=50, block_length=50, seed=2,
+                                                                    n_jobs=1)
+    holding = analyzer.calculate_holding_period_returns()
+    assert set(result['horizon']) == {'1 Year', '3 Years', '5 Years'}
+    for (col, label), row in result.set_index(['index', 'horizon']).groupby(level=[0, 1]):
+        row = row.set_index('statistic')
+        np.testing.assert_allclose(row.loc['mean_return', 'estimate'], holding[label]['mean'][col])
+        np.testing.assert_allclose(row.loc['positive_pct', 'estimate'], holding[label]['positive_pct'][col])
+    # Replicate windows span the index's own trading days per calendar horizon
+    days = result.drop_duplicates(['index', 'horizon']).set_index(['index', 'horizon'])['days']
+    assert abs(days['A', '1 Year'] - 261 * 0.95) < 5 and abs(days['B', '1 Year'] - 261) <= 1
+
+
+def test_seeded_results_independent_of_workers():
+    data = _panel()
+    serial = bootstrap_holding_periods(data, {'1 Year': 252}, n_replicates=60, block_length=20,
+                                       seed=7, n_jobs=1, chunk_size=25)
+    pooled = bootstrap_holding_periods(data, {'1 Year': 252}, n_replicates=60, block_length=20,
+                                       seed=7, n_jobs=2, chunk_size=25)
+    pd.testing.assert_frame_equal(serial, pooled)
+
+
+if __name__ == "__main__":
+    test_resampled_blocks_are_contiguous()
+    test_estimates_and_intervals()
+    test_calendar_horizons_match_holding_periods()
+    test_seeded_results_independent_of_workers()
+    print("PASS: block bootstrap")
@@ -0,0 +1,86 @@
+import importlib.util
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from build_cache import BuildCache
+from charts import render_charts, render_positive_return_probability
+
+
+def _frame(value=1.0):
+    return pd.DataFrame({'A': [1.0, value]}, index=pd.bdate_range('2020-01-01', periods=2))
+
+
+def test_keys_follow_content():
+    cache = BuildCache(manifest_file=None)
+    assert cache.key(_frame(), 'S&P 500 (US)', 10000) == cache.key(_frame(), 'S&P 500 (US)', 10000)
+    assert cache.key(_frame(), 'S&P 500 (US)', 10000) != cache.key(_frame(2.0), 'S&P 500 (US)', 10000)
+    assert cache.key(_frame(), 'S&P 500 (US)', 10000) != cache.key(_frame(), 'S&P 500 (US)', 20000)
+    assert cache.key(np.arange(3)) != cache.key(np.arange(3.0))
+
+
+def test_code_keys_cover_imported_modules():
+    with tempfile.TemporaryDirectory() as directory:
+        files = {'stage.py': 'def build():\n    from kernel import compute\n    return compute()\n',
+                 'kernel.py': 'import helper\n\ndef compute():\n    return helper.VALUE\n',
+                 'helper.py': 'import os\nVALUE = 1\n'}
+        for name, text in files.items():
+            with open(os.path.join(directory, name), 'w') as f:
+                f.write(text)
+        stage = os.path.join(directory, 'stage.py')
+        cache = BuildCache(manifest_file=None)
+        # Lazy and indirect imports are followed; other modules (os) are not hashed
+        assert cache.source_files(stage) == sorted(os.path.join(directory, name) for name in files)
+        spec = importlib.util.spec_from_file_location('stage', stage)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        before = cache.key(module.build)
+        with open(os.path.join(directory, 'helper.py'), 'w') as f:
+            f.write('import os\nVALUE = 22\n')
+        assert cache.key(module.build) != before
+
+
+def test_stage_skips_until_inputs_or_outputs_change():
+    with tempfile.TemporaryDirectory() as directory:
+        manifest = os.path.join(directory, 'manifest.json')
+        output = os.path.join(directory, 'out.csv')
+        builds = []
+
+        def build():
+            builds.append(1)
+            _frame().to_csv(output)
+            return output
+
+        key = BuildCache(manifest).key(_frame(), 10000)
+        assert BuildCache(manifest).run('stage', key, build)[0]
+        assert not BuildCache(manifest).run('stage', key, build)[0]
+        assert BuildCache(manifest).run('stage', BuildCache(manifest).key(_frame(), 20000), build)[0]
+        assert BuildCache(manifest, force=['stage']).run('stage', key, build)[0]
+        os.remove(output)
+        assert BuildCache(manifest).run('stage', key, build)[0]
+        assert not BuildCache(manifest).run('stage', key, build)[0]
+        assert len(builds) == 4
+
+
+def test_render_stage_skips_current_charts():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = BuildCache(os.path.join(directory, 'manifest.json'))
+        job = ('probability', render_positive_return_probability,
+               {'periods': [1, 2, 3], 'prob_data': {'A': [60.0, 70.0, 80.0]},
+                'output_file': os.path.join(directory, 'probability.png')})
+        first = render_charts([job], parallel=False, cache=cache)
+        second = render_charts([job], parallel=False, cache=BuildCache(cache.manifest_file))
+        assert list(first['status']) == ['built'] and list(second['status']) == ['skipped']
+        changed = (job[0], job[1], dict(job[2], prob_data={'A': [60.0, 70.0, 90.0]}))
+        third = render_charts([changed], parallel=False, cache=BuildCache(cache.manifest_file))
+        assert list(third['status']) == ['built']
+
+
+if __name__ == "__main__":
+    test_keys_follow_content()
+    test_code_keys_cover_imported_modules()
+    test_stage_skips_until_inputs_or_outputs_change()
+    test_render_stage_skips_current_charts()
+    print("PASS: build cache")
@@ -0,0 +1,57 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from market_analysis import MarketIndexAnalyzer
+
+
+def _analyzer():
+    rng = np.random.default_rng(13)
+    dates = pd.bdate_range(start='1995-01-02', periods=252 * 22)
+    data = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, (len(dates), 3)), axis=0)),
+                        index=dates, columns=['A', 'B', 'C'])
+    data.iloc[:500, 2] = np.nan
+    analyzer = MarketIndexAnalyzer()
+    analyzer.data = data
+    return analyzer
+
+
+def _render_in(directory, parallel):
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        return _analyzer().render_charts(parallel=parallel, max_workers=2)
+    finally:
+        os.chdir(cwd)
+
+
+def test_jobs_carry_precomputed_arrays():
+    for name, render, kwargs in _analyzer().chart_jobs():
+        assert callable(render) and render.__module__ == 'charts'
+        assert not any(isinstance(value, MarketIndexAnalyzer) for value in kwargs.values())
+
+
+def test_parallel_stage_writes_every_chart():
+    with tempfile.TemporaryDirectory() as directory:
+        timings = _render_in(directory, parallel=True)
+        assert list(timings.columns) == ['chart', 'output', 'seconds', 'status']
+        assert timings['output'].notna().all()
+        assert (timings['seconds'] > 0).all()
+        for output in timings['output']:
+            assert os.path.getsize(os.path.join(directory, output)) > 0
+
+
+def test_sequential_stage_matches_outputs():
+    with tempfile.TemporaryDirectory() as parallel_dir, tempfile.TemporaryDirectory() as serial_dir:
+        parallel = _render_in(parallel_dir, parallel=True)
+        serial = _render_in(serial_dir, parallel=False)
+        assert list(parallel['output']) == list(serial['output'])
+
+
+if __name__ == "__main__":
+    test_jobs_carry_precomputed_arrays()
+    test_parallel_stage_writes_every_chart()
+    test_sequential_stage_matches_outputs()
+    print("PASS: chart rendering stage")
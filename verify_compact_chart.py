@@ -0,0 +1,81 @@
+import base64
+import json
+import os
+import re
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from charts import render_normalized_performance
+
+
+def _series():
+    rng = np.random.default_rng(15)
+    dates = pd.bdate_range(start='1990-01-02', periods=9000)
+    values = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, (9000, 2)), axis=0))
+    return [('A', dates.values, values[:, 0]), ('B', dates.values[3000:], values[3000:, 1])]
+
+
+def _payload(path):
+    html = open(path, encoding='utf-8').read()
+    return json.loads(re.search(r'id="chart-data">(.*?)</script>', html, re.S).group(1).replace('<\\/', '</'))
+
+
+def _decode(level, spec):
+    offsets = np.frombuffer(base64.b64decode(level['x']), dtype='<' + spec['x_dtype'])
+    x = offsets.astype(np.int64) * spec['unit'] + spec['x0']
+    return x.astype('datetime64[ms]'), np.frombuffer(base64.b64decode(level['y']), dtype='<f4')
+
+
+def test_levels_round_trip():
+    series = _series()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'chart.html')
+        render_normalized_performance(series, output_file=path, mode='webgl', plotlyjs='directory')
+        assert os.path.exists(os.path.join(directory, 'plotly.min.js'))
+        assert '<script src="plotly.min.js"></script>' in open(path, encoding='utf-8').read()
+        spec = _payload(path)
+
+    assert [t['name'] for t in spec['traces']] == ['A', 'B']
+    for trace, (_, dates, values) in zip(spec['traces'], series):
+        coarse_x, coarse_y = _decode(trace['levels'][0], spec)
+        full_x, full_y = _decode(trace['levels'][-1], spec)
+        assert len(trace['levels']) >= 2 and len(coarse_y) <= 2 * 1000 + 2
+        np.testing.assert_array_equal(full_x, dates.astype('datetime64[ms]'))
+        np.testing.assert_allclose(full_y, values, rtol=1e-6)
+        # The coarse view keeps the extremes of the series
+        np.testing.assert_allclose([coarse_y.min(), coarse_y.max()], [values.min(), values.max()], rtol=1e-6)
+
+
+def test_long_intraday_span_does_not_wrap():
+    # Non-daily timestamps over a century: second offsets exceed int32
+    dates = pd.to_datetime(['1900-01-01 09:30', '1960-06-01 12:00', '2020-01-01 16:00']).values
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'chart.html')
+        render_normalized_performance([('A', dates, np.array([1.0, 2.0, 3.0]))], output_file=path, mode='webgl',
+                                      plotlyjs='directory')
+        spec = _payload(path)
+    assert spec['unit'] == 1000 and spec['x_dtype'] == 'f8'
+    x, _ = _decode(spec['traces'][0]['levels'][-1], spec)
+    np.testing.assert_array_equal(x, dates.astype('datetime64[ms]'))
+
+
+def test_webgl_file_is_smaller_than_standard():
+    series = _series()
+    with tempfile.TemporaryDirectory() as directory:
+        standard = os.path.join(directory, 'standard.html')
+        webgl = os.path.join(directory, 'webgl.html')
+        render_normalized_performance(series, output_file=standard)
+        render_normalized_performance(series, output_file=webgl, mode='webgl', plotlyjs='directory')
+        assert os.path.getsize(webgl) * 3 < os.path.getsize(standard)
+        # Only the compact chart carries the load timer
+        assert 'Chart ready' not in open(standard, encoding='utf-8').read()
+        assert 'Chart ready' in open(webgl, encoding='utf-8').read()
+
+
+if __name__ == "__main__":
+    test_levels_round_trip()
+    test_long_intraday_span_does_not_wrap()
+    test_webgl_file_is_smaller_than_standard()
+    print("PASS: compact interactive chart")
@@ -0,0 +1,157 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from market_analysis import MarketIndexAnalyzer
+from data_sources import extract_closes, fetch_concurrently
+
+LATENCY = 0.1
+
+
+class FakeSource:
+    """Local stand-in for a data provider with fixed per-request latency"""
+
+    def __init__(self, failing=(), latency=None):
+        self.failing = set(failing)
+        self.latency = latency or {}
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def __call__(self, ticker, start, end):
+        started = time.perf_counter()
+        time.sleep(self.latency.get(ticker, LATENCY))
+        with self.lock:
+            self.calls.append((ticker, started, time.perf_counter()))
+        if ticker in self.failing:
+            raise ConnectionError(f"{ticker} unavailable")
+        dates = pd.bdate_range(start='2020-01-01', periods=20)
+        return pd.Series(np.linspace(100, 120, len(dates)), index=dates)
+
+
+def _analyzer(failing=(), concurrency=None, latency=None):
+    analyzer = MarketIndexAnalyzer()
+    source = FakeSource(failing, latency)
+    analyzer.sources = {'yahoo': source, 'akshare_china': source, 'akshare_us': source}
+    analyzer.batch_sources = {}
+    if concurrency is not None:
+        analyzer.source_concurrency = concurrency
+    return analyzer, source
+
+
+def _timed_fetch(analyzer):
+    start = time.perf_counter()
+    analyzer.fetch_data(use_local_if_available=False)
+    return time.perf_counter() - start
+
+
+def test_concurrent_fetch_is_faster():
+    sequential, _ = _analyzer(concurrency={'yahoo': 1, 'akshare_china': 1, 'akshare_us': 1})
+    # One shared fake provider, so a single source-wide lock is needed for a sequential baseline
+    lock = threading.Lock()
+    inner = sequential.sources['yahoo']
+
+    def serial_source(ticker, start, end):
+        with lock:
+            return inner(ticker, start, end)
+    sequential.sources = {name: serial_source for name in sequential.sources}
+
+    concurrent, _ = _analyzer()
+
+    t_seq = _timed_fetch(sequential)
+    t_par = _timed_fetch(concurrent)
+    print(f"Sequential: {t_seq:.2f}s  Concurrent: {t_par:.2f}s  Speedup: {t_seq / t_par:.1f}x")
+
+    pd.testing.assert_frame_equal(sequential.data, concurrent.data)
+    assert len(concurrent.data.columns) == 14
+    assert t_par * 3 < t_seq
+
+
+def test_fallback_starts_immediately():
+    # ^KLSE fails fast while every other download is slow
+    slow = {ticker: 3 * LATENCY for ticker in MarketIndexAnalyzer().yf_indices}
+    slow['^KLSE'] = 0.01
+    analyzer, source = _analyzer(failing={'^KLSE'}, latency=slow,
+                                 concurrency={'yahoo': 11, 'akshare_china': 3, 'akshare_us': 1})
+    analyzer.fetch_data(use_local_if_available=False)
+    assert 'FTSE Bursa Malaysia KLCI (MY)' in analyzer.data.columns
+
+    started = {ticker: t0 for ticker, t0, _ in source.calls}
+    first_primary_done = min(t1 for ticker, _, t1 in source.calls
+                             if ticker in analyzer.yf_indices and ticker != '^KLSE')
+    # The retry does not wait for the other primary downloads to finish
+    assert started['^FBMKLCI'] < first_primary_done
+
+
+def test_batched_yahoo_download():
+    analyzer, source = _analyzer()
+    batch_calls = []
+
+    def fake_batch(tickers, start, end):
+        batch_calls.append(list(tickers))
+        dates = pd.bdate_range(start='2020-01-01', periods=20)
+        columns = pd.MultiIndex.from_product([['Close', 'Open'], tickers])
+        frame = pd.DataFrame(np.ones((len(dates), len(columns))), index=dates, columns=columns)
+        frame[('Close', '^KLSE')] = np.nan  # symbol that came back empty
+        closes = extract_closes(frame, tickers)
+        return {ticker: closes[ticker].dropna() for ticker in tickers}
+
+    analyzer.batch_sources = {'yahoo': fake_batch}
+    analyzer.fetch_data(use_local_if_available=False)
+
+    assert len(batch_calls) == 1 and len(batch_calls[0]) == len(analyzer.yf_indices)
+    yahoo_singles = [ticker for ticker, _, _ in source.calls if ticker.startswith('^')]
+    assert yahoo_singles == ['^KLSE']
+    assert len(analyzer.data.columns) == 14
+
+
+def test_incremental_update_falls_back_on_empty():
+    calls = []
+
+    def source(ticker, start, end):
+        calls.append(ticker)
+        # The primary comes back empty without raising, as a failed yfinance download does
+        if ticker == '^KLSE':
+            return pd.Series(dtype=float)
+        return pd.Series([100.0], index=[pd.Timestamp('2020-02-03')])
+
+    def empty_batch(tickers, start, end):
+        return {ticker: pd.Series(dtype=float) for ticker in tickers}
+
+    chains = {'KLCI': [('yahoo', '^KLSE'), ('yahoo', '^FBMKLCI')], 'Quiet': [('yahoo', '^Q'), ('akshare', 'q')]}
+    for batch_sources in ({}, {'yahoo': empty_batch}):
+        calls.clear()
+        sources = {'yahoo': source, 'akshare': lambda ticker, start, end: pd.Series(dtype=float)}
+        results = fetch_concurrently(chains, sources, {'KLCI': '2020-02-01', 'Quiet': '2020-02-01'}, '2020-02-05',
+                                     incremental={'KLCI', 'Quiet'}, batch_sources=batch_sources)
+        assert calls.count('^FBMKLCI') == 1 and list(results) == ['KLCI', 'Quiet']
+        assert results['Quiet'].tolist() == [100.0]
+
+    # Every source empty without an error: no new rows, nothing returned
+    results = fetch_concurrently({'Quiet': [('akshare', 'q')]}, sources, {'Quiet': '2020-02-01'}, '2020-02-05',
+                                 incremental={'Quiet'})
+    assert results == {}
+
+
+def test_extract_closes_layouts():
+    dates = pd.bdate_range(start='2020-01-01', periods=3)
+    by_field = pd.DataFrame(np.arange(12.0).reshape(3, 4), index=dates,
+                            columns=pd.MultiIndex.from_product([['Close', 'Open'], ['^A', '^B']]))
+    by_ticker = by_field.swaplevel(axis=1)
+    single = pd.DataFrame({'Close': [1.0, 2.0, 3.0], 'Open': [0.0, 0.0, 0.0]}, index=dates)
+
+    for frame in (by_field, by_ticker):
+        closes = extract_closes(frame, ['^B', '^A'])
+        assert list(closes.columns) == ['^B', '^A']
+        assert closes['^A'].tolist() == [0.0, 4.0, 8.0]
+    assert extract_closes(single, ['^C'])['^C'].tolist() == [1.0, 2.0, 3.0]
+
+
+if __name__ == "__main__":
+    test_concurrent_fetch_is_faster()
+    test_fallback_starts_immediately()
+    test_batched_yahoo_download()
+    test_incremental_update_falls_back_on_empty()
+    test_extract_closes_layouts()
+    print("PASS: concurrent fetch")
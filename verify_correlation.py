@@ -0,0 +1,76 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from correlation import pairwise_correlation, cluster_order
+from charts import render_correlation_heatmap
+from market_analysis import MarketIndexAnalyzer
+
+
+def _returns():
+    rng = np.random.default_rng(21)
+    values = rng.normal(size=(600, 30))
+    values[:, 1] = values[:, 0] + 0.2 * values[:, 1]
+    values[rng.random(values.shape) < 0.1] = np.nan
+    values[:400, 5] = np.nan      # late listing
+    values[:, 7] = np.nan         # no data
+    values[:599, 8] = np.nan      # a single value
+    values[:, 9] = 0.01           # constant
+    return pd.DataFrame(values, columns=[f'S{i}' for i in range(30)])
+
+
+def test_matches_pandas_pairwise_complete():
+    returns = _returns()
+    expected = returns.corr(min_periods=2)
+    for dtype, block_size, row_chunk, tolerance in [(np.float64, 7, 64, 1e-12), (np.float64, 512, 4096, 1e-12),
+                                                    (np.float32, 8, 128, 1e-5)]:
+        result = pairwise_correlation(returns, block_size=block_size, row_chunk=row_chunk, dtype=dtype)
+        assert list(result.columns) == list(returns.columns)
+        assert (result.isna() == expected.isna()).all().all()
+        assert np.nanmax(np.abs(result.to_numpy() - expected.to_numpy())) < tolerance
+    limited = pairwise_correlation(returns.to_numpy(), min_periods=250)
+    assert np.isnan(limited[5, 6]) and not np.isnan(limited[0, 1])
+
+
+def test_cluster_order_groups_correlated_series():
+    rng = np.random.default_rng(3)
+    groups = rng.permutation(np.repeat(np.arange(4), 10))
+    factors = rng.normal(size=(400, 4))
+    returns = factors[:, groups] + rng.normal(size=(400, 40))
+    order = cluster_order(np.corrcoef(returns.T))
+    assert sorted(order) == list(range(40))
+    # Each group is contiguous in the new order
+    assert (np.diff(groups[order]) != 0).sum() == 3
+
+
+def test_analyzer_uses_full_histories_and_large_heatmap():
+    rng = np.random.default_rng(4)
+    dates = pd.bdate_range('2000-01-03', periods=1500)
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (1500, 40)), axis=0)),
+                          index=dates, columns=[f'I{i}' for i in range(40)])
+    prices.iloc[:1200, 3] = np.nan
+    analyzer = MarketIndexAnalyzer()
+    analyzer.data = prices
+    corr = analyzer.calculate_correlation_matrix()
+    daily = prices.pct_change(fill_method=None)
+    # A pair without the late listing is measured over its whole history, not from row 1200
+    assert abs(corr.loc['I0', 'I1'] - daily['I0'].corr(daily['I1'])) < 1e-12
+
+    name, render, kwargs = analyzer._correlation_heatmap_job()
+    assert kwargs['ordered'] and kwargs['matrix'].dtype == np.float32
+    assert sorted(kwargs['labels']) == sorted(prices.columns)
+    with tempfile.TemporaryDirectory() as directory:
+        output = render(**dict(kwargs, output_file=os.path.join(directory, 'heatmap.png')))
+        assert os.path.getsize(output) > 0
+        small = render_correlation_heatmap(['a', 'b'], np.array([[1.0, 0.5], [0.5, 1.0]]),
+                                           os.path.join(directory, 'small.png'))
+        assert os.path.getsize(small) > 0
+
+
+if __name__ == "__main__":
+    test_matches_pandas_pairwise_complete()
+    test_cluster_order_groups_correlated_series()
+    test_analyzer_uses_full_histories_and_large_heatmap()
+    print("PASS: correlation engine")
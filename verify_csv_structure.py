@@ -1,7 +1,9 @@
 import pandas as pd
 import numpy as np
 from market_analysis import MarketIndexAnalyzer
+from price_store import store_path_for
 import os
+import shutil
 
 def test_save_data_to_csv():
     # Setup dummy data
@@ -48,6 +50,8 @@ def test_save_data_to_csv():
     # Cleanup
     if os.path.exists('market_indices_data.csv'):
         os.remove('market_indices_data.csv')
+    # The dummy store would otherwise be loaded in place of real data
+    shutil.rmtree(store_path_for('market_indices_data.csv'), ignore_errors=True)
 
 if __name__ == "__main__":
     test_save_data_to_csv()
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from market_analysis import MarketIndexAnalyzer
+
+
+def _analyzer():
+    analyzer = MarketIndexAnalyzer()
+    dates = pd.bdate_range(start='2000-01-03', periods=600)
+    rng = np.random.default_rng(3)
+    analyzer.data = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (600, 3)), axis=0)),
+                                 index=dates, columns=['A', 'B', 'C'])
+    return analyzer
+
+
+def test_returns_computed_once_per_data_version():
+    analyzer = _analyzer()
+    first, _ = analyzer.calculate_returns()
+    second, _ = analyzer.calculate_returns()
+    assert first is second
+    assert analyzer.cache_misses['returns'] == 1
+    assert analyzer.cache_hits['returns'] == 1
+
+    analyzer.generate_summary_statistics()
+    analyzer.generate_summary_statistics()
+    assert analyzer.cache_misses['summary_kernel'] == 1
+
+    # Replacing the data invalidates every derived series
+    analyzer.data = analyzer.data.iloc[:300]
+    third, _ = analyzer.calculate_returns()
+    assert len(third) == 299
+    assert analyzer.cache_misses['returns'] == 2
+
+
+def test_date_range_is_part_of_the_key():
+    analyzer = _analyzer()
+    analyzer.calculate_normalized()
+    analyzer.start_date = '2001-01-01'
+    analyzer.calculate_normalized()
+    assert analyzer.cache_misses['normalized'] == 2
+
+
+def test_rolling_summary_shared_across_labels():
+    analyzer = _analyzer()
+    by_label = analyzer.rolling_return_summary({'1 Year': 252}, bins=50)
+    by_years = analyzer.rolling_return_summary({1: 252}, bins=50)
+    assert by_label['1 Year']['mean'] is by_years[1]['mean']
+    assert by_label['1 Year']['hist_counts'] is by_years[1]['hist_counts']
+    assert analyzer.cache_misses['rolling_summary'] == 1 and analyzer.cache_misses['rolling_histogram'] == 1
+
+
+def test_rolling_summary_shared_per_horizon():
+    analyzer = _analyzer()
+    holding = analyzer.rolling_return_summary({years: 252 * years for years in (1, 3)}, bins=50)
+    probability = analyzer.rolling_return_summary({years: 252 * years for years in (1, 2, 3)})
+    # Horizons the two sets share come from the cache, statistics without histograms included
+    assert probability[3]['mean'] is holding[3]['mean'] and 'hist_counts' not in probability[3]
+    assert analyzer.cache_misses['rolling_summary'] == 3 and analyzer.cache_misses['rolling_histogram'] == 2
+    calendar = analyzer.rolling_return_summary({'1y': '1 year', '2y': '2 years'}, bins=50)
+    assert analyzer.rolling_return_summary({'1y': '12 months'})['1y']['count'] is calendar['1y']['count']
+    assert analyzer.cache_misses['horizon_summary'] == 2
+
+
+if __name__ == "__main__":
+    test_returns_computed_once_per_data_version()
+    test_date_range_is_part_of_the_key()
+    test_rolling_summary_shared_across_labels()
+    test_rolling_summary_shared_per_horizon()
+    print("PASS: derived series cache")
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from downsample import downsample, minmax_indices, lttb_indices
+
+
+def _series(n=20000, seed=3):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start='1950-01-02', periods=n).values
+    return dates, 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, n)))
+
+
+def test_minmax_keeps_every_bucket_extreme():
+    dates, values = _series()
+    keep = minmax_indices(dates, values, 500)
+    assert len(keep) <= 2 * 500 + 2
+    assert np.all(np.diff(keep) > 0) and keep[0] == 0 and keep[-1] == len(values) - 1
+
+    x = dates.astype(np.int64).astype(float)
+    bucket = np.clip(((x - x[0]) / (x[-1] - x[0]) * 500).astype(int), 0, 499)
+    kept = pd.Series(values[keep]).groupby(bucket[keep])
+    full = pd.Series(values).groupby(bucket)
+    pd.testing.assert_series_equal(kept.max(), full.max())
+    pd.testing.assert_series_equal(kept.min(), full.min())
+
+
+def test_lttb_size_and_order():
+    dates, values = _series()
+    keep = lttb_indices(dates, values, 800)
+    assert len(keep) == 800
+    assert np.all(np.diff(keep) > 0) and keep[0] == 0 and keep[-1] == len(values) - 1
+    # The largest spike of a flat series is always chosen
+    flat = np.ones(5000)
+    flat[1234] = 10.0
+    assert 1234 in lttb_indices(np.arange(5000), flat, 100)
+
+
+def test_switch_and_short_series():
+    dates, values = _series(300)
+    x, y = downsample(dates, values, 2400)
+    assert len(y) == 300
+    x, y = downsample(dates, values, 50, method=None)
+    assert y is values
+    x, y = downsample(dates, values, 50, method='lttb', log_scale=True)
+    assert len(y) == 50 and set(y) <= set(values)
+
+
+if __name__ == "__main__":
+    test_minmax_keeps_every_bucket_extreme()
+    test_lttb_size_and_order()
+    test_switch_and_short_series()
+    print("PASS: line downsampling")
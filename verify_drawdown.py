@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from drawdown import max_drawdowns, drawdown_episodes
+
+
+def test_max_drawdown_matches_expanding_max():
+    rng = np.random.default_rng(11)
+    dates = pd.bdate_range(start='2000-01-03', periods=500)
+    data = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.015, (500, 3)), axis=0)),
+                        index=dates, columns=['A', 'B', 'C'])
+    data.iloc[:100, 1] = np.nan
+    data.iloc[rng.random(500) < 0.1, 2] = np.nan
+    data['D'] = np.nan
+
+    result = max_drawdowns(data)
+    for col in ['A', 'B', 'C']:
+        series = data[col].dropna()
+        np.testing.assert_allclose(result[col], ((series - series.expanding().max()) / series.expanding().max()).min())
+    assert np.isnan(result['D'])
+
+
+def test_episode_dates():
+    dates = pd.bdate_range(start='2020-01-01', periods=12)
+    prices = [100, 110, 99, 88, 95, 110, 120, np.nan, 90, 100, 108, 115]
+    data = pd.DataFrame({'A': prices}, index=dates)
+
+    episodes = drawdown_episodes(data, top_n=5)
+    assert list(episodes['rank']) == [1, 2]
+
+    deepest = episodes.iloc[0]
+    assert deepest['peak_date'] == dates[6]      # 120
+    assert deepest['trough_date'] == dates[8]    # 90, across the NaN holiday
+    assert pd.isna(deepest['recovery_date']) and not deepest['recovered']
+    np.testing.assert_allclose(deepest['drawdown'], 90 / 120 - 1)
+
+    second = episodes.iloc[1]
+    assert (second['peak_date'], second['trough_date'], second['recovery_date']) == (dates[1], dates[3], dates[5])
+    assert second['duration_days'] == 4 and second['decline_days'] == 2
+
+
+if __name__ == "__main__":
+    test_max_drawdown_matches_expanding_max()
+    test_episode_dates()
+    print("PASS: drawdown analytics")
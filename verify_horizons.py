@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from horizons import HorizonIndex, horizon_return_summary, parse_horizon
+from synthetic_data import generate_panel
+from market_analysis import MarketIndexAnalyzer
+
+
+def _panel():
+    data = generate_panel(n_series=12, years=8, seed=24, late_listing=0.5, delisting=0.2)
+    data['Empty'] = np.nan
+    return data
+
+
+def _expected_returns(series, offset):
+    """Brute force: each date's return from the last price on or before date - offset"""
+    series = series.dropna()
+    returns = {}
+    for date, price in series.items():
+        earlier = series[:date - offset]
+        if date - offset >= series.index[0]:
+            returns[date] = price / earlier.iloc[-1] - 1
+    return pd.Series(returns, dtype=float)
+
+
+def test_parse_and_shift():
+    assert parse_horizon('5 years') == (60, 0) and parse_horizon('18M') == (18, 0)
+    assert parse_horizon('6 weeks') == (0, 42) and parse_horizon('90d') == (0, 90)
+    assert parse_horizon('1.5 years') == (18, 0)
+    with pytest.raises(ValueError):
+        parse_horizon('252')
+    dates = pd.to_datetime(['1985-12-31', '2019-02-28', '2020-03-31', '2021-01-15', '2024-02-29', '2024-05-31'])
+    index = HorizonIndex.from_frame(pd.DataFrame({'A': np.arange(1.0, 7.0)}, index=dates))
+    for horizon, offset in (('1 month', pd.DateOffset(months=1)), ('18 months', pd.DateOffset(months=18)),
+                            ('5 years', pd.DateOffset(years=5)), ('6 weeks', pd.DateOffset(days=42))):
+        shifted = pd.to_datetime(index.table_dates(horizon).astype('M8[D]'))
+        assert (shifted == pd.DatetimeIndex([d - offset for d in dates])).all()
+
+
+def test_matches_brute_force():
+    data = _panel()
+    index = HorizonIndex.from_frame(data)
+    horizons = {'18m': '18 months', '3y': '3 years'}
+    summary = horizon_return_summary(index, horizons, bins=20)
+    for label, offset in (('18m', pd.DateOffset(months=18)), ('3y', pd.DateOffset(years=3))):
+        rolling = index.rolling_returns(horizons[label])
+        for i, column in enumerate(data.columns):
+            expected = _expected_returns(data[column], offset)
+            assert list(rolling[column].dropna().index) == list(expected.index)
+            np.testing.assert_allclose(rolling[column].dropna().values, expected.values, rtol=1e-12)
+            stats = summary[label]
+            assert stats['count'][column] == len(expected)
+            for name, value in (('mean', expected.mean()), ('std', expected.std()), ('min', expected.min()),
+                                ('max', expected.max()), ('positive_pct', (expected > 0).mean() * 100)):
+                np.testing.assert_allclose(stats[name][column], value, rtol=1e-9, equal_nan=True)
+            if len(expected):
+                counts, edges = np.histogram(expected, bins=20)
+                np.testing.assert_allclose(stats['hist_edges'][i], edges)
+                assert np.abs(stats['hist_counts'][i] - counts).sum() <= 2
+    assert summary['3y']['count']['Empty'] == 0
+
+
+def test_analyzer_calendar_horizons():
+    analyzer = MarketIndexAnalyzer()
+    analyzer.data = _panel()
+    results = analyzer.calculate_holding_period_returns()
+    expected = _expected_returns(analyzer.data.iloc[:, 0], pd.DateOffset(years=5))
+    np.testing.assert_allclose(results['5 Years']['mean'].iloc[0], expected.mean() * 100)
+    # Calendar and row horizons side by side; labels share the memoized summaries
+    mixed = analyzer.rolling_return_summary({'5y': '5 years', 'rows': 252, 'months': '60 months'}, bins=50)
+    assert mixed['5y'] is mixed['months'] and 'count' in mixed['rows']
+    rolling = analyzer.calculate_rolling_returns(horizon='18 months')
+    assert rolling.shape == analyzer.data.shape
+    assert analyzer.calculate_rolling_returns(years=1).equals(analyzer.calculate_rolling_returns(horizon='12 months'))
+    assert analyzer.cache_misses['horizon_index'] == 1
+
+
+if __name__ == "__main__":
+    test_parse_and_shift()
+    test_matches_brute_force()
+    test_analyzer_calendar_horizons()
+    print("PASS: calendar horizons")
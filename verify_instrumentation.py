@@ -0,0 +1,119 @@
+import json
+import os
+import pstats
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from build_cache import BuildCache
+from instrumentation import RunRecorder, active_recorder, instrumented
+from market_analysis import MarketIndexAnalyzer
+from ragged import RaggedPanel
+
+
+def _analyzer():
+    rng = np.random.default_rng(20)
+    dates = pd.bdate_range(start='2000-01-03', periods=252 * 4)
+    analyzer = MarketIndexAnalyzer()
+    analyzer.data = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, (len(dates), 3)), axis=0)),
+                                 index=dates, columns=['A', 'B', 'C'])
+    return analyzer
+
+
+def test_inactive_by_default():
+    os.environ.pop('MARKET_RUN_REPORT', None)
+    assert RunRecorder.from_env() is None and active_recorder() is None
+    assert _analyzer().generate_summary_statistics().shape[0] == 3
+
+
+def test_stage_report_and_profile():
+    analyzer = _analyzer()
+    with tempfile.TemporaryDirectory() as directory:
+        report_file = os.path.join(directory, 'run_report.json')
+        profile_file = os.path.join(directory, 'summary.prof')
+        with RunRecorder(report_file, profile_stage='generate_summary_statistics', profile_file=profile_file):
+            analyzer.generate_summary_statistics()
+            analyzer.calculate_holding_period_returns()
+        assert active_recorder() is None
+        with open(report_file) as f:
+            report = json.load(f)
+        assert pstats.Stats(profile_file).total_calls > 0
+
+    stages = {stage['stage']: stage for stage in report['stages']}
+    assert set(stages) == {'generate_summary_statistics', 'calculate_holding_period_returns'}
+    summary = stages['generate_summary_statistics']
+    assert summary['depth'] == 0 and summary['status'] == 'ok'
+    assert summary['input']['data']['rows'] == 1008 and summary['output']['rows'] == 3
+    assert summary['wall_seconds'] > 0 and summary['cpu_seconds'] >= 0 and summary['peak_mb'] > 0
+    assert report['profile']['stage'] == 'generate_summary_statistics'
+
+
+def test_recording_keeps_ragged_panel():
+    frame = _analyzer().data
+    analyzer = MarketIndexAnalyzer()
+    analyzer.panel = RaggedPanel.from_frame(frame)
+    with tempfile.TemporaryDirectory() as directory:
+        report_file = os.path.join(directory, 'run_report.json')
+        with RunRecorder(report_file, memory='off'):
+            analyzer.generate_summary_statistics()
+        with open(report_file) as f:
+            report = json.load(f)
+    # Sizing the input must not build the aligned frame
+    assert analyzer._data is None
+    size = report['stages'][0]['input']['data']
+    assert size['rows'] == len(frame) and size['columns'] == 3 and size['values'] == frame.size
+
+
+def test_nested_stage_peaks():
+    @instrumented
+    def inner():
+        return np.ones(2_000_000)
+
+    @instrumented
+    def outer():
+        inner()
+        return pd.DataFrame({'x': np.arange(10)})
+
+    with RunRecorder(report_file=None) as recorder:
+        outer()
+    first, second = recorder.stages
+    assert (first['stage'], first['parent'], first['depth']) == ('inner', 'outer', 1)
+    assert second['stage'] == 'outer' and second['output']['rows'] == 10
+    # The outer stage's peak includes the 16 MB array allocated by the inner one
+    assert first['peak_mb'] >= 15 and second['peak_mb'] >= 15
+
+
+def test_failed_stage_is_recorded():
+    @instrumented(name='broken')
+    def broken():
+        raise ValueError('bad input')
+
+    recorder = RunRecorder(report_file=None, memory='rss').start()
+    try:
+        broken()
+    except ValueError:
+        pass
+    report = recorder.finish()
+    assert report['stages'][0]['status'] == 'ValueError: bad input'
+    assert 'max_rss_mb' in report['stages'][0]
+
+
+def test_build_cache_hashes_wrapped_source():
+    # Decorated stages are keyed on their own module's source, not the decorator's
+    import market_analysis
+    cache = BuildCache(manifest_file=None)
+    cache.key(MarketIndexAnalyzer.generate_summary_statistics)
+    assert os.path.abspath(market_analysis.__file__) in cache.manifest['files']
+    assert (cache.key(MarketIndexAnalyzer.generate_summary_statistics)
+            == cache.key(MarketIndexAnalyzer.generate_summary_statistics.__wrapped__))
+
+
+if __name__ == "__main__":
+    test_inactive_by_default()
+    test_stage_report_and_profile()
+    test_recording_keeps_ragged_panel()
+    test_nested_stage_peaks()
+    test_failed_stage_is_recorded()
+    test_build_cache_hashes_wrapped_source()
+    print("PASS: run instrumentation")
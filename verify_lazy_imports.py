@@ -0,0 +1,23 @@
+import json
+import subprocess
+import sys
+
+CHECK = """
+import json, sys
+import pandas as pd
+import market_analysis, market_timing_cost
+analyzer = market_analysis.MarketIndexAnalyzer()
+analyzer.data = pd.DataFrame({'A': [1.0, 1.1, 1.2]}, index=pd.bdate_range('2020-01-01', periods=3))
+analyzer.generate_summary_statistics()
+print(json.dumps(sorted(m for m in ('matplotlib', 'seaborn', 'plotly') if m in sys.modules)))
+"""
+
+
+def test_stats_only_path_skips_plotting_libraries():
+    result = subprocess.run([sys.executable, '-c', CHECK], capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
+
+
+if __name__ == "__main__":
+    test_stats_only_path_skips_plotting_libraries()
+    print("PASS: lazy plotting imports")
@@ -0,0 +1,153 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from price_store import (store_path_for, write_price_store, read_price_store, read_price_store_ragged,
+                         iter_price_store, append_price_store, load_prices, price_store_is_current)
+from market_analysis import MarketIndexAnalyzer
+
+
+def _sample_panel(rows=50):
+    dates = pd.bdate_range(start='2020-01-01', periods=rows)
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({
+        'S&P 500 (US)': 100 * np.cumprod(1 + rng.normal(0, 0.01, rows)),
+        'CSI 300 (CN)': 100 * np.cumprod(1 + rng.normal(0, 0.01, rows)),
+    }, index=dates)
+    data.iloc[:10, 1] = np.nan  # late-listed index
+    data.index.name = 'snapshot_date'
+    return data
+
+
+def test_round_trip_and_slicing():
+    data = _sample_panel()
+    with tempfile.TemporaryDirectory() as tmp:
+        store_dir = os.path.join(tmp, 'prices.store')
+        write_price_store(data, store_dir)
+
+        loaded = read_price_store(store_dir)
+        pd.testing.assert_frame_equal(loaded, data, check_freq=False)
+
+        sliced = read_price_store(store_dir, columns=['CSI 300 (CN)'], start='2020-01-10', end='2020-01-20')
+        expected = data.loc['2020-01-10':'2020-01-20', ['CSI 300 (CN)']]
+        pd.testing.assert_frame_equal(sliced, expected, check_freq=False)
+
+        # An end before the start selects nothing in every reader
+        assert read_price_store(store_dir, start='2020-01-20', end='2020-01-10').empty
+        assert read_price_store_ragged(store_dir, start='2020-01-20', end='2020-01-10').empty
+        assert list(iter_price_store(store_dir, start='2020-01-20', end='2020-01-10')) == []
+    print("PASS: price store round trip and column/date slicing")
+
+
+def test_append_only_new_rows():
+    data = _sample_panel()
+    with tempfile.TemporaryDirectory() as tmp:
+        store_dir = os.path.join(tmp, 'prices.store')
+        write_price_store(data.iloc[:40], store_dir)
+
+        appended = append_price_store(data.iloc[40:, :1], store_dir)
+        assert appended == 10
+
+        loaded = read_price_store(store_dir)
+        expected = data.copy()
+        expected.iloc[40:, 1] = np.nan  # column missing from the appended rows
+        pd.testing.assert_frame_equal(loaded, expected, check_freq=False)
+
+        try:
+            append_price_store(data.iloc[45:], store_dir)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Appending stale rows should fail")
+    print("PASS: append writes only new rows")
+
+
+def test_csv_fallback_when_store_missing():
+    data = _sample_panel()
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_file = os.path.join(tmp, 'prices.csv')
+        data.to_csv(csv_file)
+        assert not os.path.exists(store_path_for(csv_file))
+        loaded = load_prices(csv_file, columns=['S&P 500 (US)'])
+        np.testing.assert_allclose(loaded['S&P 500 (US)'].values, data['S&P 500 (US)'].values)
+    print("PASS: CSV fallback")
+
+
+def test_date_window_load_is_not_saved_back():
+    data = _sample_panel()
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_file = os.path.join(tmp, 'prices.csv')
+        data.to_csv(csv_file)
+        analyzer = MarketIndexAnalyzer()
+        analyzer.start_date, analyzer.end_date = '2020-01-10', '2020-01-20'
+        analyzer.fetch_data(csv_file=csv_file)
+        assert analyzer.data_source == 'local'
+        assert len(analyzer.data) == len(data.loc['2020-01-10':'2020-01-20'])
+        # The stored history stays whole for the next run
+        assert len(pd.read_csv(csv_file, index_col=0)) == len(data)
+        assert len(read_price_store(store_path_for(csv_file))) == len(data)
+    print("PASS: date-window load leaves stored history intact")
+
+
+def test_store_needs_its_csv_and_migrates_names():
+    data = _sample_panel().rename(columns={'S&P 500 (US)': 'S&P 500'})
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_file = os.path.join(tmp, 'prices.csv')
+        # A store left behind without its CSV is not loaded
+        write_price_store(data, store_path_for(csv_file))
+        assert not price_store_is_current(store_path_for(csv_file), csv_file)
+        assert MarketIndexAnalyzer()._load_local(csv_file) is None
+
+        # A store written before the rename gets the new names, on both load paths
+        data.to_csv(csv_file)
+        write_price_store(data, store_path_for(csv_file))
+        analyzer = MarketIndexAnalyzer()
+        analyzer.start_date, analyzer.end_date = '2020-01-01', '2030-01-01'
+        loaded = analyzer.fetch_data(csv_file=csv_file, columns=['S&P 500 (US)', 'CSI 300 (CN)'])
+        assert list(loaded.columns) == ['S&P 500 (US)', 'CSI 300 (CN)']
+        panel = analyzer.fetch_data(csv_file=csv_file, columns=['S&P 500 (US)'], ragged=True)
+        assert list(panel.columns) == ['S&P 500 (US)']
+    np.testing.assert_allclose(loaded['S&P 500 (US)'].values, data['S&P 500'].values)
+    print("PASS: stale store ignored, old names migrated")
+
+
+def test_update_data_appends_new_rows():
+    data = _sample_panel()
+    requests = {}
+
+    def fake_source(ticker, start, end):
+        # Repeats the stored boundary day, as real sources may
+        requests[ticker] = start
+        return data[ticker].loc[pd.Timestamp(start) - pd.Timedelta(days=3):end].dropna()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_file = os.path.join(tmp, 'prices.csv')
+        data.iloc[:40].to_csv(csv_file)
+        analyzer = MarketIndexAnalyzer()
+        analyzer.yf_indices = {name: name for name in data.columns}
+        analyzer.yf_fallbacks, analyzer.akshare_us_indices, analyzer.akshare_china_indices = {}, {}, {}
+        analyzer.sources, analyzer.batch_sources = {'yahoo': fake_source}, {}
+        analyzer.response_cache = None
+        analyzer.end_date = data.index[-1].strftime('%Y-%m-%d')
+        analyzer.update_data(csv_file)
+
+        # Only the rows after each index's high-water mark were requested
+        expected_start = (data.index[39] + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+        assert requests == {name: expected_start for name in data.columns}
+        stored = read_price_store(store_path_for(csv_file))
+        written = pd.read_csv(csv_file, index_col=0, parse_dates=True)
+    assert len(stored) == len(written) == len(data)
+    pd.testing.assert_frame_equal(stored, data, check_freq=False)
+    np.testing.assert_allclose(written.to_numpy(), data.to_numpy())
+    print("PASS: update_data appends rows from the sources")
+
+
+if __name__ == "__main__":
+    test_round_trip_and_slicing()
+    test_append_only_new_rows()
+    test_csv_fallback_when_store_missing()
+    test_date_window_load_is_not_saved_back()
+    test_store_needs_its_csv_and_migrates_names()
+    test_update_data_appends_new_rows()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+
+import numpy as np
+
+from ragged import RaggedPanel
+from summary_kernel import summary_statistics
+from drawdown import max_drawdowns
+from price_store import write_price_store, read_price_store_ragged
+from synthetic_data import generate_panel
+from market_analysis import MarketIndexAnalyzer
+
+
+def _panel():
+    data = generate_panel(n_series=40, years=6, seed=23, late_listing=0.6, delisting=0.2)
+    data['Empty'] = np.nan
+    return data
+
+
+def test_round_trip_and_views():
+    data = _panel()
+    panel = RaggedPanel.from_frame(data)
+    assert panel.shape == data.shape and len(panel.values) == data.notna().sum().sum()
+    assert panel.nbytes < data.memory_usage().sum()
+    assert panel.to_frame().equals(data)
+    column = data.columns[5]
+    assert panel.series(column).equals(data[column].dropna())
+    positions, values = panel.column(column)
+    assert np.shares_memory(values, panel.values)
+    assert panel.select([data.columns[3], 'unknown', 'Empty']).to_frame().equals(data[[data.columns[3], 'Empty']])
+    sliced = panel.slice_dates('1992-03-01', '1994-07-15')
+    assert sliced.to_frame().equals(data.loc['1992-03-01':'1994-07-15'])
+
+
+def test_kernels_match_frame():
+    data = _panel()
+    panel = RaggedPanel.from_frame(data)
+    expected, result = summary_statistics(data), summary_statistics(panel)
+    numeric = expected.columns.drop(['start', 'end'])
+    assert np.allclose(result[numeric].to_numpy(float), expected[numeric].to_numpy(float), rtol=1e-12,
+                       equal_nan=True)
+    assert result['start'].equals(expected['start']) and result['end'].equals(expected['end'])
+    assert np.allclose(max_drawdowns(panel), max_drawdowns(data), equal_nan=True)
+
+
+def test_analyzer_runs_on_ragged_store():
+    data = _panel()
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file = os.path.join(directory, 'prices.csv')
+        data.to_csv(csv_file)
+        store_dir = os.path.join(directory, 'prices.store')
+        write_price_store(data, store_dir)
+        assert read_price_store_ragged(store_dir, start='1993-01-01').to_frame().equals(data.loc['1993-01-01':])
+
+        analyzer = MarketIndexAnalyzer()
+        analyzer.start_date, analyzer.end_date = '1990-01-01', '2030-01-01'
+        panel = analyzer.fetch_data(csv_file=csv_file, ragged=True)
+        assert isinstance(panel, RaggedPanel)
+        stats = analyzer.generate_summary_statistics()
+        drawdowns = analyzer._calculate_max_drawdown()
+        cumulative = analyzer.calculate_column_cumulative_returns()
+        # None of these needed the aligned frame
+        assert analyzer._data is None
+
+    reference = MarketIndexAnalyzer()
+    reference.data = data
+    assert stats.equals(reference.generate_summary_statistics())
+    assert drawdowns.equals(reference._calculate_max_drawdown())
+    assert cumulative.keys() == reference.calculate_column_cumulative_returns().keys()
+    # The aligned frame is still available on request
+    assert analyzer.data.equals(data) and analyzer.calculate_returns()[0].shape[1] == data.shape[1]
+
+
+if __name__ == "__main__":
+    test_round_trip_and_views()
+    test_kernels_match_frame()
+    test_analyzer_runs_on_ragged_store()
+    print("PASS: ragged panel")
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from response_cache import ResponseCache, OfflineCacheMiss
+
+
+def _response(rows=100):
+    dates = pd.bdate_range(start='2020-01-01', periods=rows)
+    return pd.DataFrame({'date': dates, 'close': np.linspace(1, 2, rows)})
+
+
+def test_hits_skip_the_network():
+    calls = []
+
+    def call():
+        calls.append(1)
+        return _response()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(tmp, ttl_seconds=60)
+        first = cache.fetch('yahoo', '^GSPC', '2020-01-01', '2021-01-01', call)
+        second = cache.fetch('yahoo', '^GSPC', '2020-01-01', '2021-01-01', call)
+        cache.fetch('yahoo', '^GSPC', '2019-01-01', '2021-01-01', call)  # different range
+        pd.testing.assert_frame_equal(first, second)
+        assert len(calls) == 2
+        assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 2
+    print("PASS: cache hits")
+
+
+def test_empty_responses_are_not_cached():
+    responses = [pd.DataFrame(), _response(), pd.DataFrame()]
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(tmp, ttl_seconds=0)
+        fetch = lambda: cache.fetch('yahoo', '^GSPC', '2020-01-01', '2021-01-01', lambda: responses.pop(0))
+        assert fetch().empty and not os.listdir(tmp)
+        assert len(fetch()) == 100
+        time.sleep(0.01)
+        # An expired entry whose refetch comes back empty is served stale
+        assert len(fetch()) == 100 and cache.stats()['stale_hits'] == 1
+    print("PASS: empty responses not cached")
+
+
+def test_ttl_expiry_and_offline_replay():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(tmp, ttl_seconds=0)
+        cache.fetch('akshare_china', 'sh000300', None, None, _response)
+        time.sleep(0.01)
+
+        refetched = []
+        cache.fetch('akshare_china', 'sh000300', None, None, lambda: refetched.append(1) or _response())
+        assert refetched == [1]
+
+        offline = ResponseCache(tmp, ttl_seconds=0, offline=True)
+
+        def no_network():
+            raise AssertionError("offline mode must not call the source")
+
+        assert not offline.fetch('akshare_china', 'sh000300', None, None, no_network).empty
+        try:
+            offline.fetch('akshare_china', 'sz399001', None, None, no_network)
+        except OfflineCacheMiss:
+            pass
+        else:
+            raise AssertionError("expected OfflineCacheMiss")
+    print("PASS: TTL and offline replay")
+
+
+def test_size_eviction_keeps_recent_entries():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = ResponseCache(tmp, max_bytes=10 ** 9)
+        for i in range(5):
+            cache.fetch('yahoo', f'^T{i}', None, None, lambda: _response(2000))
+            os.utime(cache._path('yahoo', f'^T{i}'), (i, i))  # deterministic LRU order
+        entry_size = cache.entries()[0][1]
+
+        cache.max_bytes = entry_size * 2
+        cache.evict()
+        kept = sorted(os.path.basename(path) for path, _, _ in cache.entries())
+        assert kept == sorted(os.path.basename(cache._path('yahoo', f'^T{i}')) for i in (3, 4))
+    print("PASS: size-based eviction")
+
+
+if __name__ == "__main__":
+    test_hits_skip_the_network()
+    test_empty_responses_are_not_cached()
+    test_ttl_expiry_and_offline_replay()
+    test_size_eviction_keeps_recent_entries()
@@ -0,0 +1,113 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from rolling_comoments import rolling_beta, rolling_pairs, rolling_correlation_matrices
+from market_analysis import MarketIndexAnalyzer
+
+
+def _returns():
+    rng = np.random.default_rng(22)
+    values = rng.normal(0.0004, 0.01, (1500, 5))
+    values[:, 1] += 0.8 * values[:, 0]
+    values[rng.random(values.shape) < 0.05] = np.nan
+    values[:300, 3] = np.nan
+    return pd.DataFrame(values, columns=['M', 'A', 'B', 'C', 'D'])
+
+
+def test_matches_pandas_rolling():
+    returns = _returns()
+    for window in (60, 252):
+        min_periods = window // 2
+        correlation, beta = rolling_beta(returns, 'M', window, min_periods=min_periods)
+        assert list(correlation.columns) == ['A', 'B', 'C', 'D']
+        for column in correlation.columns:
+            both = returns[[column, 'M']].notna().all(axis=1)
+            series, market = returns[column].where(both), returns['M'].where(both)
+            expected_corr = series.rolling(window, min_periods=min_periods).corr(market)
+            expected_beta = (series.rolling(window, min_periods=min_periods).cov(market)
+                             / market.rolling(window, min_periods=min_periods).var())
+            assert (correlation[column].isna() == expected_corr.isna()).all()
+            assert np.nanmax(np.abs(correlation[column] - expected_corr)) < 1e-12
+            assert np.nanmax(np.abs(beta[column] - expected_beta)) < 1e-12
+    # Chunking does not change the result; default min_periods is the full window
+    small = rolling_pairs(returns, 60, [('A', 'M')], min_periods=30, chunk_rows=7)['correlation']
+    assert np.allclose(small[('A', 'M')], rolling_beta(returns, 'M', 60, min_periods=30)[0]['A'], equal_nan=True)
+    assert rolling_pairs(returns.fillna(0), 60, [('A', 'M')])['correlation'].iloc[:59].isna().all().all()
+
+
+def test_matrices_stream_to_npy():
+    returns = _returns()
+    expected = returns.rolling(60, min_periods=30).corr()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'rolling.npy')
+        rolling_correlation_matrices(returns, 60, min_periods=30, output_file=path, chunk_rows=100)
+        stack = np.load(path, mmap_mode='r')
+        assert stack.shape == (1500, 5, 5) and stack.dtype == np.float32
+        for row in (40, 700, 1499):
+            matrix = expected.loc[row].to_numpy()
+            assert np.array_equal(np.isnan(stack[row]), np.isnan(matrix))
+            assert np.nanmax(np.abs(stack[row] - matrix)) < 1e-6
+        del stack
+
+
+def test_analyzer_rolling_beta():
+    rng = np.random.default_rng(5)
+    dates = pd.bdate_range('2010-01-04', periods=800)
+    market = rng.normal(0.0003, 0.01, 800)
+    prices = pd.DataFrame({'S&P 500 (US)': market, 'X': 1.5 * market + rng.normal(0, 0.002, 800)}, index=dates)
+    analyzer = MarketIndexAnalyzer()
+    analyzer.data = 100 * np.exp(prices.cumsum())
+    results = analyzer.calculate_rolling_correlation_beta()
+    assert set(results) == {60, 252}
+    beta = results[252]['beta']['X'].dropna()
+    # The first return is on row 1 and a window needs 80% of its 252 days
+    assert len(beta) == 800 - 1 - (int(0.8 * 252) - 1) and beta.between(1.3, 1.7).all()
+    assert analyzer.calculate_rolling_correlation_beta() is results
+
+
+def test_analyzer_rolling_beta_late_listing_and_holidays():
+    rng = np.random.default_rng(6)
+    dates = pd.bdate_range('2010-01-04', periods=800)
+    market = rng.normal(0.0003, 0.01, 800)
+    prices = pd.DataFrame({'S&P 500 (US)': market, 'X': 1.5 * market + rng.normal(0, 0.002, 800)}, index=dates)
+    prices = 100 * np.exp(prices.cumsum())
+    # X lists on row 300; each market misses about 4% of the days to its own holidays
+    prices.iloc[:300, 1] = np.nan
+    prices[rng.random(prices.shape) < 0.04] = np.nan
+    analyzer = MarketIndexAnalyzer()
+    analyzer.data = prices
+    beta = analyzer.calculate_rolling_correlation_beta(windows=(60,))[60]['beta']['X']
+    # Not cut to the rows where every index traded
+    assert beta.index.equals(prices.index)
+    # X's first return is on row 301; a window needs 48 (80% of 60) days both have a return
+    assert beta.iloc[:301 + 48 - 1].isna().all()
+    listed = beta.iloc[300 + 60:]
+    # A return spanning one market's holiday is paired with a one-day return of the other, so betas scatter more
+    assert listed.notna().mean() > 0.95 and listed.dropna().between(1.2, 1.7).all()
+    assert abs(listed.median() - 1.5) < 0.05
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, 'rolling.npy')
+        analyzer.save_rolling_correlation_matrices(window=60, output_file=output_file)
+        matrices = np.load(output_file)
+        # The default file name follows the window
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            assert analyzer.save_rolling_correlation_matrices(window=20) == 'rolling_correlation_20d.npy'
+            assert os.path.exists('rolling_correlation_20d.npy')
+        finally:
+            os.chdir(cwd)
+    assert matrices.shape == (800, 2, 2)
+    correlation = analyzer.calculate_rolling_correlation_beta(windows=(60,))[60]['correlation']['X']
+    np.testing.assert_allclose(matrices[:, 1, 0], correlation.to_numpy(), rtol=1e-6, equal_nan=True)
+
+
+if __name__ == "__main__":
+    test_matches_pandas_rolling()
+    test_matrices_stream_to_npy()
+    test_analyzer_rolling_beta()
+    test_analyzer_rolling_beta_late_listing_and_holidays()
+    print("PASS: rolling co-moments")
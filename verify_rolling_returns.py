@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from rolling_returns import rolling_return_summary
+
+
+def _panel(rows=600, cols=4, seed=1):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start='2000-01-03', periods=rows)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, (rows, cols)), axis=0))
+    df = pd.DataFrame(prices, index=dates, columns=[f'Index {i}' for i in range(cols)])
+    df.iloc[:150, 1] = np.nan               # late listing
+    df.iloc[rng.random(rows) < 0.05, 2] = np.nan  # market holidays
+    df.iloc[:, 3] = np.nan                  # no data at all
+    return df
+
+
+def test_matches_pct_change():
+    df = _panel()
+    horizons = {'short': 21, 'long': 252}
+    summary = rolling_return_summary(df, horizons, bins=20, chunk_columns=3)
+
+    for label, days in horizons.items():
+        rolling = df.pct_change(periods=days, fill_method=None)
+        expected = {
+            'count': rolling.notna().sum(),
+            'mean': rolling.mean(),
+            'std': rolling.std(),
+            'min': rolling.min(),
+            'max': rolling.max(),
+            'positive_pct': (rolling > 0).sum() / rolling.notna().sum() * 100,
+        }
+        for name, values in expected.items():
+            np.testing.assert_allclose(summary[label][name].values, values.values, rtol=1e-9, equal_nan=True)
+
+        for i, column in enumerate(df.columns[:3]):
+            counts, edges = np.histogram(rolling[column].dropna(), bins=20)
+            np.testing.assert_allclose(summary[label]['hist_edges'][i], edges)
+            assert np.abs(summary[label]['hist_counts'][i] - counts).sum() <= 2
+    print("PASS: rolling return summary matches pct_change")
+
+
+def test_horizon_longer_than_history():
+    summary = rolling_return_summary(_panel(rows=100), [252])
+    assert (summary[252]['count'] == 0).all()
+    assert summary[252]['mean'].isna().all()
+
+
+if __name__ == "__main__":
+    test_matches_pct_change()
+    test_horizon_longer_than_history()
@@ -0,0 +1,98 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from streaming import StreamingSummary, iter_price_chunks, stream_statistics
+from summary_kernel import summary_statistics
+from price_store import write_price_store
+from market_timing_cost import analyze_market_timing_cost_batch, timing_cost_curves
+from synthetic_data import generate_panel
+from market_analysis import MarketIndexAnalyzer
+
+
+def _panel():
+    data = generate_panel(n_series=25, years=6, seed=25, late_listing=0.5, delisting=0.2)
+    data['Empty'] = np.nan
+    return data
+
+
+def _chunks(data, rows):
+    return (data.iloc[i:i + rows] for i in range(0, len(data), rows))
+
+
+def test_matches_summary_statistics():
+    data = _panel()
+    expected = summary_statistics(data)
+    numeric = expected.columns.drop(['start', 'end'])
+    for rows in (1, 37, 500, len(data)):
+        result = stream_statistics(_chunks(data, rows)).summary()
+        assert list(result.columns) == list(expected.columns)
+        assert np.allclose(result[numeric].to_numpy(float), expected[numeric].to_numpy(float), rtol=1e-10,
+                           equal_nan=True)
+        assert result['start'].equals(expected['start']) and result['end'].equals(expected['end'])
+        # Extremes are exact: the same returns, only seen chunk by chunk
+        assert result['best_day'].equals(expected['best_day'])
+        assert result['max_drawdown'].equals(expected['max_drawdown'])
+    assert StreamingSummary().summary().empty
+
+
+def test_chunks_from_csv_and_store():
+    data = _panel()
+    columns = [data.columns[3], 'unknown', data.columns[1]]
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file = os.path.join(directory, 'prices.csv')
+        data.to_csv(csv_file)
+        chunks = list(iter_price_chunks(csv_file, columns=columns, start='1992-02-01', end='1994-06-30',
+                                        chunk_rows=100))
+        from_csv = pd.concat(chunks)
+        whole_csv = pd.read_csv(csv_file, index_col=0, parse_dates=True)
+        write_price_store(data, os.path.join(directory, 'prices.store'))
+        from_store = pd.concat(iter_price_chunks(csv_file, columns=columns, start='1992-02-01', end='1994-06-30',
+                                                 chunk_rows=100))
+    expected = data.loc['1992-02-01':'1994-06-30', [data.columns[3], data.columns[1]]]
+    assert max(len(chunk) for chunk in chunks) == 100
+    assert from_csv.equals(whole_csv.loc[expected.index, expected.columns])
+    assert from_store.equals(expected)
+
+
+def test_streaming_timing_cost_and_analyzer():
+    data = _panel()
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file = os.path.join(directory, 'prices.csv')
+        data.to_csv(csv_file)
+        streamed = analyze_market_timing_cost_batch(csv_file, max_days=20, stream=True, chunk_rows=64)
+
+        analyzer = MarketIndexAnalyzer()
+        analyzer.start_date, analyzer.end_date = '1990-01-01', '2030-01-01'
+        table = analyzer.stream_summary_statistics(csv_file, chunk_rows=64)
+        assert analyzer._is_empty()
+
+        # No rows: nothing to stream, as for the summary
+        empty_file = os.path.join(directory, 'empty.csv')
+        data.iloc[:0].to_csv(empty_file)
+        assert analyze_market_timing_cost_batch(empty_file, max_days=20, stream=True) is None
+
+    expected = timing_cost_curves(data, max_days=20)
+    assert streamed[['index', 'scenario', 'days_missed']].equals(expected[['index', 'scenario', 'days_missed']])
+    numeric = ['final_value', 'annualized_return', 'lost_amount', 'lost_percentage']
+    # lost_* is a small difference of large values, so compare it in absolute terms
+    assert np.allclose(streamed[numeric].to_numpy(float), expected[numeric].to_numpy(float), rtol=1e-9, atol=1e-6,
+                       equal_nan=True)
+
+    reference = MarketIndexAnalyzer()
+    reference.data = data
+    expected_table = reference.generate_summary_statistics()
+    labels = ['Data Start', 'Data End', 'Trading Days']
+    assert table[labels].equals(expected_table[labels])
+    numeric = expected_table.columns.drop(labels)
+    assert np.allclose(table[numeric].to_numpy(float), expected_table[numeric].to_numpy(float), atol=0.011,
+                       equal_nan=True)
+
+
+if __name__ == "__main__":
+    test_matches_summary_statistics()
+    test_chunks_from_csv_and_store()
+    test_streaming_timing_cost_and_analyzer()
+    print("PASS: streaming statistics")
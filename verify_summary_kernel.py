@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from summary_kernel import summary_statistics
+
+
+def test_matches_per_column_pandas():
+    rng = np.random.default_rng(7)
+    dates = pd.bdate_range(start='2000-01-03', periods=800)
+    data = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0.0002, 0.012, (800, 4)), axis=0)),
+                        index=dates, columns=['A', 'B', 'C', 'D'])
+    data.iloc[:200, 1] = np.nan                     # late listing
+    data.iloc[-50:, 2] = np.nan                     # delisted / stale tail
+    data.iloc[rng.random(800) < 0.1, 3] = np.nan    # holidays inside the series
+
+    result = summary_statistics(data, chunk_columns=3)
+    for col in data.columns:
+        prices = data[col].dropna()
+        returns = prices.pct_change().dropna()
+        assert result.loc[col, 'start'] == prices.index[0]
+        assert result.loc[col, 'end'] == prices.index[-1]
+        assert result.loc[col, 'count'] == len(prices)
+        np.testing.assert_allclose(result.loc[col, 'total_return'], prices.iloc[-1] / prices.iloc[0] - 1)
+        np.testing.assert_allclose(result.loc[col, 'volatility'], returns.std() * np.sqrt(252))
+        np.testing.assert_allclose(result.loc[col, 'sharpe'], returns.mean() / returns.std() * np.sqrt(252))
+        np.testing.assert_allclose(result.loc[col, 'max_drawdown'], (prices / prices.cummax() - 1).min())
+        np.testing.assert_allclose(result.loc[col, 'best_day'], returns.max())
+        np.testing.assert_allclose(result.loc[col, 'worst_day'], returns.min())
+    print("PASS: fused summary kernel matches pandas")
+
+
+def test_empty_column():
+    dates = pd.bdate_range(start='2000-01-03', periods=10)
+    data = pd.DataFrame({'A': np.linspace(1, 2, 10), 'B': np.nan}, index=dates)
+    result = summary_statistics(data)
+    assert result.loc['B', 'count'] == 0
+    assert pd.isna(result.loc['B', 'start']) and np.isnan(result.loc['B', 'volatility'])
+
+
+if __name__ == "__main__":
+    test_matches_per_column_pandas()
+    test_empty_column()
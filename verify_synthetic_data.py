@@ -0,0 +1,55 @@
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from synthetic_data import generate_panel
+from benchmark_suite import benchmark_panel, compare_reports
+
+
+def test_panel_is_seeded_and_has_gaps():
+    panel = generate_panel(n_series=300, years=10, seed=7, chunk_columns=64)
+    assert panel.shape == (2520, 300)
+    assert panel.index.name == 'snapshot_date' and panel.index.is_monotonic_increasing
+    assert panel.equals(generate_panel(n_series=300, years=10, seed=7, chunk_columns=64))
+    assert not panel.equals(generate_panel(n_series=300, years=10, seed=8, chunk_columns=64))
+    assert (panel.min() > 0).all()
+
+    missing = panel.isna()
+    # Holidays: every series misses a few scattered days
+    assert (missing.sum() > 0).all()
+    # Late listings and delistings: leading / trailing gaps
+    assert missing.iloc[0].mean() > 0.2
+    assert 0 < missing.iloc[-1].mean() < 0.3
+    # Daily log returns have plausible volatility
+    vol = np.log(panel).diff().std() * np.sqrt(252)
+    assert vol.between(0.05, 0.6).all()
+
+
+def test_benchmark_panel_and_compare():
+    panel = generate_panel(n_series=4, years=3, seed=1)
+    with tempfile.TemporaryDirectory() as directory:
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            results = benchmark_panel(panel, repeats=1, max_plot_series=2, workdir=directory)
+        finally:
+            os.chdir(cwd)
+    names = [r['benchmark'] for r in results]
+    assert names[:2] == ['fetch_data (csv)', 'fetch_data (store)'] and 'analyze_market_timing_cost' in names
+    assert [r for r in results if 'skipped' in r][0]['benchmark'] == 'plot_correlation_heatmap'
+    assert all(r['seconds'] > 0 for r in results if 'seconds' in r)
+
+    old = {'results': [dict(r, n_series=4, years=3) for r in results]}
+    new = json.loads(json.dumps(old))
+    new['results'][0]['seconds'] *= 2
+    comparison = compare_reports(old, new)
+    assert len(comparison) == len(results) - 1
+    assert comparison['ratio'].iloc[0] == 2
+
+
+if __name__ == "__main__":
+    test_panel_is_seeded_and_has_gaps()
+    test_benchmark_panel_and_compare()
+    print("PASS: synthetic panel and benchmark suite")
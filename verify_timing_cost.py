@@ -0,0 +1,101 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from market_timing_cost import (analyze_market_timing_cost, timing_cost_curves, simulate_missed_days,
+                                _sample_without_replacement)
+
+
+def _brute_force(prices, n_days, mode, initial_investment):
+    returns = prices.dropna().pct_change().dropna()
+    missed = returns.copy()
+    if mode in ('best', 'both'):
+        missed.loc[returns.sort_values(ascending=False).head(n_days).index] = 0
+    if mode in ('worst', 'both'):
+        missed.loc[returns.sort_values().head(n_days).index] = 0
+    final_value = initial_investment * (1 + missed).prod()
+    annualized = ((final_value / initial_investment) ** (252 / len(missed)) - 1) * 100
+    return final_value, annualized
+
+
+def test_curves_match_brute_force():
+    rng = np.random.default_rng(5)
+    dates = pd.bdate_range(start='2010-01-01', periods=400)
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, (400, 2)), axis=0)),
+                          index=dates, columns=['A', 'B'])
+    prices.iloc[:150, 1] = np.nan
+    prices.iloc[rng.random(400) < 0.05, 0] = np.nan
+
+    curves = timing_cost_curves(prices, max_days=30, initial_investment=1000)
+    assert len(curves) == 2 * 3 * 31
+    assert list(curves['index'].unique()) == ['A', 'B']
+
+    modes = {'Miss Best': 'best', 'Miss Worst': 'worst', 'Miss Best and Worst': 'both'}
+    for (index, scenario, n_days), row in curves.set_index(['index', 'scenario', 'days_missed']).iterrows():
+        if n_days % 7:
+            continue
+        final_value, annualized = _brute_force(prices[index], n_days, modes[scenario], 1000)
+        np.testing.assert_allclose(row['final_value'], final_value, rtol=1e-9)
+        np.testing.assert_allclose(row['annualized_return'], annualized, rtol=1e-9)
+
+
+def test_more_days_than_history_is_nan():
+    dates = pd.bdate_range(start='2010-01-01', periods=6)
+    prices = pd.DataFrame({'A': [1.0, 1.1, 1.0, 1.2, 1.3, 1.25]}, index=dates)
+    curves = timing_cost_curves(prices, max_days=10).set_index(['scenario', 'days_missed'])
+    assert not np.isnan(curves.loc[('Miss Best', 5), 'final_value'])
+    assert np.isnan(curves.loc[('Miss Best', 6), 'final_value'])
+    assert np.isnan(curves.loc[('Miss Best and Worst', 3), 'final_value'])
+
+
+def test_sampling_is_distinct_and_uniform():
+    rng = np.random.default_rng(0)
+    sample = _sample_without_replacement(rng, 10, 4, 50000)
+    assert (np.diff(sample, axis=1) > 0).all()
+    frequency = np.bincount(sample.ravel(), minlength=10) / sample.size
+    np.testing.assert_allclose(frequency, 0.1, atol=0.005)
+
+
+def test_simulation_bounds_and_seed():
+    dates = pd.bdate_range(start='2010-01-01', periods=300)
+    rng = np.random.default_rng(9)
+    prices = pd.DataFrame({'A': 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.01, 300)))}, index=dates)
+
+    kwargs = dict(days_missed=[10], n_paths=5000, block_length=5, initial_investment=100, chunk_size=1234)
+    first = simulate_missed_days(prices, seed=42, **kwargs)
+    second = simulate_missed_days(prices, seed=42, **kwargs)
+    pd.testing.assert_frame_equal(first, second)
+
+    curves = timing_cost_curves(prices, max_days=10, initial_investment=100).set_index(['scenario', 'days_missed'])
+    band = first.set_index('days_missed').loc[10]
+    # Random misses land between the deterministic best and worst cases
+    assert curves.loc[('Miss Best', 10), 'final_value'] <= band['p5'] <= band['p95']
+    assert band['p95'] <= curves.loc[('Miss Worst', 10), 'final_value']
+    # Missing every return leaves the starting amount
+    everything = simulate_missed_days(prices, days_missed=[299], n_paths=10, initial_investment=100, seed=1)
+    np.testing.assert_allclose(everything.loc[0, 'p50'], 100)
+
+
+def test_analysis_period_follows_date_window():
+    rng = np.random.default_rng(13)
+    dates = pd.bdate_range(start='2000-01-03', periods=1000)
+    prices = pd.DataFrame({'S&P 500 (US)': 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.01, 1000)))}, index=dates)
+    with tempfile.TemporaryDirectory() as directory:
+        csv_file = os.path.join(directory, 'prices.csv')
+        prices.to_csv(csv_file)
+        results = analyze_market_timing_cost(csv_file=csv_file, visualize=False, start='2001-01-01', end='2002-12-31')
+    window = prices.loc['2001-01-01':'2002-12-31', 'S&P 500 (US)']
+    assert results.attrs['period'] == (window.index[0], window.index[-1])
+    final_value = 10000 * window.iloc[-1] / window.iloc[0]
+    np.testing.assert_allclose(results.loc[0, 'final_value'], final_value)
+
+
+if __name__ == "__main__":
+    test_curves_match_brute_force()
+    test_more_days_than_history_is_nan()
+    test_sampling_is_distinct_and_uniform()
+    test_simulation_bounds_and_seed()
+    test_analysis_period_follows_date_window()
+    print("PASS: timing cost curves")